@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
-import time, select, curses
-from evdev import InputDevice, list_devices, ecodes
+import time, curses
+from evdev import ecodes
+
+from hub import HubEntrada, Assinante, achar_mouse
 
 # =========================
 # INPUT (gesto tipo "flap")
@@ -31,35 +33,16 @@ BIRD_X = 10
 def clamp(v, a, b):
     return a if v < a else b if v > b else v
 
-def achar_mouse():
-    candidatos = []
-    for path in list_devices():
-        dev = InputDevice(path)
-        caps = dev.capabilities(verbose=False)
-
-        tem_rel = ecodes.EV_REL in caps and any(
-            c in caps[ecodes.EV_REL] for c in (ecodes.REL_X, ecodes.REL_Y)
-        )
-        tem_btn = ecodes.EV_KEY in caps and ecodes.BTN_LEFT in caps[ecodes.EV_KEY]
-
-        if tem_rel:
-            candidatos.append((2 if tem_btn else 1, dev))
-
-    if not candidatos:
-        return None
-
-    candidatos.sort(key=lambda x: x[0], reverse=True)
-    return candidatos[0][1]
-
 class GestureFlap:
     """
     Detector de flap por gesto vertical (robusto):
     - valor bruto suavizado (sm_dy)
     - cooldown (MIN_GAP_S) + histerese (REARM_LEVEL)
     - opcional: só considera "subida" (USE_UP_SIGN)
+    Lê do hub (assinante): outros consumidores podem usar o mesmo device.
     """
-    def __init__(self, dev: InputDevice):
-        self.dev = dev
+    def __init__(self, entrada: Assinante):
+        self.entrada = entrada
         self.acc_dx = 0
         self.acc_dy = 0
         self.sm_dx = 0.0
@@ -76,19 +59,13 @@ class GestureFlap:
         self.flap = False
 
     def poll(self) -> bool:
-        # drena eventos disponíveis
-        while True:
-            r, _, _ = select.select([self.dev.fd], [], [], 0)
-            if not r:
-                break
-            e = self.dev.read_one()
-            if e is None:
-                break
-            if e.type == ecodes.EV_REL:
-                if e.code == ecodes.REL_X:
-                    self.acc_dx += e.value
-                elif e.code == ecodes.REL_Y:
-                    self.acc_dy += e.value
+        # o que o hub juntou desde o último poll (sem syscall)
+        for _, _, tipo, codigo, valor in self.entrada.ler():
+            if tipo == ecodes.EV_REL:
+                if codigo == ecodes.REL_X:
+                    self.acc_dx += valor
+                elif codigo == ecodes.REL_Y:
+                    self.acc_dy += valor
 
         now = time.monotonic()
         if (now - self.last_emit) * 1000.0 < WINDOW_MS:
@@ -131,6 +108,33 @@ class GestureFlap:
 
         return self.flap
 
+class HudBruto:
+    """
+    Segundo assinante do hub: eventos crus do mouse, sem suavização, para
+    comparar com o que o GestureFlap enxerga.
+    """
+    def __init__(self, entrada: Assinante):
+        self.entrada = entrada
+        self.dx = 0
+        self.dy = 0
+        self.eventos = 0
+        self.ultimo = None
+
+    def poll(self):
+        for _, _, tipo, codigo, valor in self.entrada.ler():
+            self.eventos += 1
+            self.ultimo = (tipo, codigo, valor)
+            if tipo == ecodes.EV_REL:
+                if codigo == ecodes.REL_X:
+                    self.dx += valor
+                elif codigo == ecodes.REL_Y:
+                    self.dy += valor
+
+    def texto(self):
+        ultimo = "-" if self.ultimo is None else "{}/{}={}".format(*self.ultimo)
+        return (f"RAW ev={self.eventos} x={self.dx} y={self.dy} ultimo={ultimo}"
+                f" perdidos={self.entrada.overruns}")
+
 def main(stdscr):
     curses.curs_set(0)
     stdscr.nodelay(True)
@@ -150,7 +154,12 @@ def main(stdscr):
         time.sleep(2)
         return
 
-    flap_in = GestureFlap(dev)
+    # o hub é dono do device; o detector de flap e o HUD cru são assinantes
+    hub = HubEntrada()
+    hub.abrir(dev)
+    hub.iniciar()
+    flap_in = GestureFlap(hub.assinar("flap"))
+    hud_bruto = HudBruto(hub.assinar("hud"))
 
     top = 1
     bottom = h - 2
@@ -203,7 +212,11 @@ def main(stdscr):
         stdscr.addstr(
             1, 2,
             f"IN up={flap_in.up:5.2f} d={flap_in.delta_up:5.2f} armed={'1' if flap_in.armed else '0'}"
+            f" perdidos={flap_in.entrada.overruns}"
         )
+        # HUD cru na última linha (abaixo do chão)
+        hud_bruto.poll()
+        stdscr.addstr(h - 1, 2, hud_bruto.texto()[:w - 3])
 
         for x in range(w):
             stdscr.addch(top, x, "-")
@@ -241,6 +254,7 @@ def main(stdscr):
 
         k = stdscr.getch()
         if k in (ord('q'), ord('Q')):
+            hub.parar()
             return
 
         # qualquer tecla inicia o jogo (inclusive Enter, espaço etc.)
@@ -363,5 +377,7 @@ def main(stdscr):
 
         time.sleep(0.001)
 
+    hub.parar()
+
 if __name__ == "__main__":
     curses.wrapper(main)
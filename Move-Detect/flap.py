@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
-import time, select
-from evdev import InputDevice, list_devices, ecodes
+import time
+from evdev import ecodes
+
+from hub import HubEntrada, achar_mouse
 
 # ====== Ajustes principais ======
 DEADZONE = 1
@@ -20,27 +22,6 @@ REARM_LEVEL = 2.5        # precisa cair abaixo disso para rearmar (histerese)
 USE_UP_SIGN = True
 
 
-def achar_mouse():
-    candidatos = []
-    for path in list_devices():
-        dev = InputDevice(path)
-        caps = dev.capabilities(verbose=False)
-
-        tem_rel = ecodes.EV_REL in caps and any(
-            c in caps[ecodes.EV_REL] for c in (ecodes.REL_X, ecodes.REL_Y)
-        )
-        tem_btn = ecodes.EV_KEY in caps and ecodes.BTN_LEFT in caps[ecodes.EV_KEY]
-
-        if tem_rel:
-            candidatos.append((2 if tem_btn else 1, dev))
-
-    if not candidatos:
-        return None
-
-    candidatos.sort(key=lambda x: x[0], reverse=True)
-    return candidatos[0][1]
-
-
 def main():
     dev = achar_mouse()
     if not dev:
@@ -50,6 +31,11 @@ def main():
     print(f"[OK] {dev.path} | {dev.name}")
     print("Rodando... (só imprime quando houver FLAP)  Ctrl+C para sair.\n")
 
+    hub = HubEntrada()
+    hub.abrir(dev)
+    hub.iniciar()
+    eventos = hub.assinar("flap")
+
     acc_dx = acc_dy = 0
     sm_dx = sm_dy = 0.0
     last_emit = time.monotonic()
@@ -61,19 +47,13 @@ def main():
 
     try:
         while True:
-            # drena eventos disponíveis
-            while True:
-                r, _, _ = select.select([dev.fd], [], [], 0)
-                if not r:
-                    break
-                e = dev.read_one()
-                if e is None:
-                    break
-                if e.type == ecodes.EV_REL:
-                    if e.code == ecodes.REL_X:
-                        acc_dx += e.value
-                    elif e.code == ecodes.REL_Y:
-                        acc_dy += e.value
+            # o que o hub juntou desde a última volta
+            for _, _, tipo, codigo, valor in eventos.ler():
+                if tipo == ecodes.EV_REL:
+                    if codigo == ecodes.REL_X:
+                        acc_dx += valor
+                    elif codigo == ecodes.REL_Y:
+                        acc_dy += valor
 
             now = time.monotonic()
             if (now - last_emit) * 1000.0 < WINDOW_MS:
@@ -114,6 +94,7 @@ def main():
 
     except KeyboardInterrupt:
         pass
+    hub.parar()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Hub de entrada: um leitor só para os /dev/input/event* e vários
+consumidores do mesmo device (ex.: detector de gesto + HUD).
+
+- uma thread com epoll lê todos os devices abertos no hub; cada leitura
+  traz um lote de input_event crus, que vira (t, fonte, tipo, código,
+  valor) só para EV_REL e EV_KEY
+- os eventos vão para um buffer circular pré-alocado (arrays de tamanho
+  fixo, potência de 2)
+- cada Assinante tem o seu cursor: ler() copia do buffer o que chegou
+  desde a última vez, sem select/read; quem ficou para trás mais que a
+  capacidade perde os mais velhos e isso entra em `overruns`
+
+Assinar mais um consumidor não custa nenhuma syscall a mais por evento.
+
+Ex.:
+    hub = HubEntrada()
+    hub.abrir(achar_mouse())
+    hub.iniciar()
+    gesto = hub.assinar("gesto")
+    ...
+    for t, fonte, tipo, codigo, valor in gesto.ler():
+        ...
+"""
+
+import os
+import select
+import struct
+import threading
+from array import array
+
+from evdev import InputDevice, list_devices, ecodes
+
+# struct input_event: timeval (2 longs) + type u16 + code u16 + value s32
+EVENTO = struct.Struct("llHHi")
+EVENTOS_POR_LEITURA = 256
+
+CAPACIDADE = 4096
+
+TIPOS = (ecodes.EV_REL, ecodes.EV_KEY)
+
+
+def achar_dispositivos():
+    """
+    Devices com REL_X/REL_Y, o mais "mouse" primeiro (com BTN_LEFT).
+    """
+    candidatos = []
+    for path in list_devices():
+        dev = InputDevice(path)
+        caps = dev.capabilities(verbose=False)
+
+        # mouse "clássico": eventos relativos + botão esquerdo
+        tem_rel = ecodes.EV_REL in caps and any(
+            c in caps[ecodes.EV_REL] for c in (ecodes.REL_X, ecodes.REL_Y)
+        )
+        tem_btn = ecodes.EV_KEY in caps and ecodes.BTN_LEFT in caps[ecodes.EV_KEY]
+
+        if tem_rel:
+            candidatos.append((2 if tem_btn else 1, dev))
+        else:
+            dev.close()
+
+    candidatos.sort(key=lambda x: x[0], reverse=True)
+    return [dev for _, dev in candidatos]
+
+
+def achar_mouse():
+    devs = achar_dispositivos()
+    for dev in devs[1:]:
+        dev.close()
+    return devs[0] if devs else None
+
+
+class HubEntrada:
+    def __init__(self, capacidade=CAPACIDADE):
+        if capacidade & (capacidade - 1) or capacidade <= EVENTOS_POR_LEITURA:
+            raise ValueError("capacidade precisa ser potência de 2 maior que EVENTOS_POR_LEITURA")
+        self.capacidade = capacidade
+        self.mascara = capacidade - 1
+
+        # buffer circular: posição = seq & mascara
+        self.t = array("d", bytes(8 * capacidade))
+        self.fonte = array("B", bytes(capacidade))
+        self.tipo = array("H", bytes(2 * capacidade))
+        self.codigo = array("H", bytes(2 * capacidade))
+        self.valor = array("i", bytes(4 * capacidade))
+        self.seq = 0             # eventos publicados desde o início
+
+        self.fontes = []         # índice -> device (InputDevice ou fd)
+        self.assinantes = []
+        self._por_fd = {}        # fd -> índice da fonte
+        self._novo = threading.Condition()
+        self._epoll = select.epoll()
+        self._thread = None
+        self._rodando = False
+
+        self.leituras = 0
+        self.descartados = 0     # eventos que não são REL/KEY (SYN, MSC, ...)
+        self.erros = 0
+
+    # ---------- DEVICES ----------
+    def abrir(self, dev):
+        """
+        Passa a ler `dev` (InputDevice, caminho ou fd já aberto em modo
+        não bloqueante). Devolve o índice da fonte.
+        """
+        if isinstance(dev, str):
+            dev = InputDevice(dev)
+        fd = dev if isinstance(dev, int) else dev.fd
+        idx = len(self.fontes)
+        if idx > 0xFF:
+            raise ValueError("fontes demais")
+        self.fontes.append(dev)
+        self._por_fd[fd] = idx
+        self._epoll.register(fd, select.EPOLLIN)
+        return idx
+
+    def _fechar_fonte(self, fd):
+        self._por_fd.pop(fd, None)
+        try:
+            self._epoll.unregister(fd)
+        except (OSError, ValueError):
+            pass
+
+    # ---------- ASSINANTES ----------
+    def assinar(self, nome=None, fontes=None):
+        """
+        Novo consumidor; vê só o que chegar a partir de agora. fontes:
+        índices aceitos (None = todos).
+        """
+        a = Assinante(self, nome or f"assinante{len(self.assinantes)}", fontes)
+        self.assinantes.append(a)
+        return a
+
+    def cancelar(self, assinante):
+        if assinante in self.assinantes:
+            self.assinantes.remove(assinante)
+
+    # ---------- THREAD ----------
+    def iniciar(self):
+        self._rodando = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._rodando = False
+        if self._thread:
+            self._thread.join(1.0)
+        self._epoll.close()
+
+    def _loop(self):
+        tamanho = EVENTO.size * EVENTOS_POR_LEITURA
+        while self._rodando:
+            try:
+                prontos = self._epoll.poll(0.2)
+            except InterruptedError:
+                continue
+            for fd, _ in prontos:
+                try:
+                    dados = os.read(fd, tamanho)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    # device sumiu (ENODEV): os outros continuam
+                    self.erros += 1
+                    self._fechar_fonte(fd)
+                    continue
+                if not dados:
+                    self._fechar_fonte(fd)
+                    continue
+                self.leituras += 1
+                self._publicar(self._por_fd.get(fd, 0), dados)
+
+    def _publicar(self, fonte, dados):
+        """
+        Lote de input_event crus -> buffer. O seq só anda no fim do lote:
+        até lá o escritor pode estar até EVENTOS_POR_LEITURA posições à
+        frente dele (Assinante.ler() leva isso em conta).
+        """
+        seq = self.seq
+        m = self.mascara
+        t, fon, tip, cod, val = self.t, self.fonte, self.tipo, self.codigo, self.valor
+        n = len(dados) - len(dados) % EVENTO.size
+        for seg, useg, tipo, codigo, valor in EVENTO.iter_unpack(dados[:n]):
+            if tipo not in TIPOS:
+                self.descartados += 1
+                continue
+            i = seq & m
+            t[i] = seg + useg * 1e-6
+            fon[i] = fonte
+            tip[i] = tipo
+            cod[i] = codigo
+            val[i] = valor
+            seq += 1
+        if seq != self.seq:
+            self.seq = seq
+            with self._novo:
+                self._novo.notify_all()
+
+    def estado(self):
+        return {
+            "fontes": len(self._por_fd),
+            "eventos": self.seq,
+            "leituras": self.leituras,
+            "eventos_por_leitura": round(self.seq / self.leituras, 1) if self.leituras else None,
+            "descartados": self.descartados,
+            "erros": self.erros,
+            "assinantes": [a.estado() for a in self.assinantes],
+        }
+
+
+class Assinante:
+    def __init__(self, hub, nome, fontes=None):
+        self.hub = hub
+        self.nome = nome
+        self.fontes = None if fontes is None else set(fontes)
+        self.cursor = hub.seq
+        self.lidos = 0
+        self.overruns = 0    # eventos perdidos por ficar para trás
+
+    def pendentes(self):
+        return self.hub.seq - self.cursor
+
+    def ler(self, max_eventos=None):
+        """
+        Eventos novos: [(t, fonte, tipo, código, valor)]. Não bloqueia.
+        """
+        hub = self.hub
+        # posições que o escritor pode estar sobrescrevendo agora
+        util = hub.capacidade - EVENTOS_POR_LEITURA
+        ini, fim = self.cursor, hub.seq
+        if fim - ini > util:
+            self.overruns += fim - ini - util
+            ini = fim - util
+        if max_eventos is not None:
+            fim = min(fim, ini + max_eventos)
+        if ini == fim:
+            return []
+
+        m = hub.mascara
+        t, fon, tip, cod, val = hub.t, hub.fonte, hub.tipo, hub.codigo, hub.valor
+        eventos = []
+        for s in range(ini, fim):
+            i = s & m
+            eventos.append((t[i], fon[i], tip[i], cod[i], val[i]))
+
+        # o escritor pode ter dado a volta enquanto copiávamos
+        perdidos = hub.seq - util - ini
+        if perdidos > 0:
+            perdidos = min(perdidos, len(eventos))
+            self.overruns += perdidos
+            eventos = eventos[perdidos:]
+
+        self.cursor = fim
+        if self.fontes is not None:
+            eventos = [e for e in eventos if e[1] in self.fontes]
+        self.lidos += len(eventos)
+        return eventos
+
+    def esperar(self, timeout=None):
+        """
+        Bloqueia até chegar algo novo (ou timeout). True se há eventos.
+        """
+        with self.hub._novo:
+            return self.hub._novo.wait_for(lambda: self.hub.seq != self.cursor, timeout)
+
+    def laco(self, intervalo=0.5):
+        """
+        Como o read_loop() do evdev: bloqueia e devolve evento a evento.
+        """
+        while True:
+            self.esperar(intervalo)
+            yield from self.ler()
+
+    def estado(self):
+        return {
+            "nome": self.nome,
+            "lidos": self.lidos,
+            "pendentes": self.pendentes(),
+            "overruns": self.overruns,
+        }
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
-import time, math, curses, select
-from evdev import InputDevice, list_devices, ecodes
+import time, math, curses
+from evdev import ecodes
+
+from hub import HubEntrada, Assinante, achar_mouse
 
 # =========================
 # MESMO TUNING (do seu código que funciona)
@@ -21,26 +23,6 @@ GAIN = 1.50        # sensibilidade global
 def clamp(v, a, b):
     return a if v < a else b if v > b else v
 
-def achar_mouse():
-    best = None
-    best_score = -1
-    for path in list_devices():
-        dev = InputDevice(path)
-        caps = dev.capabilities(verbose=False)
-
-        tem_rel = ecodes.EV_REL in caps and any(
-            c in caps[ecodes.EV_REL] for c in (ecodes.REL_X, ecodes.REL_Y)
-        )
-        if not tem_rel:
-            continue
-
-        tem_btn = ecodes.EV_KEY in caps and ecodes.BTN_LEFT in caps[ecodes.EV_KEY]
-        score = 2 if tem_btn else 1
-        if score > best_score:
-            best_score = score
-            best = dev
-    return best
-
 class DirIntensityInput:
     """
     Replica o seu pipeline:
@@ -48,9 +30,10 @@ class DirIntensityInput:
     - a cada WINDOW_MS: deadzone + smoothing
     - direção dominante (4 dirs)
     - intensidade 0..100
+    Lê do hub (assinante): outros consumidores podem usar o mesmo device.
     """
-    def __init__(self, dev: InputDevice):
-        self.dev = dev
+    def __init__(self, entrada: Assinante):
+        self.entrada = entrada
         self.acc_dx = 0
         self.acc_dy = 0
         self.last_emit = time.monotonic()
@@ -64,19 +47,13 @@ class DirIntensityInput:
         return int(round(100.0 * math.sqrt(mag_n)))
 
     def poll(self):
-        # non-blocking universal: só lê se houver dados
-        while True:
-            r, _, _ = select.select([self.dev.fd], [], [], 0)
-            if not r:
-                break
-            e = self.dev.read_one()
-            if e is None:
-                break
-            if e.type == ecodes.EV_REL:
-                if e.code == ecodes.REL_X:
-                    self.acc_dx += e.value
-                elif e.code == ecodes.REL_Y:
-                    self.acc_dy += e.value
+        # o que o hub juntou desde o último poll (sem syscall)
+        for _, _, tipo, codigo, valor in self.entrada.ler():
+            if tipo == ecodes.EV_REL:
+                if codigo == ecodes.REL_X:
+                    self.acc_dx += valor
+                elif codigo == ecodes.REL_Y:
+                    self.acc_dy += valor
 
         now = time.monotonic()
         if (now - self.last_emit) * 1000.0 < WINDOW_MS:
@@ -138,7 +115,11 @@ def main(stdscr):
         time.sleep(2)
         return
 
-    inp = DirIntensityInput(dev)
+    # o hub é dono do device; a nave é só um dos assinantes
+    hub = HubEntrada()
+    hub.abrir(dev)
+    hub.iniciar()
+    inp = DirIntensityInput(hub.assinar("nave"))
 
     x = float(w // 2)
     y = float(h // 2)
@@ -190,5 +171,7 @@ def main(stdscr):
 
         time.sleep(0.001)
 
+    hub.parar()
+
 if __name__ == "__main__":
     curses.wrapper(main)
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
-from evdev import InputDevice, list_devices, ecodes
+from evdev import ecodes
 import math, time
 
+from hub import HubEntrada, achar_mouse
+
 # =========================
 # TUNING (ajuste fino)
 # =========================
@@ -10,24 +12,6 @@ WINDOW_MS = 60        # acumula movimento numa janelinha (ms)
 SMOOTH = 0.35         # 0..1 (quanto maior, mais suave/lento)
 MAX_MAG = 40.0        # magnitude que vira "100" no output (normalização)
 
-def achar_mouse():
-    best = None
-    best_score = -1
-    for path in list_devices():
-        dev = InputDevice(path)
-        caps = dev.capabilities(verbose=False)
-        tem_rel = ecodes.EV_REL in caps and any(
-            c in caps[ecodes.EV_REL] for c in (ecodes.REL_X, ecodes.REL_Y)
-        )
-        if not tem_rel:
-            continue
-        tem_btn = ecodes.EV_KEY in caps and ecodes.BTN_LEFT in caps[ecodes.EV_KEY]
-        score = 2 if tem_btn else 1
-        if score > best_score:
-            best_score = score
-            best = dev
-    return best
-
 def clamp(v, a, b):
     return a if v < a else b if v > b else v
 
@@ -40,6 +24,11 @@ def main():
     print(f"[OK] {dev.path} | {dev.name}")
     print("Saída: DIREÇÃO + intensidade 0..100 (deadzone + smoothing). Ctrl+C para sair.\n")
 
+    hub = HubEntrada()
+    hub.abrir(dev)
+    hub.iniciar()
+    eventos = hub.assinar("norma")
+
     acc_dx = 0
     acc_dy = 0
     last_emit = time.monotonic()
@@ -49,12 +38,12 @@ def main():
     sm_dy = 0.0
 
     try:
-        for e in dev.read_loop():
-            if e.type == ecodes.EV_REL:
-                if e.code == ecodes.REL_X:
-                    acc_dx += e.value
-                elif e.code == ecodes.REL_Y:
-                    acc_dy += e.value
+        for _, _, tipo, codigo, valor in eventos.laco():
+            if tipo == ecodes.EV_REL:
+                if codigo == ecodes.REL_X:
+                    acc_dx += valor
+                elif codigo == ecodes.REL_Y:
+                    acc_dy += valor
 
             now = time.monotonic()
             if (now - last_emit) * 1000.0 >= WINDOW_MS:
@@ -94,6 +83,7 @@ def main():
 
     except KeyboardInterrupt:
         pass
+    hub.parar()
 
 if __name__ == "__main__":
     main()
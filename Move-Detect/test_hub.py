@@ -0,0 +1,138 @@
+"""
+Hub de entrada (hub.py) lendo de pipes no lugar de /dev/input/event*: o
+teste escreve input_event crus e confere o que cada assinante recebe,
+inclusive quando o buffer dá a volta e quando alguém fica para trás.
+
+    python3 -m unittest test_hub     (ou python3 -m pytest)
+"""
+
+import os
+import unittest
+
+try:
+    from evdev import ecodes
+    import hub
+    from hub import HubEntrada, EVENTO, EVENTOS_POR_LEITURA
+except ImportError:
+    hub = None
+
+CAPACIDADE = 512
+
+
+def _evento(tipo, codigo, valor, t=1.5):
+    return EVENTO.pack(int(t), int(t % 1 * 1e6), tipo, codigo, valor)
+
+
+def _movimentos(ini, n):
+    # REL_X com valor = número de sequência, cada um seguido de SYN_REPORT
+    return b"".join(
+        _evento(ecodes.EV_REL, ecodes.REL_X, v) + _evento(ecodes.EV_SYN, ecodes.SYN_REPORT, 0)
+        for v in range(ini, ini + n)
+    )
+
+
+@unittest.skipIf(hub is None, "o hub precisa do evdev")
+class TestHub(unittest.TestCase):
+    def setUp(self):
+        self.hub = HubEntrada(CAPACIDADE)
+        self.pipes = []
+
+    def tearDown(self):
+        self.hub.parar()
+        for fd in self.pipes:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _pipe(self):
+        r, w = os.pipe()
+        os.set_blocking(r, False)
+        self.pipes += [r, w]
+        return self.hub.abrir(r), w
+
+    def _escrever(self, w, dados, total):
+        # a thread do hub publica em lotes; espera chegar tudo
+        os.write(w, dados)
+        with self.hub._novo:
+            ok = self.hub._novo.wait_for(lambda: self.hub.seq >= total, 2.0)
+        self.assertTrue(ok, f"hub parou em {self.hub.seq} de {total}")
+
+    def test_dois_cursores_e_volta_no_buffer(self):
+        _, w = self._pipe()
+        self.hub.iniciar()
+        rapido = self.hub.assinar("rapido")
+        lento = self.hub.assinar("lento")
+
+        lote = EVENTOS_POR_LEITURA // 2
+        vistos = []
+        for i in range(8):   # 4x a capacidade: o buffer dá a volta
+            self._escrever(w, _movimentos(i * lote, lote), (i + 1) * lote)
+            vistos += rapido.ler()
+        total = 8 * lote
+
+        # o rápido viu tudo, em ordem, sem os SYN
+        self.assertEqual([v for _, _, _, _, v in vistos], list(range(total)))
+        self.assertTrue(all(e[2] == ecodes.EV_REL and e[3] == ecodes.REL_X for e in vistos))
+        self.assertEqual(vistos[0][0], 1.5)
+        self.assertEqual(rapido.overruns, 0)
+        self.assertEqual(self.hub.descartados, total)
+
+        # o lento perdeu os mais velhos e ficou com o que o buffer garante
+        util = CAPACIDADE - EVENTOS_POR_LEITURA
+        eventos = lento.ler()
+        self.assertEqual(lento.overruns, total - util)
+        self.assertEqual([v for _, _, _, _, v in eventos], list(range(total - util, total)))
+        self.assertEqual(lento.ler(), [])
+
+        estado = {a["nome"]: a for a in self.hub.estado()["assinantes"]}
+        self.assertEqual(estado["rapido"], {"nome": "rapido", "lidos": total, "pendentes": 0, "overruns": 0})
+        self.assertEqual(estado["lento"]["lidos"], util)
+        self.assertEqual(estado["lento"]["overruns"], total - util)
+
+    def test_max_eventos(self):
+        _, w = self._pipe()
+        self.hub.iniciar()
+        a = self.hub.assinar()
+        self._escrever(w, _movimentos(0, 10), 10)
+        self.assertEqual([e[4] for e in a.ler(4)], [0, 1, 2, 3])
+        self.assertEqual(a.pendentes(), 6)
+        self.assertEqual([e[4] for e in a.ler()], list(range(4, 10)))
+
+    def test_fontes(self):
+        mouse, w_mouse = self._pipe()
+        teclado, w_teclado = self._pipe()
+        self.hub.iniciar()
+        todos = self.hub.assinar("todos")
+        so_teclado = self.hub.assinar("teclado", fontes=[teclado])
+
+        self._escrever(w_mouse, _movimentos(0, 3), 3)
+        self._escrever(w_teclado, _evento(ecodes.EV_KEY, ecodes.BTN_LEFT, 1), 4)
+
+        self.assertEqual([e[1] for e in todos.ler()], [mouse] * 3 + [teclado])
+        self.assertEqual(so_teclado.ler(), [(1.5, teclado, ecodes.EV_KEY, ecodes.BTN_LEFT, 1)])
+
+    def test_fonte_fechada(self):
+        _, w = self._pipe()
+        self.hub.iniciar()
+        a = self.hub.assinar()
+        self._escrever(w, _movimentos(0, 2), 2)
+        os.close(w)
+        self.assertTrue(a.esperar(1.0))
+        self.assertEqual(len(a.ler()), 2)
+        # EOF tira a fonte do epoll; esperar() volta por timeout
+        for _ in range(50):
+            if not self.hub.estado()["fontes"]:
+                break
+            a.esperar(0.02)
+        self.assertEqual(self.hub.estado()["fontes"], 0)
+        self.assertFalse(a.esperar(0.05))
+
+    def test_capacidade_invalida(self):
+        for capacidade in (1000, EVENTOS_POR_LEITURA):
+            with self.assertRaises(ValueError):
+                HubEntrada(capacidade)
+
+
+if __name__ == "__main__":
+    unittest.main()
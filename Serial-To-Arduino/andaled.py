@@ -1,9 +1,7 @@
-import serial
-import serial.tools.list_ports
 import time
-import sys
-import tty
-import termios
+
+from dispositivos import listar_portas, abrir_porta, esperar_pronto
+from teclado import Teclado
 
 MATRIZ_LINHAS = 8
 MATRIZ_COLUNAS = 8
@@ -11,48 +9,14 @@ MATRIZ_COLUNAS = 8
 COR_JOGADOR = "0002550001"
 COR_FIXO    = "2550000001"
 
-def getch():
-    fd = sys.stdin.fileno()
-    old = termios.tcgetattr(fd)
-    try:
-        tty.setraw(fd)
-        return sys.stdin.read(1)
-    finally:
-        termios.tcsetattr(fd, termios.TCSADRAIN, old)
-
-def detectar_arduino():
-    for p in serial.tools.list_ports.comports():
-        if "ACM" in p.device or "USB" in p.device:
-            return p.device
-    return None
-
-porta = detectar_arduino() or "/dev/ttyACM0"
+porta = listar_portas()[0]
 print("[PORTA]", porta)
 
-ser = serial.Serial(
-    porta,
-    115200,
-    timeout=1,
-    write_timeout=1,
-    rtscts=False,
-    dsrdtr=False
-)
-
-# tempo real pro Arduino reiniciar
-time.sleep(3)
-
-# limpa qualquer lixo
-ser.reset_input_buffer()
-
-# espera READY (boot do Arduino)
-print("[INFO] aguardando Arduino...")
-t0 = time.time()
-while time.time() - t0 < 5:
-    line = ser.readline().decode(errors="ignore").strip()
-    if line:
-        print("[ARDUINO]", line)
-        if "READY" in line:
-            break
+# sem sleep fixo: pronto no READY do boot ou no PONG (sem reset)
+t0 = time.monotonic()
+ser = abrir_porta(porta)
+motivo, _ = esperar_pronto(ser, timeout=5)
+print(f"[INFO] Arduino pronto por {motivo or 'timeout'} em {(time.monotonic() - t0) * 1000:.0f} ms")
 
 def enviar(cmd):
     msg = (cmd+"\n").encode()
@@ -83,32 +47,40 @@ def ler_retorno():
     while ser.in_waiting:
         print("[ARDUINO]", ser.readline().decode(errors="ignore").strip())
 
-try:
-    while True:
-        cmd = getch().upper()
+teclado = Teclado().abrir()
 
-        if cmd == "Q":
-            break
+def processar(cmd):
+    global linha, coluna
+    nl, nc = linha, coluna
+    if cmd in ("W", "UP"): nl-=1
+    elif cmd in ("S", "DOWN"): nl+=1
+    elif cmd in ("A", "LEFT"): nc-=1
+    elif cmd in ("D", "RIGHT"): nc+=1
+    else:
+        return
 
-        nl, nc = linha, coluna
-        if cmd=="W": nl-=1
-        elif cmd=="S": nl+=1
-        elif cmd=="A": nc-=1
-        elif cmd=="D": nc+=1
-        else: 
-            continue
+    if 0<=nl<MATRIZ_LINHAS and 0<=nc<MATRIZ_COLUNAS:
+        apagar_led(linha,coluna)
+        linha,coluna = nl,nc
+        acender_led(linha,coluna,COR_JOGADOR)
 
-        if 0<=nl<MATRIZ_LINHAS and 0<=nc<MATRIZ_COLUNAS:
-            apagar_led(linha,coluna)
-            linha,coluna = nl,nc
-            acender_led(linha,coluna,COR_JOGADOR)
+try:
+    rodando = True
+    while rodando:
+        # todas as teclas que chegaram juntas, numa leitura só
+        for cmd in teclado.esperar():
+            if cmd == "Q":
+                rodando = False
+                break
+            processar(cmd)
 
         ler_retorno()
 
-except KeyboardInterrupt:
+except (KeyboardInterrupt, EOFError):
     pass
 
 finally:
+    teclado.fechar()
     enviar("CL")
     ser.close()
     print("[INFO] encerrado")
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Animações sem bloquear (vitória, derrota, início de round).
+
+Uma animação é uma linha do tempo declarativa de quadros-chave:
+
+    [(sprite, cor, duracao), ...]      sprite None = matriz apagada
+
+O Animador toca uma por vez em cima do reator: cada quadro é agendado no
+prazo absoluto t0 + soma das durações anteriores, então o tempo não
+escorrega se o loop atrasar (quadros que já passaram são pulados e o
+quadro certo para "agora" é desenhado). Enquanto toca, o teclado continua
+sendo lido: uma tecla pode pular a animação (vai direto pro último
+quadro e chama ao_fim) e trocar de cena a cancela sem chamar ao_fim.
+"""
+
+
+class Animacao:
+    def __init__(self, quadros, ao_fim=None, pulavel=True):
+        self.quadros = list(quadros)
+        self.ao_fim = ao_fim
+        self.pulavel = pulavel
+
+        # início de cada quadro relativo a t0
+        self.inicios = []
+        t = 0.0
+        for _, _, dur in self.quadros:
+            self.inicios.append(t)
+            t += dur
+        self.duracao = t
+
+
+class Animador:
+    def __init__(self, reator, desenhar):
+        """
+        desenhar(sprite, cor) põe um quadro no framebuffer e envia.
+        """
+        self.reator = reator
+        self.desenhar = desenhar
+        self.atual = None
+        self._t0 = 0.0
+        self._i = -1
+        self._timer = None
+
+        self.tocadas = 0
+        self.puladas = 0
+        self.canceladas = 0
+        self.quadros_perdidos = 0   # quadros que passaram sem ser desenhados (loop atrasado)
+
+    @property
+    def ativo(self):
+        return self.atual is not None
+
+    def tocar(self, quadros, ao_fim=None, pulavel=True):
+        self.cancelar()
+        self.atual = Animacao(quadros, ao_fim, pulavel)
+        self._t0 = self.reator.agora()
+        self._i = -1
+        self.tocadas += 1
+        self._avancar()
+
+    def _avancar(self):
+        anim = self.atual
+        dt = self.reator.agora() - self._t0
+
+        # quadro que deveria estar na tela agora
+        i = self._i
+        while i + 1 < len(anim.quadros) and anim.inicios[i + 1] <= dt:
+            i += 1
+        if i - self._i > 1:
+            self.quadros_perdidos += i - self._i - 1
+        if i != self._i:
+            self._i = i
+            sprite, cor, _ = anim.quadros[i]
+            self.desenhar(sprite, cor)
+
+        if self._i + 1 < len(anim.quadros):
+            prazo = self._t0 + anim.inicios[self._i + 1]
+        else:
+            prazo = self._t0 + anim.duracao
+            if dt >= anim.duracao:
+                self._terminar()
+                return
+        self._timer = self.reator.em(prazo, self._avancar)
+
+    def _terminar(self):
+        anim = self.atual
+        self.atual = None
+        self._timer = None
+        if anim.ao_fim:
+            anim.ao_fim()
+
+    def pular(self):
+        if not self.atual:
+            return
+        if self._timer:
+            self._timer.cancelar()
+        ultimo = len(self.atual.quadros) - 1
+        if ultimo >= 0 and self._i != ultimo:
+            sprite, cor, _ = self.atual.quadros[ultimo]
+            self.desenhar(sprite, cor)
+        self.puladas += 1
+        self._terminar()
+
+    def cancelar(self):
+        if not self.atual:
+            return
+        if self._timer:
+            self._timer.cancelar()
+        self.atual = None
+        self._timer = None
+        self.canceladas += 1
+
+    def tecla(self, k):
+        """
+        Entrega uma tecla à animação; True se ela foi consumida.
+        """
+        if not self.atual:
+            return False
+        if self.atual.pulavel:
+            self.pular()
+        return True
+
+    def estado(self):
+        return {
+            "tocadas": self.tocadas,
+            "puladas": self.puladas,
+            "canceladas": self.canceladas,
+            "quadros_perdidos": self.quadros_perdidos,
+        }
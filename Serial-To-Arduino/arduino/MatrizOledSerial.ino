@@ -22,6 +22,38 @@ Adafruit_SSD1306 display(LARGURA_OLED, ALTURA_OLED, &Wire, -1);
 char cmd[16];
 uint8_t cmdIdx = 0;
 
+// Frame binário (F + 64 pixels RGB565)
+#define FRAME_BYTES (NUM_PIXELS * 2)
+#define FRAME_TIMEOUT_MS 50
+
+bool emFrame = false;
+uint8_t frameIdx = 0;
+uint8_t frameHi = 0;
+unsigned long frameUltimoByte = 0;
+
+// Pacote binário: 0x00 + COBS(opcode + payload + CRC-8) + 0x00
+#define PKT_MAX 134
+#define OP_PIXELS 0x01
+#define OP_LIMPAR 0x02
+#define OP_FRAME  0x03
+#define OP_OLED   0x04
+#define OP_PALETA 0x05
+#define OP_FRAME_IDX 0x06
+#define OP_DELTA  0x07
+#define OP_OLED_RAW 0x08
+#define OP_MAX    OP_OLED_RAW
+#define PALETA_MAX 16
+
+uint8_t pkt[PKT_MAX];
+uint8_t pktIdx = 0;
+bool emPacote = false;
+bool pktEstouro = false;
+unsigned long pktUltimoByte = 0;
+
+// Paleta do modo indexado (entradas 0..nPaleta-1; índice fora = apagado)
+uint32_t paleta[PALETA_MAX];
+uint8_t nPaleta = 0;
+
 // =====================
 // UTILITÁRIOS MATRIZ
 // =====================
@@ -79,6 +111,237 @@ void atualizarOLED(char *p_cmd) {
   Serial.println(F("OLED_UPDATED"));
 }
 
+// Região do framebuffer desenhada no host (OP_OLED_RAW): copia no buffer
+// do display e manda só essas colunas pelo I2C, sem o display() inteiro.
+#define I2C_OLED 0x3C
+#define I2C_LOTE 16
+
+void oledRegiao(uint8_t pagina, uint8_t col, uint8_t n) {
+  display.ssd1306_command(SSD1306_PAGEADDR);
+  display.ssd1306_command(pagina);
+  display.ssd1306_command(pagina);
+  display.ssd1306_command(SSD1306_COLUMNADDR);
+  display.ssd1306_command(col);
+  display.ssd1306_command(col + n - 1);
+
+  uint8_t *buf = display.getBuffer() + (uint16_t)pagina * LARGURA_OLED + col;
+  while (n) {
+    uint8_t k = n < I2C_LOTE ? n : I2C_LOTE;
+    Wire.beginTransmission(I2C_OLED);
+    Wire.write((uint8_t)0x40);   // Co = 0, D/C = 1: dados
+    Wire.write(buf, k);
+    Wire.endTransmission();
+    buf += k;
+    n -= k;
+  }
+}
+
+// =====================
+// FRAME COMPLETO
+// =====================
+// Protocolo:
+//   O{LL}{V}{RRRRR}      -> HUD do OLED                 -> OLED_UPDATED
+//   MCL                  -> limpa matriz                -> MATRIZ_CLEARED
+//   M{l}{c}              -> apaga LED                   -> LED_OFF_OK / POS_INVALID
+//   M{l}{c}RRRGGGBBB[I]  -> liga LED (I = 1..9)         -> LED_ON_OK
+//   F + 128 bytes        -> frame inteiro, 64 pixels RGB565 big-endian
+//                           em ordem lógica (l*8+c), intensidade já aplicada
+//                                                       -> FRAME_OK / FRAME_TIMEOUT
+//   0x00 ... 0x00        -> pacote binário COBS + CRC-8 (ver PACOTE BINÁRIO)
+// O F só é reconhecido no início de um comando; os 128 bytes seguintes são
+// binários (podem conter '\n'). Um único strip.show() no final.
+void receberByteFrame(uint8_t b) {
+
+  frameUltimoByte = millis();
+
+  if ((frameIdx & 1) == 0) {
+    frameHi = b;
+  } else {
+    uint16_t v = ((uint16_t)frameHi << 8) | b;
+    uint8_t px = frameIdx >> 1;
+
+    uint8_t r5 = v >> 11;
+    uint8_t g6 = (v >> 5) & 0x3F;
+    uint8_t b5 = v & 0x1F;
+
+    strip.setPixelColor(
+      mapXY(px / MATRIX_SIZE, px % MATRIX_SIZE),
+      strip.Color((r5 << 3) | (r5 >> 2), (g6 << 2) | (g6 >> 4), (b5 << 3) | (b5 >> 2))
+    );
+  }
+
+  frameIdx++;
+
+  if (frameIdx >= FRAME_BYTES) {
+    emFrame = false;
+    strip.show();
+    Serial.println(F("FRAME_OK"));
+  }
+}
+
+// =====================
+// PACOTE BINÁRIO
+// =====================
+// Alternativa compacta ao ASCII (ver binario.py no host). Um 0x00 no início
+// de um comando abre o pacote, o próximo 0x00 fecha. Respostas continuam em
+// texto: PIXELS_OK, MATRIZ_CLEARED, FRAME_OK, OLED_UPDATED, PALETA_OK,
+// CRC_ERR, PKT_INVALID.
+uint8_t crc8(const uint8_t *d, uint8_t n) {
+  uint8_t crc = 0;
+  while (n--) {
+    crc ^= *d++;
+    for (uint8_t i = 0; i < 8; i++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+// decodifica COBS no próprio buffer; devolve o tamanho ou 0 se inválido
+uint8_t cobsDecodificar(uint8_t *buf, uint8_t n) {
+  uint8_t i = 0, o = 0;
+  while (i < n) {
+    uint8_t codigo = buf[i];
+    if (codigo == 0 || i + codigo > n) return 0;
+    for (uint8_t k = 1; k < codigo; k++) buf[o++] = buf[i + k];
+    i += codigo;
+    if (codigo < 0xFF && i < n) buf[o++] = 0;
+  }
+  return o;
+}
+
+uint32_t corRGB565(uint8_t hi, uint8_t lo) {
+  uint16_t v = ((uint16_t)hi << 8) | lo;
+  uint8_t r5 = v >> 11;
+  uint8_t g6 = (v >> 5) & 0x3F;
+  uint8_t b5 = v & 0x1F;
+  return strip.Color((r5 << 3) | (r5 >> 2), (g6 << 2) | (g6 >> 4), (b5 << 3) | (b5 >> 2));
+}
+
+void processarPacote() {
+
+  uint8_t n = cobsDecodificar(pkt, pktIdx);
+
+  if (n < 2) {
+    Serial.println(F("PKT_INVALID"));
+    return;
+  }
+  if (crc8(pkt, n - 1) != pkt[n - 1]) {
+    Serial.println(F("CRC_ERR"));
+    return;
+  }
+
+  uint8_t op = pkt[0];
+  uint8_t *p = &pkt[1];
+  uint8_t len = n - 2;
+
+  if (op == OP_PIXELS && len % 3 == 0) {
+    for (uint8_t i = 0; i < len; i += 3) {
+      uint8_t l = p[i] >> 4;
+      uint8_t c = p[i] & 0x0F;
+      if (l < MATRIX_SIZE && c < MATRIX_SIZE) {
+        strip.setPixelColor(mapXY(l, c), corRGB565(p[i + 1], p[i + 2]));
+      }
+    }
+    strip.show();
+    Serial.println(F("PIXELS_OK"));
+    return;
+  }
+
+  if (op == OP_LIMPAR && len == 0) {
+    strip.clear();
+    strip.show();
+    Serial.println(F("MATRIZ_CLEARED"));
+    return;
+  }
+
+  if (op == OP_FRAME && len == FRAME_BYTES) {
+    for (uint8_t px = 0; px < NUM_PIXELS; px++) {
+      strip.setPixelColor(mapXY(px / MATRIX_SIZE, px % MATRIX_SIZE), corRGB565(p[2 * px], p[2 * px + 1]));
+    }
+    strip.show();
+    Serial.println(F("FRAME_OK"));
+    return;
+  }
+
+  if (op == OP_OLED && len == 8) {
+    // reaproveita o parser do comando O (O + LLVRRRRR)
+    char oled[10];
+    oled[0] = 'O';
+    memcpy(&oled[1], p, 8);
+    oled[9] = '\0';
+    atualizarOLED(oled);
+    return;
+  }
+
+  if (op == OP_OLED_RAW && len >= 3) {
+    // [página][coluna][n bytes]
+    uint8_t pagina = p[0];
+    uint8_t col = p[1];
+    uint8_t n = len - 2;
+    if (pagina >= ALTURA_OLED / 8 || (uint16_t)col + n > LARGURA_OLED) {
+      Serial.println(F("PKT_INVALID"));
+      return;
+    }
+    memcpy(display.getBuffer() + (uint16_t)pagina * LARGURA_OLED + col, &p[2], n);
+    oledRegiao(pagina, col, n);
+    Serial.println(F("OLED_UPDATED"));
+    return;
+  }
+
+  if (op == OP_PALETA && len >= 2 && len <= 2 * PALETA_MAX && len % 2 == 0) {
+    nPaleta = len / 2;
+    for (uint8_t i = 0; i < nPaleta; i++) {
+      paleta[i] = corRGB565(p[2 * i], p[2 * i + 1]);
+    }
+    Serial.println(F("PALETA_OK"));
+    return;
+  }
+
+  if (op == OP_FRAME_IDX && len == NUM_PIXELS / 2) {
+    // 2 pixels por byte: par no nibble alto
+    for (uint8_t px = 0; px < NUM_PIXELS; px++) {
+      uint8_t idx = (px & 1) ? (p[px >> 1] & 0x0F) : (p[px >> 1] >> 4);
+      strip.setPixelColor(mapXY(px / MATRIX_SIZE, px % MATRIX_SIZE), idx < nPaleta ? paleta[idx] : 0);
+    }
+    strip.show();
+    Serial.println(F("FRAME_OK"));
+    return;
+  }
+
+  if (op == OP_DELTA) {
+    // corridas [pula][n][n x RGB565]: valida tudo antes de mexer no strip
+    uint16_t i = 0, pos = 0;
+    while (i < len) {
+      if (i + 2 > len) break;
+      pos += p[i];
+      uint8_t n = p[i + 1];
+      i += 2 + 2 * (uint16_t)n;
+      pos += n;
+      if (i > len || pos > NUM_PIXELS) break;
+    }
+    if (i != len || pos > NUM_PIXELS) {
+      Serial.println(F("PKT_INVALID"));
+      return;
+    }
+    i = 0;
+    pos = 0;
+    while (i < len) {
+      pos += p[i];
+      uint8_t n = p[i + 1];
+      i += 2;
+      for (; n; n--, pos++, i += 2) {
+        strip.setPixelColor(mapXY(pos / MATRIX_SIZE, pos % MATRIX_SIZE), corRGB565(p[i], p[i + 1]));
+      }
+    }
+    strip.show();
+    Serial.println(F("FRAME_OK"));
+    return;
+  }
+
+  Serial.println(F("PKT_INVALID"));
+}
+
 // =====================
 // SERIAL COMMAND
 // =====================
@@ -86,6 +349,12 @@ void processarComando(char *p_cmd) {
 
   char prefixo = p_cmd[0];
 
+  // handshake do host: responde na hora, sem esperar reset/boot
+  if(strcmp(p_cmd,"PING")==0){
+    Serial.println(F("PONG"));
+    return;
+  }
+
   // OLED
   if(prefixo=='O'){
     atualizarOLED(p_cmd);
@@ -178,27 +447,89 @@ void setup() {
   Serial.println(F("READY_SYSTEM"));
 }
 
-// =====================
-// LOOP
-// =====================
-void loop(){
+// um byte vindo da serial (texto, frame F ou pacote binário)
+void receberByte(char ch){
 
-  while(Serial.available()){
+  if(emFrame){
+    receberByteFrame((uint8_t)ch);
+    return;
+  }
 
-    char ch=Serial.read();
+  if(emPacote){
+    pktUltimoByte=millis();
+    if(ch!=0){
+      // um pacote começa com o código COBS (>= 2, o opcode nunca é 0)
+      // e o opcode; qualquer outra coisa depois de um 0x00 solto é um
+      // comando de texto (M.., O.., PING): sai do modo pacote na hora e
+      // reprocessa os dois bytes
+      if(pktIdx==1 && (pkt[0]<2 || (uint8_t)ch<OP_PIXELS || (uint8_t)ch>OP_MAX)){
+        emPacote=false;
+        pktIdx=0;
+        receberByte((char)pkt[0]);
+        receberByte(ch);
+        return;
+      }
+      if(pktIdx<PKT_MAX) pkt[pktIdx++]=(uint8_t)ch;
+      else pktEstouro=true;
+    }else if(pktIdx>0){
+      // 0x00 final
+      emPacote=false;
+      if(pktEstouro) Serial.println(F("PKT_INVALID"));
+      else processarPacote();
+    }
+    return;
+  }
 
-    if(ch=='\n'){
+  if(ch==0 && cmdIdx==0){
+    emPacote=true;
+    pktEstouro=false;
+    pktIdx=0;
+    pktUltimoByte=millis();
+    return;
+  }
 
-      cmd[cmdIdx]='\0';
-      processarComando(cmd);
-      cmdIdx=0;
+  if(ch=='F' && cmdIdx==0){
+    emFrame=true;
+    frameIdx=0;
+    frameUltimoByte=millis();
+    return;
+  }
 
-    }else if(cmdIdx<sizeof(cmd)-1){
+  if(ch=='\n'){
 
-      cmd[cmdIdx++]=ch;
+    cmd[cmdIdx]='\0';
+    processarComando(cmd);
+    cmdIdx=0;
 
-    }
+  }else if(cmdIdx<sizeof(cmd)-1){
+
+    cmd[cmdIdx++]=ch;
+
+  }
 
+}
+
+// =====================
+// LOOP
+// =====================
+void loop(){
+
+  // frame interrompido no meio: descarta e volta pro modo texto
+  if(emFrame && millis()-frameUltimoByte>FRAME_TIMEOUT_MS){
+    emFrame=false;
+    Serial.println(F("FRAME_TIMEOUT"));
   }
 
-}
\ No newline at end of file
+  // pacote binário interrompido no meio; um 0x00 solto (ruído) sem nada
+  // depois também expira, em silêncio (com texto logo depois, receberByte
+  // já saiu do modo pacote)
+  if(emPacote && millis()-pktUltimoByte>FRAME_TIMEOUT_MS){
+    emPacote=false;
+    if(pktIdx>0) Serial.println(F("PKT_INVALID"));
+  }
+
+  while(Serial.available()){
+    receberByte(Serial.read());
+  }
+
+}
@@ -50,6 +50,12 @@ void setup() {
 void processarComando(char *cmd) {
   int len = strlen(cmd);
 
+  // handshake do host: responde na hora, sem esperar reset/boot
+  if (strcmp(cmd, "PING") == 0) {
+    Serial.println("PONG");
+    return;
+  }
+
   // LIMPAR MATRIZ
   if (strcmp(cmd, "CL") == 0) {
     strip.clear();
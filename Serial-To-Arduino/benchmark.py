@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Benchmark do link serial (host -> Arduino da matriz/OLED).
+
+Roda cargas padrão por cima do TransporteSerial, numa porta real ou no
+emulador.py, e mede:
+- comandos/s e bytes/s
+- p50/p95/p99 do tempo entre o submit e o ACK do device (por comando)
+- p50/p95/p99 da latência de frame (submit do 1º comando -> ACK do último)
+
+Com --protocolo delta os frames passam pelo delta.CodificadorDelta
+(keyframe / delta XOR+RLE / nada) e o resultado traz a razão de compressão
+e o tempo de codificação por frame.
+
+Varre pacing base, baud, tamanho de lote, janela de ACK, limite de bytes
+em voo (--max-bytes; 0 = sem limite) e protocolo, e acrescenta os resultados em <saida>.jsonl e <saida>.csv para comparar
+rodadas ao longo do tempo.
+
+Ex.:
+    python3 benchmark.py --cargas x,snake --pacing 0.002,0.004 --janela 0,2,4
+    python3 benchmark.py --porta /dev/ttyACM0 --cargas andaled --frames 100
+    python3 benchmark.py --cargas scroll,onda --protocolo frame,delta
+    python3 benchmark.py --cargas x --protocolo frame --janela 0,1,2 --max-bytes 63,0 --perdas
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import binario
+import protocolo
+from delta import CodificadorDelta
+from dispositivos import abrir_porta, esperar_pronto
+from emulador import Emulador
+from fluxo import ControleFluxo, RESPOSTAS, RESPOSTAS_ERRO, RX_BUFFER, percentil
+from framebuffer import Framebuffer
+from transporte import TransporteSerial
+
+COR = "2550000001"
+COR_CABECA = "0002552551"
+COR_CORPO = "0002550001"
+
+
+# ---------- CARGAS ----------
+# cada carga gera frames; um frame é uma lista de operações:
+#   ("limpar",) | ("pixels", [(l, c, cor), ...]) | ("oled", (level, vidas, recorde))
+
+def carga_andaled(n):
+    # um pixel andando pela matriz (apaga o antigo, acende o novo)
+    l, c = 0, 0
+    for i in range(n):
+        nl, nc = divmod((l * 8 + c + 1) % 64, 8)
+        yield [("pixels", [(l, c, None)]), ("pixels", [(nl, nc, COR)])]
+        l, c = nl, nc
+
+def carga_x(n):
+    # desenhar_X do game.py: limpa + 16 pixels
+    pts = [(i, i, COR) for i in range(8)] + [(i, 7 - i, COR) for i in range(8)]
+    for _ in range(n):
+        yield [("limpar",), ("pixels", pts)]
+
+def carga_clear(n):
+    for _ in range(n):
+        yield [("limpar",)]
+
+def carga_snake(n):
+    # cobra crescendo em espiral; frame = diff do framebuffer
+    fb = Framebuffer()
+    cobra = [(4, 2), (4, 3), (4, 4)]
+    dirs = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    d = 0
+    for i in range(n):
+        if i % 5 == 0:
+            d = (d + 1) % 4
+        head = cobra[0]
+        nova = ((head[0] + dirs[d][0]) % 8, (head[1] + dirs[d][1]) % 8)
+        if nova in cobra:
+            cobra = cobra[:3]
+        cobra.insert(0, nova)
+        if i % 3:
+            cobra.pop()   # cresce 1 a cada 3 ticks
+
+        fb.limpar()
+        fb.acender(cobra[0][0], cobra[0][1], COR_CABECA)
+        for l, c in cobra[1:]:
+            fb.acender(l, c, COR_CORPO)
+        yield [("pixels", fb.commit())]
+
+def carga_oled(n):
+    for i in range(n):
+        yield [("oled", (i % 100, i % 4, i))]
+
+def carga_scroll(n):
+    # letreiro: blocos de 2 colunas andando 1 coluna por frame (frame inteiro
+    # redesenhado, mas só as bordas dos blocos mudam)
+    cores = ["2550000001", "0002550001", "0000002551"]
+    for i in range(n):
+        px = [(l, c, cores[((c + i) // 6) % 3] if 2 <= l <= 5 and (c + i) % 6 < 2 else None)
+              for l in range(8) for c in range(8)]
+        yield [("pixels", px)]
+
+def carga_onda(n):
+    # efeito de cor cheio: todo pixel muda de brilho a cada frame
+    for i in range(n):
+        px = []
+        for l in range(8):
+            for c in range(8):
+                v = (l * 32 + c * 16 + i * 24) % 256
+                px.append((l, c, f"{v:03d}{255 - v:03d}0809"))
+        yield [("pixels", px)]
+
+CARGAS = {
+    "andaled": carga_andaled,
+    "x": carga_x,
+    "clear": carga_clear,
+    "snake": carga_snake,
+    "oled": carga_oled,
+    "scroll": carga_scroll,
+    "onda": carga_onda,
+}
+
+
+# ---------- CODIFICAÇÃO ----------
+class Codificador:
+    """
+    ascii   = comandos legados (1 linha por pixel)
+    binario = pacotes COBS, pixels do frame num pacote só
+    frame   = matriz inteira via comando F a cada frame
+    delta   = keyframe / delta (OP_DELTA) / nada, escolhido por frame
+    """
+    def __init__(self, protocolo_nome):
+        self.nome = protocolo_nome
+        self.fb = Framebuffer()
+        self.delta = CodificadorDelta() if protocolo_nome == "delta" else None
+
+    def frame(self, ops):
+        cmds = []
+        matriz_mudou = False
+        for op in ops:
+            if op[0] == "limpar":
+                self.fb.limpar()
+                if self.nome == "ascii":
+                    cmds.append(b"MCL\n")
+                elif self.nome in ("binario", "delta"):
+                    cmds.append(binario.limpar())
+                    if self.delta:
+                        self.delta.resync()
+                matriz_mudou = True
+
+            elif op[0] == "pixels":
+                for l, c, cor in op[1]:
+                    self.fb.acender(l, c, cor)
+                if self.nome == "ascii":
+                    cmds += [(protocolo.cmd_pixel(l, c, cor) + "\n").encode() for l, c, cor in op[1]]
+                elif self.nome == "binario" and op[1]:
+                    cmds += binario.pixels(op[1])
+                matriz_mudou = True
+
+            elif op[0] == "oled":
+                level, vidas, recorde = op[1]
+                if self.nome in ("binario", "delta"):
+                    cmds.append(binario.oled(level, vidas, recorde % 100000))
+                else:
+                    cmds.append(f"O{level:02d}{vidas:01d}{recorde % 100000:05d}\n".encode())
+
+        if self.nome == "frame" and matriz_mudou:
+            cmds.append(protocolo.codificar_frame(self.fb.pixels))
+        if self.delta and matriz_mudou:
+            pkt = self.delta.codificar(self.fb.pixels)
+            if pkt:
+                cmds.append(pkt)
+        return cmds
+
+
+# ---------- EXECUÇÃO ----------
+def medir(carga, protocolo_nome, porta, baud, pacing, lote, janela, max_bytes, frames, fps, perdas):
+    emu = None
+    if porta is None:
+        emu = Emulador(baud=baud, simular_perdas=perdas).iniciar()
+        porta = emu.porta
+
+    def abrir():
+        # mesmo handshake do jogo: READY ou PONG em vez de um sleep fixo
+        # (esperar_pronto já descarta as respostas atrasadas dos PINGs)
+        s = abrir_porta(porta, baud)
+        motivo, _ = esperar_pronto(s, prefixo=f" {porta}")
+        if motivo is None:
+            print(f"[WARN] {porta}: sem READY/PONG, medindo assim mesmo")
+        return s
+
+    # o delta codifica cada frame na hora de enviar: a base dele anda com
+    # os ACKs do device
+    codificador = Codificador(protocolo_nome)
+    frames_ops = list(CARGAS[carga](frames))
+    total = 0
+    n_frames = 0
+    enviado = False
+
+    # casamento em ordem: cada comando tem exatamente uma resposta
+    pendentes = deque()          # (t_submit, t_frame, ultimo_do_frame, cmd)
+    lat_cmd, lat_frame = [], []
+    erros = {}
+    fim = threading.Event()
+    lock = threading.Lock()
+
+    def ao_receber(linha):
+        if linha not in RESPOSTAS:
+            return
+        agora = time.monotonic()
+        with lock:
+            if not pendentes:
+                return
+            t_submit, t_frame, ultimo, cmd = pendentes.popleft()
+            lat_cmd.append(agora - t_submit)
+            if ultimo:
+                lat_frame.append(agora - t_frame)
+            if linha in RESPOSTAS_ERRO:
+                erros[linha] = erros.get(linha, 0) + 1
+            if codificador.delta and not janela:
+                # sem ControleFluxo o casamento daqui é o único que existe
+                codificador.delta.confirmar(cmd, linha)
+            if enviado and len(lat_cmd) >= total:
+                fim.set()
+
+    def ao_ack(cmd, resposta):
+        with lock:
+            codificador.delta.confirmar(cmd, resposta)
+
+    def ao_perda():
+        with lock:
+            codificador.delta.resync()
+
+    link = TransporteSerial(
+        abrir, max_fila=1 << 20, max_lote=lote, ao_receber=ao_receber,
+        fluxo=ControleFluxo(janela=janela, max_bytes=max_bytes or None) if janela else None,
+        pacing_base=pacing,
+    )
+    if codificador.delta:
+        link.ao_ack = ao_ack
+        link.ao_perda = ao_perda
+    link.iniciar()
+
+    intervalo = 1.0 / fps if fps else 0.0
+    t0 = time.monotonic()
+    for i, ops in enumerate(frames_ops):
+        if intervalo:
+            alvo = t0 + i * intervalo
+            espera = alvo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+        t_frame = time.monotonic()
+        with lock:
+            cmds = codificador.frame(ops)
+            if not cmds:
+                continue
+            n_frames += 1
+            total += len(cmds)
+            for j, cmd in enumerate(cmds):
+                pendentes.append((t_frame, t_frame, j == len(cmds) - 1, cmd))
+        for cmd in cmds:
+            link.enviar(cmd)
+    with lock:
+        enviado = True
+        if len(lat_cmd) >= total:
+            fim.set()
+
+    fim.wait(max(5.0, total * 0.05))
+    duracao = time.monotonic() - t0
+    link.fechar()
+    est = link.estado()
+    compressao = codificador.delta.estado() if codificador.delta else {}
+    if emu:
+        emu_est = emu.estado()
+        emu.parar()
+
+    ms = lambda v: None if v is None else round(v * 1000, 3)
+    return {
+        "quando": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "carga": carga,
+        "protocolo": protocolo_nome,
+        "porta": "emulador" if emu else porta,
+        "baud": baud,
+        "pacing": pacing,
+        "lote": lote,
+        "janela": janela,
+        "max_bytes": max_bytes if janela else None,
+        "fps": fps,
+        "frames": n_frames,
+        "comandos": total,
+        "acks": len(lat_cmd),
+        "perdidos": total - len(lat_cmd),
+        "erros": json.dumps(erros, sort_keys=True),
+        "duracao_s": round(duracao, 4),
+        "cmds_s": round(len(lat_cmd) / duracao, 1) if duracao else None,
+        "bytes_s": round(est["bytes_enviados"] / duracao, 1) if duracao else None,
+        "bytes_cmd": round(est["bytes_enviados"] / max(1, total), 2),
+        "ack_p50_ms": ms(percentil(lat_cmd, 50)),
+        "ack_p95_ms": ms(percentil(lat_cmd, 95)),
+        "ack_p99_ms": ms(percentil(lat_cmd, 99)),
+        "frame_p50_ms": ms(percentil(lat_frame, 50)),
+        "frame_p95_ms": ms(percentil(lat_frame, 95)),
+        "frame_p99_ms": ms(percentil(lat_frame, 99)),
+        "bytes_perdidos_device": emu_est["bytes_perdidos"] if emu else None,
+        "esperas_bytes": est["fluxo"]["esperas_bytes"] if est.get("fluxo") else None,
+        "razao_compressao": compressao.get("razao_compressao"),
+        "keyframes": compressao.get("keyframes"),
+        "encode_us_p50": compressao.get("encode_us_p50"),
+    }
+
+
+def salvar(resultados, saida):
+    pasta = os.path.dirname(saida)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+
+    with open(saida + ".jsonl", "a") as f:
+        for r in resultados:
+            f.write(json.dumps(r) + "\n")
+
+    caminho_csv = saida + ".csv"
+    novo = not os.path.exists(caminho_csv)
+    with open(caminho_csv, "a", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(resultados[0].keys()))
+        if novo:
+            w.writeheader()
+        w.writerows(resultados)
+
+
+def _lista(tipo):
+    return lambda s: [tipo(x) for x in s.split(",") if x]
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark do link serial da matriz/OLED")
+    ap.add_argument("--porta", help="porta real (sem isso usa o emulador.py)")
+    ap.add_argument("--cargas", type=_lista(str), default=list(CARGAS))
+    ap.add_argument("--protocolo", type=_lista(str), default=["ascii"], help="ascii,binario,frame,delta")
+    ap.add_argument("--pacing", type=_lista(float), default=[0.004], help="USB_PACING_BASE (s)")
+    ap.add_argument("--baud", type=_lista(int), default=[115200])
+    ap.add_argument("--lote", type=_lista(int), default=[64], help="bytes por escrita (max_lote)")
+    ap.add_argument("--janela", type=_lista(int), default=[0], help="janela de ACK (0 = pacing fixo)")
+    ap.add_argument("--max-bytes", type=_lista(int), default=[RX_BUFFER],
+                    help="bytes em voo com janela (0 = sem limite)")
+    ap.add_argument("--frames", type=int, default=100)
+    ap.add_argument("--fps", type=float, default=0.0, help="0 = o mais rápido possível")
+    ap.add_argument("--perdas", action="store_true", help="emulador descarta bytes como o Arduino")
+    ap.add_argument("--saida", default="bench/resultados")
+    args = ap.parse_args()
+
+    resultados = []
+    for carga, prot, baud, pacing, lote, janela, max_bytes in itertools.product(
+            args.cargas, args.protocolo, args.baud, args.pacing, args.lote, args.janela, args.max_bytes):
+        if not janela and max_bytes != args.max_bytes[0]:
+            continue   # sem janela não há limite de bytes: uma rodada basta
+        r = medir(carga, prot, args.porta, baud, pacing, lote, janela, max_bytes,
+                  args.frames, args.fps, args.perdas)
+        resultados.append(r)
+        print(f"{carga:8} {prot:7} baud={baud:<7} pacing={pacing:<6} lote={lote:<4} janela={janela:<2} "
+              f"max_bytes={r['max_bytes'] or '-':<3} "
+              f"| {r['cmds_s']:>8} cmd/s {r['bytes_s']:>9} B/s "
+              f"| ack p50/p95/p99 {r['ack_p50_ms']}/{r['ack_p95_ms']}/{r['ack_p99_ms']} ms "
+              f"| perdidos {r['perdidos']}"
+              + (f" | esperas_bytes {r['esperas_bytes']}" if r["esperas_bytes"] else "")
+              + (f" | compressão {r['razao_compressao']}x, {r['encode_us_p50']} us/frame"
+                 if r["razao_compressao"] else ""))
+
+    if resultados:
+        salvar(resultados, args.saida)
+        print(f"\n[OK] {len(resultados)} rodadas -> {args.saida}.jsonl / .csv")
+
+
+if __name__ == "__main__":
+    main()
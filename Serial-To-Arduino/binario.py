@@ -0,0 +1,235 @@
+"""
+Protocolo binário compacto da matriz/OLED (alternativa ao ASCII).
+
+Pacote no fio:
+    0x00 + COBS(opcode + payload + CRC-8) + 0x00
+
+O 0x00 inicial nunca aparece numa linha ASCII, então o firmware sabe que
+começou um pacote binário sem precisar trocar de modo (e sobrevive a um
+reset do Arduino). CRC-8 polinômio 0x07, init 0x00, sobre opcode + payload.
+
+Opcodes:
+    OP_PIXELS  n x (coord, rgb565 hi, rgb565 lo)   coord = l << 4 | c   -> PIXELS_OK
+    OP_LIMPAR  -                                                        -> MATRIZ_CLEARED
+    OP_FRAME   64 x rgb565 big-endian (ordem lógica)                    -> FRAME_OK
+    OP_OLED    "LLVRRRRR" (mesmo conteúdo do comando O)                 -> OLED_UPDATED
+    OP_PALETA  n x rgb565 big-endian, 1 <= n <= 16 (entradas 0..n-1)    -> PALETA_OK
+    OP_FRAME_IDX 32 bytes: 64 índices de 4 bits, pixel par no nibble
+               alto (ordem lógica); índice >= n = apagado             -> FRAME_OK
+    OP_DELTA   corridas [pula u8][n u8][n x rgb565] sobre o frame atual
+               (ver delta.py)                                         -> FRAME_OK
+    OP_OLED_RAW [página u8][coluna u8][n bytes], 1 <= n <= 128: trecho
+               do framebuffer 1bpp do OLED desenhado no host
+               (ver oled.py)                                          -> OLED_UPDATED
+Erros: CRC_ERR, PKT_INVALID.
+
+Modo paleta: a paleta vai uma vez por cena e cada frame inteiro passa a
+custar 37 bytes no fio (contra 131 do OP_FRAME e 129 do F).
+
+Bytes por pixel: ASCII = 14 (M55RRRGGGBBBI\\n). Um pixel sozinho em
+binário custa 8 (só 1.75x menor); o ganho de 3x ou mais vem de agrupar:
+pixels() põe até MAX_PIXELS_POR_PACOTE num pacote, 5 + 3n bytes
+(8 pixels: ~3.6 bytes/pixel; 42: ~3.1; ~3.3 num diff típico).
+"""
+
+import protocolo
+
+DELIM = 0x00
+
+OP_PIXELS = 0x01
+OP_LIMPAR = 0x02
+OP_FRAME = 0x03
+OP_OLED = 0x04
+OP_PALETA = 0x05
+OP_FRAME_IDX = 0x06
+OP_DELTA = 0x07
+OP_OLED_RAW = 0x08
+
+MAX_CORES_PALETA = 16
+
+# limite do buffer de pacote do firmware (pkt[] no .ino)
+MAX_PACOTE = 134
+MAX_PIXELS_POR_PACOTE = 42
+
+
+# ---------- CRC / COBS ----------
+def crc8(data, crc=0):
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+def cobs_codificar(data):
+    out = bytearray([0])
+    pos_codigo = 0
+    codigo = 1
+    for b in data:
+        if b == 0:
+            out[pos_codigo] = codigo
+            pos_codigo = len(out)
+            out.append(0)
+            codigo = 1
+            continue
+        out.append(b)
+        codigo += 1
+        if codigo == 0xFF:
+            out[pos_codigo] = codigo
+            pos_codigo = len(out)
+            out.append(0)
+            codigo = 1
+    out[pos_codigo] = codigo
+    return bytes(out)
+
+def cobs_decodificar(data):
+    out = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        codigo = data[i]
+        if codigo == 0 or i + codigo > n:
+            raise ValueError("COBS inválido")
+        out += data[i + 1:i + codigo]
+        i += codigo
+        if codigo < 0xFF and i < n:
+            out.append(0)
+    return bytes(out)
+
+
+# ---------- PACOTES ----------
+def empacotar(op, payload=b""):
+    corpo = bytes([op]) + bytes(payload)
+    corpo += bytes([crc8(corpo)])
+    return bytes([DELIM]) + cobs_codificar(corpo) + bytes([DELIM])
+
+def desempacotar(pkt):
+    """
+    Pacote (com ou sem os delimitadores) -> (opcode, payload).
+    ValueError se o COBS ou o CRC não baterem.
+    """
+    pkt = bytes(pkt).strip(b"\x00")
+    corpo = cobs_decodificar(pkt)
+    if len(corpo) < 2:
+        raise ValueError("pacote curto")
+    if crc8(corpo[:-1]) != corpo[-1]:
+        raise ValueError("CRC_ERR")
+    return corpo[0], corpo[1:-1]
+
+
+class Decodificador:
+    """
+    Decodificador de fluxo: recebe bytes soltos e devolve os pacotes
+    completos como (opcode, payload). Pacote com erro vira (None, erro).
+    """
+    def __init__(self):
+        self.buf = bytearray()
+        self.dentro = False
+
+    def alimentar(self, data):
+        pacotes = []
+        for b in data:
+            if b == DELIM:
+                if self.dentro and self.buf:
+                    try:
+                        pacotes.append(desempacotar(self.buf))
+                    except ValueError as e:
+                        pacotes.append((None, str(e)))
+                    self.dentro = False
+                else:
+                    self.dentro = True
+                self.buf.clear()
+            elif self.dentro:
+                self.buf.append(b)
+        return pacotes
+
+
+# ---------- COMANDOS ----------
+def _pixel_bytes(l, c, cor):
+    v = protocolo.rgb565(*protocolo.cor_para_rgb(cor))
+    return bytes([(l << 4) | c, v >> 8, v & 0xFF])
+
+def pixels(mudancas):
+    """
+    Lista (l, c, cor) -> lista de pacotes OP_PIXELS (cor None = apagar).
+    """
+    mudancas = list(mudancas)
+    pacotes = []
+    for i in range(0, len(mudancas), MAX_PIXELS_POR_PACOTE):
+        payload = b"".join(_pixel_bytes(l, c, cor) for l, c, cor in mudancas[i:i + MAX_PIXELS_POR_PACOTE])
+        pacotes.append(empacotar(OP_PIXELS, payload))
+    return pacotes
+
+def limpar():
+    return empacotar(OP_LIMPAR)
+
+def frame(pixels_logicos):
+    # mesmo payload do comando F, mas com CRC
+    return empacotar(OP_FRAME, protocolo.codificar_frame(pixels_logicos)[1:])
+
+def paleta(cores):
+    """
+    Lista de cores (RRRGGGBBBI ou None) -> pacote OP_PALETA.
+    """
+    if not 1 <= len(cores) <= MAX_CORES_PALETA:
+        raise ValueError(f"paleta precisa de 1 a {MAX_CORES_PALETA} cores")
+    payload = bytearray()
+    for cor in cores:
+        v = protocolo.rgb565(*protocolo.cor_para_rgb(cor))
+        payload += bytes([v >> 8, v & 0xFF])
+    return empacotar(OP_PALETA, bytes(payload))
+
+def frame_indexado(indices):
+    """
+    64 índices de paleta (0..15) -> pacote OP_FRAME_IDX (dois por byte).
+    """
+    if len(indices) != protocolo.NUM_PIXELS:
+        raise ValueError(f"frame precisa de {protocolo.NUM_PIXELS} índices")
+    payload = bytes(
+        (indices[i] << 4) | indices[i + 1]
+        for i in range(0, protocolo.NUM_PIXELS, 2)
+    )
+    return empacotar(OP_FRAME_IDX, payload)
+
+def decodificar_paleta(payload):
+    """
+    Payload do OP_PALETA -> lista de (r, g, b) (como o firmware guarda).
+    """
+    if len(payload) % 2 or not 2 <= len(payload) <= 2 * MAX_CORES_PALETA:
+        raise ValueError("PKT_INVALID")
+    return [
+        protocolo.rgb565_para_rgb((payload[i] << 8) | payload[i + 1])
+        for i in range(0, len(payload), 2)
+    ]
+
+def decodificar_frame_indexado(payload, cores):
+    """
+    Payload do OP_FRAME_IDX + paleta decodificada -> 64 (r, g, b).
+    """
+    if len(payload) != protocolo.NUM_PIXELS // 2:
+        raise ValueError("PKT_INVALID")
+    pixels = []
+    for b in payload:
+        for idx in (b >> 4, b & 0x0F):
+            pixels.append(cores[idx] if idx < len(cores) else (0, 0, 0))
+    return pixels
+
+def oled(level, vidas, recorde):
+    return empacotar(OP_OLED, f"{level:02d}{vidas:01d}{recorde:05d}".encode())
+
+def oled_raw(pagina, coluna, dados):
+    return empacotar(OP_OLED_RAW, bytes([pagina, coluna]) + bytes(dados))
+
+def de_ascii(cmd):
+    """
+    Traduz um comando ASCII legado (MCL, M{l}{c}, M{l}{c}RRRGGGBBB[I], O...)
+    para o pacote binário equivalente.
+    """
+    if cmd == "MCL":
+        return limpar()
+    if cmd.startswith("O"):
+        return empacotar(OP_OLED, cmd[1:].encode())
+    if cmd.startswith("M") and len(cmd) >= 3 and cmd[1:3].isdigit():
+        l, c = int(cmd[1]), int(cmd[2])
+        cor = cmd[3:] or None
+        return pixels([(l, c, cor)])[0]
+    raise ValueError(f"comando sem equivalente binário: {cmd!r}")
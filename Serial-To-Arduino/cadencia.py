@@ -0,0 +1,97 @@
+"""
+Passo fixo para os jogos, sem deriva.
+
+A lógica do jogo anda em ticks de `periodo` segundos com prazos absolutos
+(inicio + n * periodo em time.monotonic), então o tempo gasto desenhando /
+enfileirando comandos não atrasa o tick seguinte. O render fica separado
+da lógica e roda uma vez depois dos ticks devidos.
+
+Se o loop chega atrasado (um render lento, uma animação bloqueante):
+- até `max_recuperar` ticks de lógica rodam em seguida e o render é feito
+  uma vez só (frame skip) -> a velocidade do jogo não muda
+- o que passar disso é descartado e contado em `ticks_pulados`
+"""
+
+import time
+
+
+class Cadencia:
+    def __init__(self, periodo, logica, render=None, max_recuperar=3):
+        self.periodo = periodo
+        self.logica = logica
+        self.render = render
+        self.max_recuperar = max(1, max_recuperar)
+
+        self.reator = None
+        self.proximo = None
+        self._timer = None
+        self.rodando = False
+
+        self.ticks = 0
+        self.renders = 0
+        self.atrasos = 0             # vezes que chegou depois do prazo do tick seguinte
+        self.ticks_recuperados = 0   # ticks extras rodados sem render entre eles
+        self.ticks_pulados = 0       # ticks descartados (atraso > max_recuperar)
+        self.atraso_max = 0.0
+        self._atraso_soma = 0.0
+        self.render_max = 0.0
+
+    def iniciar(self, reator, atraso=None):
+        self.reator = reator
+        self.rodando = True
+        self.proximo = reator.agora() + (self.periodo if atraso is None else atraso)
+        self._agendar()
+        return self
+
+    def cancelar(self):
+        self.rodando = False
+        if self._timer:
+            self._timer.cancelar()
+
+    def _agendar(self):
+        self._timer = self.reator.em(self.proximo, self._disparar)
+
+    def _disparar(self):
+        agora = self.reator.agora()
+        atraso = agora - self.proximo
+        devidos = int(atraso // self.periodo) + 1
+
+        self._atraso_soma += atraso
+        self.atraso_max = max(self.atraso_max, atraso)
+        if devidos > 1:
+            self.atrasos += 1
+
+        n = min(devidos, self.max_recuperar)
+        self.ticks_recuperados += n - 1
+        self.ticks_pulados += devidos - n
+        self.proximo += devidos * self.periodo
+
+        for _ in range(n):
+            self.logica()
+            self.ticks += 1
+            if not self.rodando:   # a lógica encerrou (game over, troca de cena)
+                return
+
+        if self.render:
+            t0 = time.monotonic()
+            self.render()
+            self.render_max = max(self.render_max, time.monotonic() - t0)
+            self.renders += 1
+
+        if self.rodando:
+            self._agendar()
+
+    def estado(self):
+        ms = lambda v: round(v * 1000, 2)
+        disparos = self.ticks - self.ticks_recuperados
+        return {
+            "periodo_ms": ms(self.periodo),
+            "ticks": self.ticks,
+            "renders": self.renders,
+            "atrasos": self.atrasos,
+            "ticks_recuperados": self.ticks_recuperados,
+            "ticks_pulados": self.ticks_pulados,
+            "atraso_medio_ms": ms(self._atraso_soma / disparos) if disparos else None,
+            "atraso_max_ms": ms(self.atraso_max),
+            "render_max_ms": ms(self.render_max),
+        }
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Gravação e reprodução do tráfego serial (host <-> Arduino).
+
+O Gravador fica pendurado no TransporteSerial e registra cada pedaço
+escrito (TX) e lido (RX) com o tempo monotônico, num arquivo binário
+compacto:
+
+    cabeçalho: MAGIA + <d (hora de parede do início) + <H n + n bytes de JSON
+    registro:  <B tipo (0 TX, 1 RX, 2 evento) + <I µs desde o registro
+               anterior + <H n + n bytes
+
+São 7 bytes por registro além dos dados, escritos num arquivo com buffer
+(sem flush por registro).
+
+A reprodução manda os TX de uma captura para um device real ou para o
+emulador.py:
+- tempo original: cada escrita sai no mesmo instante relativo da captura
+- rápida: sem relógio, só a ordem causal (cada escrita espera as respostas
+  que já tinham chegado antes dela na captura)
+e compara vazão e latência das respostas com a captura original.
+
+Ex.:
+    python3 captura.py resumo /tmp/tvbox_captura_0.bin
+    python3 captura.py reproduzir /tmp/tvbox_captura_0.bin --rapido
+    python3 captura.py reproduzir cap.bin --porta /dev/ttyACM0 --gravar replay.bin
+"""
+
+import argparse
+import json
+import struct
+import threading
+import time
+
+from fluxo import RESPOSTAS_ERRO, percentil
+
+MAGIA = b"TVCAP\x01"
+CABECALHO = struct.Struct("<dH")
+REGISTRO = struct.Struct("<BIH")
+
+TX = 0
+RX = 1
+EVENTO = 2
+TIPOS = {TX: "tx", RX: "rx", EVENTO: "evento"}
+
+MAX_DT_US = 0xFFFFFFFF
+MAX_PEDACO = 0xFFFF
+
+
+class Gravador:
+    """
+    Grava TX/RX de um link. Pensado para ser chamado de uma thread só (a
+    do loop do transporte) e em ordem de tempo: o TX entra antes de a
+    escrita começar. Para de gravar (e conta o que ficou de fora) ao
+    passar de max_bytes.
+    """
+    def __init__(self, arquivo, meta=None, max_bytes=64 * 1024 * 1024):
+        self.arquivo = arquivo
+        self.max_bytes = max_bytes
+        self._f = open(arquivo, "wb", buffering=1 << 16)
+        meta = json.dumps(meta or {}).encode()
+        self._f.write(MAGIA + CABECALHO.pack(time.time(), len(meta)) + meta)
+        self._t = time.monotonic()
+
+        self.registros = 0
+        self.bytes = self._f.tell()
+        self.descartados = 0
+
+    def _registrar(self, tipo, data, t=None):
+        if self._f is None:
+            return
+        if self.bytes >= self.max_bytes:
+            self.descartados += 1
+            return
+        t = time.monotonic() if t is None else t
+        dt = min(MAX_DT_US, max(0, int((t - self._t) * 1e6)))
+        self._t = t
+        for i in range(0, max(1, len(data)), MAX_PEDACO):
+            pedaco = data[i:i + MAX_PEDACO]
+            self._f.write(REGISTRO.pack(tipo, dt, len(pedaco)))
+            self._f.write(pedaco)
+            self.bytes += REGISTRO.size + len(pedaco)
+            self.registros += 1
+            dt = 0
+
+    def tx(self, data, t=None):
+        self._registrar(TX, data, t)
+
+    def rx(self, data, t=None):
+        self._registrar(RX, data, t)
+
+    def evento(self, nome, t=None):
+        self._registrar(EVENTO, nome.encode(), t)
+
+    def fechar(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def estado(self):
+        return {
+            "arquivo": self.arquivo,
+            "registros": self.registros,
+            "bytes": self.bytes,
+            "descartados": self.descartados,
+        }
+
+
+def ler(arquivo):
+    """
+    Arquivo de captura -> (meta, [(t, tipo, dados)]), t em segundos desde
+    o primeiro registro.
+    """
+    with open(arquivo, "rb") as f:
+        dados = f.read()
+    if not dados.startswith(MAGIA):
+        raise ValueError(f"{arquivo}: não é uma captura")
+    i = len(MAGIA)
+    _, n = CABECALHO.unpack_from(dados, i)
+    i += CABECALHO.size
+    meta = json.loads(dados[i:i + n] or b"{}")
+    i += n
+
+    registros = []
+    t = None
+    while i + REGISTRO.size <= len(dados):
+        tipo, dt, n = REGISTRO.unpack_from(dados, i)
+        i += REGISTRO.size
+        if i + n > len(dados):
+            break       # gravação interrompida no meio de um registro
+        t = 0.0 if t is None else t + dt / 1e6
+        registros.append((t, tipo, dados[i:i + n]))
+        i += n
+    return meta, registros
+
+
+# ---------- ANÁLISE ----------
+def _linhas_rx(registros):
+    """
+    [(t, linha)] das respostas; a linha conta no pedaço que trouxe o \\n.
+    """
+    linhas = []
+    resto = b""
+    for t, tipo, dados in registros:
+        if tipo != RX:
+            continue
+        resto += dados
+        while b"\n" in resto:
+            linha, _, resto = resto.partition(b"\n")
+            linha = linha.decode(errors="ignore").strip()
+            if linha:
+                linhas.append((t, linha))
+    return linhas
+
+
+def analisar(registros):
+    """
+    Vazão de TX e latência de cada resposta (desde a última escrita antes
+    dela).
+    """
+    txs = [(t, len(d)) for t, tipo, d in registros if tipo == TX]
+    linhas = _linhas_rx(registros)
+
+    latencias = []
+    j = 0
+    ultimo_tx = None
+    for t, _ in linhas:
+        while j < len(txs) and txs[j][0] <= t:
+            ultimo_tx = txs[j][0]
+            j += 1
+        if ultimo_tx is not None:
+            latencias.append(t - ultimo_tx)
+
+    bytes_tx = sum(n for _, n in txs)
+    duracao = (txs[-1][0] - txs[0][0]) if len(txs) > 1 else 0.0
+    ms = lambda v: None if v is None else round(v * 1000, 2)
+    return {
+        "escritas": len(txs),
+        "bytes_tx": bytes_tx,
+        "bytes_rx": sum(len(d) for _, tipo, d in registros if tipo == RX),
+        "duracao_s": round(duracao, 3),
+        "bytes_s": round(bytes_tx / duracao, 1) if duracao else None,
+        "respostas": len(linhas),
+        "erros": sum(1 for _, l in linhas if l in RESPOSTAS_ERRO),
+        "latencia_p50_ms": ms(percentil(latencias, 50)),
+        "latencia_p95_ms": ms(percentil(latencias, 95)),
+        "latencia_max_ms": ms(max(latencias) if latencias else None),
+    }
+
+
+def comparar(original, replay):
+    """
+    Duas análises -> deltas (replay - original).
+    """
+    delta = {}
+    for k in ("duracao_s", "bytes_s", "respostas", "erros",
+              "latencia_p50_ms", "latencia_p95_ms", "latencia_max_ms"):
+        a, b = original.get(k), replay.get(k)
+        delta[k] = None if a is None or b is None else round(b - a, 3)
+    return delta
+
+
+# ---------- REPRODUÇÃO ----------
+def reproduzir(registros, porta, tempo_real=True, baud=115200, espera_resposta=0.5, gravador=None):
+    """
+    Manda os TX da captura para a porta e grava o que volta. Devolve os
+    registros da reprodução no mesmo formato de ler().
+    """
+    from dispositivos import abrir_porta, esperar_pronto
+
+    ser = abrir_porta(porta, baud)
+    esperar_pronto(ser)
+    ser.timeout = 0.05
+
+    saida = []
+    respostas = [0]
+    resto = [b""]
+    mudou = threading.Condition()
+    rodando = [True]
+
+    def leitor():
+        while rodando[0]:
+            try:
+                data = ser.read(ser.in_waiting or 1)
+            except Exception:
+                return
+            if not data:
+                continue
+            t = time.monotonic()
+            with mudou:
+                if gravador:
+                    gravador.rx(data, t)
+                saida.append((t, RX, data))
+                resto[0] += data
+                respostas[0] += resto[0].count(b"\n")
+                resto[0] = resto[0][resto[0].rfind(b"\n") + 1:]
+                mudou.notify_all()
+
+    # descarta PONGs/banner do handshake antes de começar
+    time.sleep(0.05)
+    ser.reset_input_buffer()
+    th = threading.Thread(target=leitor, daemon=True)
+    th.start()
+
+    # quantas respostas a captura já tinha recebido antes de cada escrita
+    antes = []
+    n_linhas = 0
+    pendente = b""
+    for t, tipo, dados in registros:
+        if tipo == RX:
+            pendente += dados
+            n_linhas += pendente.count(b"\n")
+            pendente = pendente[pendente.rfind(b"\n") + 1:]
+        elif tipo == TX:
+            antes.append((t, dados, n_linhas))
+
+    t0 = time.monotonic()
+    t_cap0 = antes[0][0] if antes else 0.0
+    for t, dados, n_antes in antes:
+        if tempo_real:
+            atraso = t0 + (t - t_cap0) - time.monotonic()
+            if atraso > 0:
+                time.sleep(atraso)
+        else:
+            with mudou:
+                mudou.wait_for(lambda: respostas[0] >= n_antes, espera_resposta)
+        # registra antes de escrever (e sob o lock do leitor): a resposta
+        # pode chegar antes do flush voltar e o arquivo tem que sair em ordem
+        agora = time.monotonic()
+        with mudou:
+            if gravador:
+                gravador.tx(dados, agora)
+            saida.append((agora, TX, dados))
+        ser.write(dados)
+        ser.flush()
+
+    # últimas respostas
+    with mudou:
+        mudou.wait_for(lambda: respostas[0] >= n_linhas, espera_resposta)
+    rodando[0] = False
+    th.join(1.0)
+    ser.close()
+
+    with mudou:
+        saida.sort(key=lambda r: r[0])
+        return [(t - t0, tipo, d) for t, tipo, d in saida]
+
+
+def _imprimir(nome, a):
+    print(f"{nome:9} {a['escritas']:>6} escritas {a['bytes_tx']:>8} B em {a['duracao_s']:>7} s "
+          f"| {a['bytes_s']} B/s | {a['respostas']} respostas ({a['erros']} erros) "
+          f"| latência p50/p95/max {a['latencia_p50_ms']}/{a['latencia_p95_ms']}/{a['latencia_max_ms']} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Captura e reprodução do tráfego serial da matriz/OLED")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("resumo", help="análise de uma captura")
+    r.add_argument("arquivo")
+    r = sub.add_parser("reproduzir", help="reenvia uma captura e compara")
+    r.add_argument("arquivo")
+    r.add_argument("--porta", help="porta real (sem isso usa o emulador.py)")
+    r.add_argument("--rapido", action="store_true", help="o mais rápido possível (só a ordem causal)")
+    r.add_argument("--baud", type=int, default=115200)
+    r.add_argument("--gravar", help="grava a reprodução numa nova captura")
+    args = ap.parse_args()
+
+    meta, registros = ler(args.arquivo)
+    original = analisar(registros)
+    print("[CAPTURA]", args.arquivo, meta)
+    _imprimir("original", original)
+    if args.cmd == "resumo":
+        return
+
+    emu = None
+    porta = args.porta
+    if porta is None:
+        from emulador import Emulador
+        emu = Emulador(baud=args.baud).iniciar()
+        porta = emu.porta
+
+    gravador = Gravador(args.gravar, {"replay_de": args.arquivo, "porta": porta}) if args.gravar else None
+    try:
+        replay = analisar(reproduzir(registros, porta, not args.rapido, args.baud, gravador=gravador))
+    finally:
+        if gravador:
+            gravador.fechar()
+        if emu:
+            emu.parar()
+
+    _imprimir("replay", replay)
+    print("[DELTA]", comparar(original, replay))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Compressão entre frames para conteúdo que muda muito (scroll, efeitos).
+
+Cada frame (64 cores, ordem do device) vira RGB565 e é comparado com o
+último frame confirmado pelo device (FRAME_OK) e com os que ainda estão em
+voo (XOR palavra a palavra: zero = pixel igual em todos). O resultado é
+codificado em corridas:
+
+    OP_DELTA payload = [pula u8][n u8][n x rgb565] ...
+
+"pula" pixels iguais, depois n pixels novos; o que sobra no fim do frame
+fica como está. Gaps de 1 pixel entram na corrida (custa o mesmo que um
+cabeçalho novo). O firmware não guarda frame de referência: aplica os
+valores novos direto no strip (o brilho global do strip tornaria um XOR no
+device com perdas).
+
+Por frame o CodificadorDelta escolhe:
+- nada (frame igual ao anterior)
+- delta (OP_DELTA)
+- keyframe (OP_FRAME) se o delta não compensa, a cada `intervalo_keyframe`
+  frames, ou depois de resync() (erro/timeout no link: a base do device
+  pode estar diferente)
+
+A base só anda com o ACK: ligue confirmar() e resync() no transporte
+(TransporteSerial.ao_ack / ao_perda), que casa cada resposta com o pacote
+pelo ControleFluxo e avisa de CRC_ERR/PKT_INVALID/FRAME_TIMEOUT, ACK que
+não chegou e reconexão.
+"""
+
+import time
+from collections import deque
+
+import binario
+import protocolo
+from fluxo import RESPOSTAS_ERRO, percentil
+
+# pacote OP_FRAME inteiro no fio: delimitadores + COBS(op + 128 + crc)
+BYTES_KEYFRAME = len(binario.empacotar(binario.OP_FRAME, bytes(2 * protocolo.NUM_PIXELS)))
+
+
+def codificar_corridas(anterior, atual):
+    """
+    Duas listas de RGB565 -> payload do OP_DELTA (b"" se iguais).
+    """
+    n = len(atual)
+    out = bytearray()
+    i = 0
+    pos = 0           # próximo pixel ainda não coberto
+    while i < n:
+        if anterior[i] ^ atual[i] == 0:
+            i += 1
+            continue
+        # início de uma corrida de mudanças
+        inicio = i
+        fim = i + 1
+        while fim < n:
+            if anterior[fim] ^ atual[fim]:
+                fim += 1
+            elif fim + 1 < n and anterior[fim + 1] ^ atual[fim + 1]:
+                fim += 2   # gap de 1: mais barato levar junto
+            else:
+                break
+        pula = inicio - pos
+        while pula > 255:
+            out += bytes([255, 0])
+            pula -= 255
+        # corridas de no máximo 255 pixels (o frame tem 64, mas por garantia)
+        k = inicio
+        while k < fim:
+            m = min(255, fim - k)
+            out += bytes([pula, m])
+            for v in atual[k:k + m]:
+                out += bytes([v >> 8, v & 0xFF])
+            pula = 0
+            k += m
+        pos = fim
+        i = fim
+    return bytes(out)
+
+
+def aplicar_corridas(frame, payload):
+    """
+    Decodificador de referência: aplica o payload do OP_DELTA sobre uma
+    lista de RGB565 e devolve a nova. ValueError se o payload é inválido.
+    """
+    novo = list(frame)
+    i = pos = 0
+    while i < len(payload):
+        if i + 2 > len(payload):
+            raise ValueError("PKT_INVALID")
+        pos += payload[i]
+        m = payload[i + 1]
+        i += 2
+        if i + 2 * m > len(payload) or pos + m > len(novo):
+            raise ValueError("PKT_INVALID")
+        for _ in range(m):
+            novo[pos] = (payload[i] << 8) | payload[i + 1]
+            pos += 1
+            i += 2
+    return novo
+
+
+class CodificadorDelta:
+    def __init__(self, intervalo_keyframe=60, historico=1024):
+        self.intervalo_keyframe = intervalo_keyframe
+        self.base = None                 # último frame com FRAME_OK (RGB565)
+        self.pendentes = deque()         # (pkt, frame, keyframe) enviados sem ACK
+        self._desde_keyframe = 0
+        self._cache_cor = {}
+
+        self.frames = 0
+        self.keyframes = 0
+        self.deltas = 0
+        self.nada = 0
+        self.resyncs = 0
+        self.bytes_saida = 0
+        self.tempos = []                 # segundos por frame (últimos `historico`)
+        self._historico = historico
+
+    def _rgb565(self, cor):
+        v = self._cache_cor.get(cor)
+        if v is None:
+            v = protocolo.rgb565(*protocolo.cor_para_rgb(cor))
+            self._cache_cor[cor] = v
+        return v
+
+    def resync(self):
+        """
+        O device pode não estar com a base (erro/timeout): próximo é keyframe.
+        """
+        self.base = None
+        self.pendentes.clear()
+        self.resyncs += 1
+
+    def confirmar(self, pkt, resposta):
+        """
+        Resposta do device casada com o pacote (ordem do ControleFluxo).
+        FRAME_OK de um pacote nosso vira a base; erro em qualquer comando
+        pode ter levado bytes de um frame junto: resync.
+        """
+        if resposta in RESPOSTAS_ERRO:
+            self.resync()
+            return
+        if resposta != "FRAME_OK":
+            return
+        for i, (p, frame, _) in enumerate(self.pendentes):
+            if p is pkt:
+                self.base = frame
+                for _ in range(i + 1):
+                    self.pendentes.popleft()
+                return
+
+    def _referencias(self):
+        """
+        Frames em que o device pode estar: a base e os pendentes, ou só os
+        pendentes a partir do último keyframe. None = nenhum (keyframe).
+        """
+        refs = []
+        for _, frame, keyframe in reversed(self.pendentes):
+            refs.append(frame)
+            if keyframe:
+                return refs
+        if self.base is None:
+            return None
+        refs.append(self.base)
+        return refs
+
+    def codificar(self, pixels):
+        """
+        64 cores (ordem do device) -> pacote a enviar, ou None se nada mudou.
+        """
+        t0 = time.perf_counter()
+        atual = [self._rgb565(p) for p in pixels]
+        self.frames += 1
+
+        pkt = None
+        refs = self._referencias()
+        if refs is not None and self._desde_keyframe < self.intervalo_keyframe:
+            if len(refs) == 1:
+                anterior = refs[0]
+            else:
+                # um delta só contra a base pularia pixels que um frame em
+                # voo mudou: o pixel só é igual se for igual em todos
+                anterior = [v if all(r[i] == v for r in refs) else v ^ 1
+                            for i, v in enumerate(atual)]
+            corridas = codificar_corridas(anterior, atual)
+            if not corridas:
+                self.nada += 1
+                self._desde_keyframe += 1
+                self._tempo(t0)
+                return None
+            delta = binario.empacotar(binario.OP_DELTA, corridas)
+            if len(delta) < BYTES_KEYFRAME:
+                pkt = delta
+                self.deltas += 1
+                self._desde_keyframe += 1
+
+        keyframe = pkt is None
+        if keyframe:
+            payload = b"".join(bytes([v >> 8, v & 0xFF]) for v in atual)
+            pkt = binario.empacotar(binario.OP_FRAME, payload)
+            self.keyframes += 1
+            self._desde_keyframe = 0
+            # o que veio antes do keyframe não serve mais de referência
+            self.pendentes.clear()
+
+        self.pendentes.append((pkt, atual, keyframe))
+        self.bytes_saida += len(pkt)
+        self._tempo(t0)
+        return pkt
+
+    def _tempo(self, t0):
+        self.tempos.append(time.perf_counter() - t0)
+        if len(self.tempos) > self._historico:
+            del self.tempos[:len(self.tempos) - self._historico]
+
+    def estado(self):
+        bruto = self.frames * BYTES_KEYFRAME
+        us = lambda v: None if v is None else round(v * 1e6, 1)
+        return {
+            "frames": self.frames,
+            "keyframes": self.keyframes,
+            "deltas": self.deltas,
+            "nada": self.nada,
+            "resyncs": self.resyncs,
+            "bytes_saida": self.bytes_saida,
+            "bytes_brutos": bruto,
+            "razao_compressao": round(bruto / self.bytes_saida, 2) if self.bytes_saida else None,
+            "encode_us_p50": us(percentil(self.tempos, 50)),
+            "encode_us_max": us(max(self.tempos) if self.tempos else None),
+        }
@@ -0,0 +1,477 @@
+"""
+Vários Arduinos (matriz/OLED) ao mesmo tempo.
+
+O Gerenciador acha todas as portas ACM/USB (ou as de PORTA_SERIAL,
+separadas por vírgula), abre todas em paralelo e dá a cada uma um ID
+lógico de display: o do mapa `ids` {porta: id}, o lembrado para aquele
+Arduino (VID:PID:serial, gravado em `memoria`) ou o próximo livre.
+
+Cada device tem o seu TransporteSerial (thread + loop asyncio próprios),
+então as escritas para portas diferentes correm em paralelo: um segundo
+painel não divide o frame rate do primeiro.
+
+Abertura rápida:
+- a porta é aberta sem HUPCL: fechar não derruba o DTR, então reabrir
+  (próxima partida, reconexão) não reseta o Arduino; só a primeira
+  abertura depois de plugar paga o boot
+- pronto = primeira linha com READY (boot) ou resposta ao PING (firmware
+  já rodando); o timeout é só o último recurso
+- na reconexão a porta é procurada de novo pelo VID:PID:serial (o
+  ttyACM0 pode voltar como ttyACM1)
+- abrir(esperar=False) não espera nada disso: os IDs saem da listagem das
+  portas e cada transporte abre a sua em segundo plano, segurando os
+  comandos na fila até lá
+"""
+
+import json
+import os
+import threading
+import time
+
+import serial
+import serial.tools.list_ports
+
+from captura import Gravador
+from fluxo import ControleFluxo
+from transporte import TransporteSerial
+
+try:
+    import termios
+except ImportError:      # Windows: sem HUPCL
+    termios = None
+
+PADROES_PORTA = ("ACM", "USB")
+PORTA_PADRAO = "/dev/ttyACM0"
+MEMORIA_PORTAS = "/tmp/tvbox_portas.json"
+
+PING = b"PING\n"
+# firmware antigo não conhece PING, mas responder CMD_INVALID já prova
+# que ele está rodando
+RESPOSTAS_PING = ("PONG", "CMD_INVALID")
+DRENAR_SILENCIO = 0.05    # sem resposta por esse tempo = nenhum PING no caminho
+
+
+def identidade(info):
+    """
+    ListPortInfo -> "VID:PID:serial" (None se não é USB).
+    """
+    if info.vid is None:
+        return None
+    return f"{info.vid:04x}:{info.pid:04x}:{info.serial_number or ''}"
+
+
+def portas_usb():
+    """
+    {porta: identidade} das portas ACM/USB presentes agora.
+    """
+    return {
+        p.device: identidade(p) for p in serial.tools.list_ports.comports()
+        if any(x in p.device for x in PADROES_PORTA)
+    }
+
+
+def listar_portas():
+    # PORTA_SERIAL força as portas (ex.: ptys do emulador.py)
+    if os.environ.get("PORTA_SERIAL"):
+        return [p for p in os.environ["PORTA_SERIAL"].split(",") if p]
+    return sorted(portas_usb()) or [PORTA_PADRAO]
+
+
+def abrir_porta(porta, baud=115200, evitar_reset=True):
+    s = serial.Serial(
+        porta, baud,
+        timeout=1,
+        write_timeout=2,
+        rtscts=False,
+        dsrdtr=False
+    )
+    if evitar_reset and termios is not None:
+        # sem HUPCL o DTR continua ativo depois do close(): a próxima
+        # abertura não gera a borda que reseta o Arduino
+        try:
+            attrs = termios.tcgetattr(s.fileno())
+            attrs[2] &= ~termios.HUPCL
+            termios.tcsetattr(s.fileno(), termios.TCSANOW, attrs)
+        except (termios.error, OSError):
+            pass
+    return s
+
+
+def esperar_pronto(ser, timeout=3.5, intervalo_ping=0.1, prefixo=""):
+    """
+    Espera o READY do boot ou a resposta a um PING (mandado a cada
+    `intervalo_ping`). Devolve (motivo, segundos); motivo None = timeout.
+    As respostas dos PINGs que ainda estavam no caminho são descartadas:
+    senão o primeiro comando de verdade seria casado com um PONG (ou com
+    o CMD_INVALID de um PING cortado no meio pelo boot).
+    """
+    t0 = time.monotonic()
+    timeout_antigo = ser.timeout
+    ser.timeout = intervalo_ping
+    proximo_ping = t0
+    pings = 0
+    try:
+        while True:
+            agora = time.monotonic()
+            if agora - t0 >= timeout:
+                return None, agora - t0
+            if agora >= proximo_ping:
+                try:
+                    ser.write(PING)
+                    pings += 1
+                except serial.SerialTimeoutException:
+                    pass
+                proximo_ping = agora + intervalo_ping
+            r = ser.readline().decode(errors="ignore").strip()
+            if not r:
+                continue
+            if "READY" in r:
+                print(f"[ARDUINO{prefixo}]", r)
+                motivo = "READY"
+            elif r in RESPOSTAS_PING:
+                motivo = "PING"
+                pings -= 1
+            else:
+                continue
+            t_pronto = time.monotonic() - t0
+            if pings > 0:
+                _drenar(ser, min(intervalo_ping, DRENAR_SILENCIO))
+            return motivo, t_pronto
+    except (serial.SerialException, OSError):
+        return None, time.monotonic() - t0
+    finally:
+        try:
+            ser.timeout = timeout_antigo
+        except (serial.SerialException, OSError):
+            pass
+
+
+def _drenar(ser, silencio, maximo=0.5):
+    # lê e descarta até a linha ficar `silencio` s quieta (no máximo
+    # `maximo` s) e joga fora o resto do buffer de entrada
+    ser.timeout = silencio
+    t0 = time.monotonic()
+    while time.monotonic() - t0 < maximo and ser.readline():
+        pass
+    ser.reset_input_buffer()
+
+
+class MemoriaPortas:
+    """
+    {VID:PID:serial: id de display} persistido em JSON.
+    """
+    def __init__(self, arquivo=MEMORIA_PORTAS):
+        self.arquivo = arquivo
+        self.ids = {}
+        if arquivo and os.path.exists(arquivo):
+            try:
+                with open(arquivo) as f:
+                    self.ids = {k: int(v) for k, v in json.load(f).items()}
+            except (OSError, ValueError):
+                self.ids = {}
+
+    def id(self, ident):
+        return self.ids.get(ident) if ident else None
+
+    def lembrar(self, ident, id):
+        if ident:
+            self.ids[ident] = id
+
+    def salvar(self):
+        if not self.arquivo:
+            return
+        tmp = self.arquivo + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.ids, f)
+            os.replace(tmp, self.arquivo)
+        except OSError:
+            pass
+
+
+def achar_porta(ident, ultima):
+    """
+    Porta atual do Arduino `ident` (pode ter mudado de nome); senão a última.
+    """
+    if ident:
+        for porta, i in portas_usb().items():
+            if i == ident:
+                return porta
+    return ultima
+
+
+class Dispositivo:
+    def __init__(self, id, porta, link=None, ident=None):
+        self.id = id
+        self.porta = porta
+        self.ident = ident
+        self.link = link
+        self.t_porta = None         # open() da porta
+        self.t_pronto = None        # handshake (READY / PING)
+        self.motivo = None          # "READY", "PING" ou None (timeout)
+        self.falha = None           # erro da primeira abertura
+        self.inicio = time.monotonic()
+        self._ultimo = (self.inicio, 0)    # (t, bytes) da última leitura de vazão
+
+    @property
+    def t_abrir(self):
+        if self.t_pronto is None:
+            return None
+        return self.t_porta + self.t_pronto
+
+    @property
+    def conectado(self):
+        return self.link.conectado
+
+    def enviar(self, data):
+        return self.link.enviar(data)
+
+    def vazao(self):
+        """
+        (bytes/s desde a última chamada, bytes/s desde a abertura)
+        """
+        agora = time.monotonic()
+        tx = self.link.metricas.bytes_tx
+        t_ant, tx_ant = self._ultimo
+        self._ultimo = (agora, tx)
+        recente = (tx - tx_ant) / (agora - t_ant) if agora > t_ant else 0.0
+        return recente, self.vazao_media(agora)
+
+    def vazao_media(self, agora=None):
+        # bytes/s desde a abertura (não mexe na janela de vazao())
+        agora = time.monotonic() if agora is None else agora
+        tx = self.link.metricas.bytes_tx
+        return tx / (agora - self.inicio) if agora > self.inicio else 0.0
+
+    def registrar_gauges(self):
+        """
+        Estado do display nas métricas do link, lido na hora do snapshot
+        (o Exportador manda com o label display="<id>").
+        """
+        m = self.link.metricas
+        m.gauge("conectado", lambda: self.conectado)
+        m.gauge("falhou", lambda: self.falha is not None)
+        m.gauge("abrir_ms", lambda: None if self.t_abrir is None else round(self.t_abrir * 1000, 1))
+        m.gauge("bytes_s_medio", lambda: round(self.vazao_media(), 1))
+
+    def _ms_desde_inicio(self, t):
+        return None if t is None else round((t - self.inicio) * 1000, 1)
+
+    def estado(self):
+        recente, media = self.vazao()
+        est = self.link.estado()
+        rec = self.link.metricas.reconexao_ms
+        if self.falha:
+            pronto_por = "falha"
+        elif not self.link.abertura.is_set():
+            pronto_por = "abrindo"
+        else:
+            pronto_por = self.motivo or "timeout"
+        return {
+            "id": self.id,
+            "porta": self.porta,
+            "usb": self.ident,
+            "abrir_ms": None if self.t_abrir is None else round(self.t_abrir * 1000, 1),
+            "pronto_por": pronto_por,
+            "conectado_ms": self._ms_desde_inicio(self.link.t_conectado),
+            "primeira_escrita_ms": self._ms_desde_inicio(self.link.t_primeira_escrita),
+            "bytes_enviados": est["bytes_enviados"],
+            "comandos_escritos": est["comandos_escritos"],
+            "descartados": est["descartados"],
+            "reconexoes": est["reconexoes"],
+            "reconexao_ms_max": round(rec.maximo, 1) if rec.n else None,
+            "bytes_s": round(recente, 1),
+            "bytes_s_medio": round(media, 1),
+        }
+
+
+class Gerenciador:
+    def __init__(self, portas=None, ids=None, baud=115200, fluxo_janela=2,
+                 evitar_reset=True, timeout_ready=3.5, ao_receber=None,
+                 memoria=MEMORIA_PORTAS, captura=None):
+        self.portas = portas
+        self.ids = ids or {}
+        self.baud = baud
+        self.fluxo_janela = fluxo_janela
+        self.evitar_reset = evitar_reset
+        self.timeout_ready = timeout_ready
+        self.ao_receber = ao_receber
+        self.memoria = MemoriaPortas(memoria)
+        # ex.: "/tmp/tvbox_captura_{id}.bin": um arquivo por display
+        self.captura = captura
+
+        self.dispositivos = {}     # id -> Dispositivo
+        self._preferidos = {}      # id -> id que vai para a memória
+        self.falhas = {}           # porta -> erro
+        self.t_inicio = None
+        self.t_partida = None      # abertura de todos (s)
+        self._lock = threading.Lock()
+        self._abrindo = 0
+        self._todos = threading.Event()
+
+    # ---------- ABERTURA ----------
+    def _criar_link(self, disp):
+        def abrir():
+            # na reconexão a porta pode ter voltado com outro nome
+            p = achar_porta(disp.ident, disp.porta)
+            disp.porta = p
+            t0 = time.monotonic()
+            ser = abrir_porta(p, self.baud, self.evitar_reset)
+            disp.t_porta = time.monotonic() - t0
+            disp.motivo, disp.t_pronto = esperar_pronto(
+                ser, self.timeout_ready, prefixo=f" {p}"
+            )
+            return ser
+
+        # a porta é do transporte (fila + escritor asyncio); ele a abre na
+        # thread dele e segura o que for enviado até ela ficar pronta
+        porta = disp.porta
+        ao_receber = None
+        if self.ao_receber:
+            ao_receber = lambda linha: self.ao_receber(porta, linha)
+        link = TransporteSerial(
+            abrir, ao_receber=ao_receber,
+            fluxo=ControleFluxo(janela=self.fluxo_janela) if self.fluxo_janela else None
+        )
+        link.ao_abrir = lambda: self._aberto(disp)
+        if self.captura:
+            link.gravador = Gravador(self.captura.format(id=disp.id),
+                                     {"porta": porta, "id": disp.id, "baud": self.baud, "usb": disp.ident})
+        return link
+
+    def _aberto(self, disp):
+        # na thread do transporte, ao fim da primeira abertura
+        if disp.link.erro is not None:
+            disp.falha = str(disp.link.erro)
+            self.falhas[disp.porta] = disp.falha
+            print("[FALHA]", disp.porta, disp.link.erro)
+        else:
+            print(f"[PORTA] display {disp.id} -> {disp.porta} "
+                  f"({disp.t_abrir * 1000:.0f} ms, pronto por {disp.motivo or 'timeout'})")
+        with self._lock:
+            if disp.falha is None:
+                # só o que abriu: uma porta que falhou não toma o id de ninguém
+                self.memoria.lembrar(disp.ident, self._preferidos[disp.id])
+            self._abrindo -= 1
+            if self._abrindo:
+                return
+        self.t_partida = time.monotonic() - self.t_inicio
+        self.memoria.salvar()
+        if not len(self):
+            print("[FALHA] nenhum Arduino abriu:", self.falhas)
+        self._todos.set()
+
+    def _escolher_ids(self, portas, idents):
+        """
+        Devolve ({porta: id}, {porta: id preferido}). O preferido é o que
+        fica na memória: explícito (ids) > lembrado (VID:PID:serial) >
+        próximo livre. Na sessão os não explícitos são compactados em
+        0..n-1, na ordem dos preferidos: um Arduino lembrado como display 1
+        e ligado sozinho vira o 0, senão o painel 0 e o OLED ficam sem
+        device.
+        """
+        preferidos = {}
+        for porta in portas:
+            id = self.ids.get(porta)
+            if id is None:
+                id = self.memoria.id(idents.get(porta))
+            if id is not None and id not in preferidos.values():
+                preferidos[porta] = id
+        livres = iter(i for i in range(2 * len(portas) + len(self.ids))
+                      if i not in preferidos.values())
+        for porta in portas:
+            if porta not in preferidos:
+                preferidos[porta] = next(livres)
+
+        ids = {p: self.ids[p] for p in portas if p in self.ids}
+        vagos = iter(i for i in range(2 * len(portas)) if i not in ids.values())
+        for porta in sorted((p for p in portas if p not in ids), key=preferidos.get):
+            ids[porta] = next(vagos)
+            if ids[porta] != preferidos[porta]:
+                print(f"[WARN] {porta}: lembrado como display {preferidos[porta]}, "
+                      f"usando {ids[porta]} nesta sessão")
+        return ids, preferidos
+
+    def abrir(self, esperar=True):
+        """
+        Cria um link por porta e abre todas em paralelo. esperar=False
+        volta na hora: os displays já aceitam comandos, que saem quando a
+        porta de cada um ficar pronta (ou são recusados se ela falhar).
+        """
+        self.t_inicio = time.monotonic()
+        portas = self.portas or listar_portas()
+        idents = portas_usb()
+        ids, preferidos = self._escolher_ids(portas, idents)
+
+        self._abrindo = len(portas)
+        for porta in portas:
+            disp = Dispositivo(ids[porta], porta, ident=idents.get(porta))
+            self._preferidos[disp.id] = preferidos[porta]
+            disp.link = self._criar_link(disp)
+            disp.registrar_gauges()
+            self.dispositivos[disp.id] = disp
+        for disp in self.dispositivos.values():
+            disp.link.iniciar(esperar=False)
+
+        if esperar:
+            self.esperar()
+        return self
+
+    def esperar(self, timeout=None):
+        """
+        Espera a primeira abertura de todas as portas. SerialException se
+        nenhuma abriu.
+        """
+        if not self._todos.wait(timeout):
+            return False
+        if not len(self):
+            raise serial.SerialException(f"nenhum Arduino abriu: {self.falhas}")
+        return True
+
+    # ---------- ENVIO ----------
+    def __getitem__(self, id):
+        return self.dispositivos[id]
+
+    def get(self, id):
+        disp = self.dispositivos.get(id)
+        return None if disp is None or disp.falha else disp
+
+    def __iter__(self):
+        # só os que não falharam (abrindo ou abertos)
+        return iter([self.dispositivos[i] for i in sorted(self.dispositivos)
+                     if not self.dispositivos[i].falha])
+
+    def __len__(self):
+        return sum(1 for d in self.dispositivos.values() if not d.falha)
+
+    def enviar(self, id, data):
+        disp = self.get(id)
+        if disp is None:
+            return False
+        return disp.enviar(data)
+
+    def enviar_todos(self, data):
+        return [d.enviar(data) for d in self]
+
+    # ---------- ESTADO / FIM ----------
+    def estado(self):
+        return [d.estado() for d in self]
+
+    def metricas(self):
+        """
+        {id: MetricasLink} de todos os displays, inclusive os que falharam
+        (para o Exportador: cada um vira o label display="<id>").
+        """
+        return {id: d.link.metricas for id, d in self.dispositivos.items()}
+
+    def fechar(self, timeout=2.0):
+        # fecha em paralelo: cada fechar() espera a fila do seu device
+        todos = list(self.dispositivos.values())
+        threads = [threading.Thread(target=d.link.fechar, args=(timeout,)) for d in todos]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for d in todos:
+            if d.link.gravador:
+                d.link.gravador.fechar()
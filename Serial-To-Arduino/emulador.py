@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Emulador do firmware MatrizOledSerial.ino / MatrizSerial.ino num pseudo-terminal.
+
+Abre um par pty e responde como o Arduino: banner de boot, comandos O / MCL /
+M{l}{c} / M{l}{c}RRRGGGBBB[I] / F / pacotes binários, mapXY serpentino e as
+mesmas strings de ACK. Também simula o tempo dos bytes no fio (baud), a
+latência do strip.show() e do display() do OLED e, opcionalmente, a perda de
+bytes do Arduino (interrupções desligadas no show() e buffer RX de 64 bytes).
+
+Uso:
+    python3 emulador.py [--modelo oled|matriz] [--baud 115200] [--perdas] [--mostrar]
+    PORTA_SERIAL=/dev/pts/N python3 game.py
+"""
+
+import argparse
+import heapq
+import os
+import select
+import sys
+import threading
+import time
+import tty
+
+import protocolo
+import binario
+import delta
+import oled
+
+NUM_PIXELS = 64
+MATRIX_SIZE = 8
+
+# tempos do hardware real (aproximados)
+SHOW_S = NUM_PIXELS * 24 * 1.25e-6 + 50e-6   # WS2812: 1.25 us/bit + reset
+OLED_S = 0.025                                # SSD1306 128x64 via I2C a 400 kHz
+OLED_BYTE_S = OLED_S / oled.BYTES_TELA        # uma coluna de página no I2C
+RX_BUFFER = 63                                # SERIAL_RX_BUFFER_SIZE - 1
+FRAME_TIMEOUT_S = 0.050
+OPCODES = range(binario.OP_PIXELS, binario.OP_OLED_RAW + 1)
+
+
+def map_xy(l, c):
+    # mesma conta (uint8_t) do firmware
+    if l % 2 == 0:
+        return (l * MATRIX_SIZE + c) & 0xFF
+    return (l * MATRIX_SIZE + (MATRIX_SIZE - 1 - c)) & 0xFF
+
+def aplicar_intensidade(v, i):
+    return (v * i) // 9
+
+def constrain(v, a, b):
+    return a if v < a else b if v > b else v
+
+
+class Firmware:
+    """
+    Máquina de estados do firmware, sem I/O.
+    receber(b, t) devolve uma lista de (resposta, custo_s, sem_interrupcoes).
+    """
+    def __init__(self, modelo="oled"):
+        self.modelo = modelo
+        self.strip = [(0, 0, 0)] * NUM_PIXELS
+        self.oled = None
+        self.oled_fb = bytearray(oled.BYTES_TELA)   # regiões do OP_OLED_RAW
+        self.paleta = [(0, 0, 0)]
+        self.comandos = 0
+        self.shows = 0
+
+        self.cmd = bytearray()
+        self.em_frame = False
+        self.frame_idx = 0
+        self.frame_hi = 0
+        self.em_pacote = False
+        self.pkt = bytearray()
+        self.pkt_estouro = False
+        self.t_ultimo = 0.0
+
+    # ---------- BOOT ----------
+    def banner(self):
+        if self.modelo == "oled":
+            return ["BOOT_START", "READY_SYSTEM"]
+        return ["READY"]
+
+    # ---------- ESTADO ----------
+    def matriz(self):
+        """
+        Grade lógica 8x8 de (r, g, b) (desfaz o mapXY).
+        """
+        return [[self.strip[map_xy(l, c)] for c in range(MATRIX_SIZE)] for l in range(MATRIX_SIZE)]
+
+    def _set(self, idx, rgb):
+        if idx < NUM_PIXELS:
+            self.strip[idx] = rgb
+
+    def _show(self, resposta):
+        self.shows += 1
+        return [(resposta, SHOW_S, True)]
+
+    # ---------- BYTES ----------
+    def verificar_timeout(self, t):
+        if self.em_frame and t - self.t_ultimo > FRAME_TIMEOUT_S:
+            self.em_frame = False
+            return [("FRAME_TIMEOUT", 0.0, False)]
+        if self.em_pacote and t - self.t_ultimo > FRAME_TIMEOUT_S:
+            # 0x00 solto sem nada depois expira em silêncio
+            self.em_pacote = False
+            return [("PKT_INVALID", 0.0, False)] if self.pkt else []
+        return []
+
+    def receber(self, b, t):
+        eventos = self.verificar_timeout(t)
+        if self.modelo == "oled":
+            eventos += self._receber_oled(b, t)
+        else:
+            eventos += self._receber_linha(b, self._processar_matriz)
+        return eventos
+
+    def _receber_linha(self, b, processar):
+        if b == 0x0A:
+            cmd = self.cmd.decode("latin-1")
+            self.cmd.clear()
+            self.comandos += 1
+            return processar(cmd)
+        if len(self.cmd) < 15:   # char cmd[16]
+            self.cmd.append(b)
+        return []
+
+    def _receber_oled(self, b, t):
+        if self.em_frame:
+            self.t_ultimo = t
+            return self._byte_frame(b)
+
+        if self.em_pacote:
+            self.t_ultimo = t
+            if b != 0:
+                # código COBS (>= 2) + opcode conhecido, senão é texto
+                # depois de um 0x00 solto: sai do modo pacote e reprocessa
+                if len(self.pkt) == 1 and (self.pkt[0] < 2 or b not in OPCODES):
+                    primeiro = self.pkt[0]
+                    self.em_pacote = False
+                    self.pkt = bytearray()
+                    return self._receber_oled(primeiro, t) + self._receber_oled(b, t)
+                if len(self.pkt) < binario.MAX_PACOTE:
+                    self.pkt.append(b)
+                else:
+                    self.pkt_estouro = True
+                return []
+            if not self.pkt:
+                return []
+            self.em_pacote = False
+            self.comandos += 1
+            if self.pkt_estouro:
+                return [("PKT_INVALID", 0.0, False)]
+            return self._processar_pacote(bytes(self.pkt))
+
+        if b == 0 and not self.cmd:
+            self.em_pacote = True
+            self.pkt_estouro = False
+            self.pkt = bytearray()
+            self.t_ultimo = t
+            return []
+
+        if b == ord("F") and not self.cmd:
+            self.em_frame = True
+            self.frame_idx = 0
+            self.t_ultimo = t
+            return []
+
+        return self._receber_linha(b, self._processar_oled)
+
+    def _byte_frame(self, b):
+        if self.frame_idx % 2 == 0:
+            self.frame_hi = b
+        else:
+            px = self.frame_idx // 2
+            rgb = protocolo.rgb565_para_rgb((self.frame_hi << 8) | b)
+            self._set(map_xy(px // MATRIX_SIZE, px % MATRIX_SIZE), rgb)
+        self.frame_idx += 1
+        if self.frame_idx >= 2 * NUM_PIXELS:
+            self.em_frame = False
+            self.comandos += 1
+            return self._show("FRAME_OK")
+        return []
+
+    # ---------- COMANDOS ----------
+    def _ligar(self, sub):
+        d = [(ord(ch) - 48) & 0xFF for ch in sub]
+        l, c = d[0], d[1]
+        r = d[2] * 100 + d[3] * 10 + d[4]
+        g = d[5] * 100 + d[6] * 10 + d[7]
+        b = d[8] * 100 + d[9] * 10 + d[10]
+        i = 9
+        if len(sub) == 12:
+            i = constrain(d[11], 1, 9)
+        rgb = tuple(aplicar_intensidade(constrain(v, 0, 255), i) for v in (r, g, b))
+        return l, c, rgb
+
+    def _processar_oled(self, p):
+        if p == "PING":
+            return [("PONG", 0.0, False)]
+
+        if p[:1] == "O":
+            if len(p) < 9:
+                return [("OLED_DATA_ERR", 0.0, False)]
+            self.oled = {"level": p[1:3], "vidas": p[3], "recorde": p[4:]}
+            return [("OLED_UPDATED", OLED_S, False)]
+
+        if p[:1] == "M":
+            sub = p[1:]
+            if sub == "CL":
+                self.strip = [(0, 0, 0)] * NUM_PIXELS
+                return self._show("MATRIZ_CLEARED")
+
+            if len(sub) == 2 and sub.isdigit():
+                l, c = int(sub[0]), int(sub[1])
+                if l < MATRIX_SIZE and c < MATRIX_SIZE:
+                    self._set(map_xy(l, c), (0, 0, 0))
+                    return self._show("LED_OFF_OK")
+                return [("POS_INVALID", 0.0, False)]
+
+            if len(sub) in (11, 12):
+                l, c, rgb = self._ligar(sub)
+                self._set(map_xy(l, c), rgb)
+                return self._show("LED_ON_OK")
+
+        return [("CMD_INVALID", 0.0, False)]
+
+    def _processar_matriz(self, p):
+        # MatrizSerial.ino: mesma coisa sem o prefixo M e sem OLED
+        if p == "PING":
+            return [("PONG", 0.0, False)]
+
+        if p == "CL":
+            self.strip = [(0, 0, 0)] * NUM_PIXELS
+            return self._show("CLEAR")
+
+        if len(p) == 2 and p.isdigit():
+            l, c = int(p[0]), int(p[1])
+            if l >= MATRIX_SIZE or c >= MATRIX_SIZE:
+                return [("POS_INVALID", 0.0, False)]
+            self._set(map_xy(l, c), (0, 0, 0))
+            return self._show("OFF_OK")
+
+        if len(p) in (11, 12):
+            l, c, rgb = self._ligar(p[:11] + (p[11] if len(p) == 12 and p[11].isdigit() else ""))
+            if l >= MATRIX_SIZE or c >= MATRIX_SIZE:
+                return [("POS_INVALID", 0.0, False)]
+            self._set(map_xy(l, c), rgb)
+            return self._show("ON_OK")
+
+        return [("CMD_INVALID", 0.0, False)]
+
+    def _processar_pacote(self, encoded):
+        try:
+            op, p = binario.desempacotar(encoded)
+        except ValueError as e:
+            return [("CRC_ERR" if "CRC" in str(e) else "PKT_INVALID", 0.0, False)]
+
+        if op == binario.OP_PIXELS and len(p) % 3 == 0:
+            for i in range(0, len(p), 3):
+                l, c = p[i] >> 4, p[i] & 0x0F
+                if l < MATRIX_SIZE and c < MATRIX_SIZE:
+                    self._set(map_xy(l, c), protocolo.rgb565_para_rgb((p[i + 1] << 8) | p[i + 2]))
+            return self._show("PIXELS_OK")
+
+        if op == binario.OP_LIMPAR and not p:
+            self.strip = [(0, 0, 0)] * NUM_PIXELS
+            return self._show("MATRIZ_CLEARED")
+
+        if op == binario.OP_FRAME and len(p) == 2 * NUM_PIXELS:
+            for px in range(NUM_PIXELS):
+                rgb = protocolo.rgb565_para_rgb((p[2 * px] << 8) | p[2 * px + 1])
+                self._set(map_xy(px // MATRIX_SIZE, px % MATRIX_SIZE), rgb)
+            return self._show("FRAME_OK")
+
+        if op == binario.OP_OLED and len(p) == 8:
+            return self._processar_oled("O" + p.decode("latin-1"))
+
+        if op == binario.OP_OLED_RAW:
+            try:
+                oled.aplicar_regiao(self.oled_fb, p)
+            except ValueError:
+                return [("PKT_INVALID", 0.0, False)]
+            return [("OLED_UPDATED", (len(p) - 2) * OLED_BYTE_S, False)]
+
+        if op == binario.OP_PALETA:
+            try:
+                self.paleta = binario.decodificar_paleta(p)
+            except ValueError:
+                return [("PKT_INVALID", 0.0, False)]
+            return [("PALETA_OK", 0.0, False)]
+
+        if op == binario.OP_DELTA:
+            atual = [protocolo.rgb565(*self.strip[map_xy(px // MATRIX_SIZE, px % MATRIX_SIZE)])
+                     for px in range(NUM_PIXELS)]
+            try:
+                novo = delta.aplicar_corridas(atual, p)
+            except ValueError:
+                return [("PKT_INVALID", 0.0, False)]
+            for px, (a, v) in enumerate(zip(atual, novo)):
+                if a != v:
+                    self._set(map_xy(px // MATRIX_SIZE, px % MATRIX_SIZE), protocolo.rgb565_para_rgb(v))
+            return self._show("FRAME_OK")
+
+        if op == binario.OP_FRAME_IDX and len(p) == NUM_PIXELS // 2:
+            for px, rgb in enumerate(binario.decodificar_frame_indexado(p, self.paleta)):
+                self._set(map_xy(px // MATRIX_SIZE, px % MATRIX_SIZE), rgb)
+            return self._show("FRAME_OK")
+
+        return [("PKT_INVALID", 0.0, False)]
+
+
+class Emulador:
+    """
+    Liga um Firmware a um pty, com o tempo do fio e do processamento.
+
+    baud: velocidade simulada (10 bits por byte)
+    simular_perdas: descarta bytes que chegam com o "Arduino" ocupado
+                    (show() sem interrupções / buffer RX cheio)
+    """
+    def __init__(self, modelo="oled", baud=115200, simular_perdas=False, link=None):
+        self.fw = Firmware(modelo)
+        self.byte_s = 10.0 / baud
+        self.simular_perdas = simular_perdas
+        self.link = link
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        tty.setraw(self.master)
+        self.porta = os.ttyname(self.slave)
+
+        self.bytes_rx = 0
+        self.bytes_perdidos = 0
+        self.respostas = 0
+
+        self._t_fio = 0.0           # quando o último byte termina de chegar
+        self._t_cpu = 0.0           # quando o firmware fica livre
+        self._sem_irq = False       # ocupado com interrupções desligadas
+        self._rx_ocupado = 0        # bytes que chegaram com o firmware ocupado
+        self._saida = []            # heap (t, seq, linha)
+        self._seq = 0
+        self._rodando = False
+        self._thread = None
+
+    # ---------- CICLO DE VIDA ----------
+    def iniciar(self):
+        if self.link:
+            try:
+                os.unlink(self.link)
+            except FileNotFoundError:
+                pass
+            os.symlink(self.porta, self.link)
+
+        agora = time.monotonic()
+        for linha in self.fw.banner():
+            self._agendar(agora, linha)
+
+        self._rodando = True
+        self._thread = threading.Thread(target=self._rodar, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._rodando = False
+        if self._thread:
+            self._thread.join(1.0)
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        if self.link:
+            try:
+                os.unlink(self.link)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+    # ---------- LOOP ----------
+    def _agendar(self, t, linha):
+        self._seq += 1
+        heapq.heappush(self._saida, (t, self._seq, linha))
+
+    def _rodar(self):
+        while self._rodando:
+            agora = time.monotonic()
+            espera = 0.01
+            if self._saida:
+                espera = max(0.0, min(espera, self._saida[0][0] - agora))
+
+            try:
+                r, _, _ = select.select([self.master], [], [], espera)
+                data = os.read(self.master, 4096) if r else b""
+            except OSError:
+                break
+
+            agora = time.monotonic()
+            for b in data:
+                self._byte(b, agora)
+
+            for linha, _, _ in self.fw.verificar_timeout(max(agora, self._t_cpu)):
+                self._agendar(max(agora, self._t_cpu), linha)
+
+            self._enviar_respostas(time.monotonic())
+
+    def _byte(self, b, agora):
+        self.bytes_rx += 1
+        ta = max(agora, self._t_fio) + self.byte_s
+        self._t_fio = ta
+
+        if ta < self._t_cpu:
+            self._rx_ocupado += 1
+            if self.simular_perdas and (self._sem_irq or self._rx_ocupado > RX_BUFFER):
+                self.bytes_perdidos += 1
+                return
+        else:
+            self._rx_ocupado = 0
+
+        t = max(ta, self._t_cpu)
+        for linha, custo, sem_irq in self.fw.receber(b, t):
+            if custo:
+                self._t_cpu = t + custo
+                self._sem_irq = sem_irq
+                self._rx_ocupado = 0
+            self._agendar(max(t + custo, self._t_cpu), linha)
+
+    def _enviar_respostas(self, agora):
+        out = bytearray()
+        while self._saida and self._saida[0][0] <= agora:
+            _, _, linha = heapq.heappop(self._saida)
+            out += (linha + "\r\n").encode()
+            self.respostas += 1
+        if out:
+            try:
+                os.write(self.master, bytes(out))
+            except OSError:
+                pass
+
+    # ---------- VISUALIZAÇÃO ----------
+    def render(self):
+        linhas = []
+        for row in self.fw.matriz():
+            linhas.append("".join(
+                f"\x1b[48;2;{r};{g};{b}m  \x1b[0m" if (r or g or b) else ". "
+                for r, g, b in row
+            ))
+        if self.fw.oled:
+            o = self.fw.oled
+            linhas.append(f"OLED level={o['level']} vidas={o['vidas']} recorde={o['recorde']}")
+        if any(self.fw.oled_fb):
+            linhas.append(oled.para_texto(self.fw.oled_fb))
+        return "\n".join(linhas)
+
+    def estado(self):
+        return {
+            "porta": self.porta,
+            "comandos": self.fw.comandos,
+            "shows": self.fw.shows,
+            "respostas": self.respostas,
+            "bytes_rx": self.bytes_rx,
+            "bytes_perdidos": self.bytes_perdidos,
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Emulador da matriz/OLED serial num pty")
+    ap.add_argument("--modelo", choices=("oled", "matriz"), default="oled",
+                    help="oled = MatrizOledSerial.ino, matriz = MatrizSerial.ino")
+    ap.add_argument("--baud", type=int, default=115200)
+    ap.add_argument("--perdas", action="store_true", help="simula perda de bytes com o Arduino ocupado")
+    ap.add_argument("--link", help="cria um symlink para o pty (ex.: /tmp/ttyEMU0)")
+    ap.add_argument("--mostrar", action="store_true", help="desenha a matriz no terminal")
+    args = ap.parse_args()
+
+    emu = Emulador(args.modelo, args.baud, args.perdas, args.link).iniciar()
+    print("[EMULADOR]", emu.porta, f"(link {args.link})" if args.link else "")
+    print(f"Rode: PORTA_SERIAL={args.link or emu.porta} python3 game.py")
+
+    try:
+        while True:
+            time.sleep(0.1)
+            if args.mostrar:
+                sys.stdout.write("\x1b[H\x1b[2J" + emu.render() + "\n" + str(emu.estado()) + "\n")
+                sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emu.parar()
+        print("\n[EMULADOR]", emu.estado())
+
+
+if __name__ == "__main__":
+    main()
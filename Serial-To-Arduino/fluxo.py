@@ -0,0 +1,190 @@
+"""
+Controle de fluxo por ACK.
+
+O firmware responde exatamente uma linha por comando (LED_ON_OK, LED_OFF_OK,
+MATRIZ_CLEARED, OLED_UPDATED, FRAME_OK, PIXELS_OK, POS_INVALID, ...).
+Em vez de esperar um pacing "chutado", o ControleFluxo guarda os comandos
+em voo na ordem de envio e casa cada resposta com o mais antigo:
+
+- no máximo `janela` comandos em voo; o próximo sai assim que chega um ACK
+- e no máximo `max_bytes` em voo (o anel de RX do Arduino, 63 B): enquanto
+  o sketch está ocupado (strip.show(), OLED) e não lê a serial, o host não
+  manda mais do que cabe no anel. Não resolve o que chega com as
+  interrupções desligadas: esses bytes se perdem de qualquer jeito, e aí
+  quem salva é o CRC / timeout do ACK. Um comando maior que o anel (frame
+  F, 129 B) só sai com a linha vazia, ou seja, para frames F a janela é
+  1 na prática (esperas_bytes conta quantas vezes isso segurou a fila;
+  o benchmark.py mede o custo com --max-bytes)
+- janela adaptativa: cresce +1 a cada `janela` ACKs, cai pela metade
+  quando um ACK não chega a tempo (o device ficou pra trás / perdeu bytes)
+- RTT por comando e contagem de erros de protocolo
+"""
+
+import time
+from collections import deque, Counter
+
+RESPOSTAS_OK = {
+    "LED_ON_OK", "LED_OFF_OK", "MATRIZ_CLEARED", "OLED_UPDATED",
+    "FRAME_OK", "PIXELS_OK", "PALETA_OK",
+    "ON_OK", "OFF_OK", "CLEAR",   # MatrizSerial.ino
+}
+RESPOSTAS_ERRO = {
+    "POS_INVALID", "CMD_INVALID", "OLED_DATA_ERR",
+    "FRAME_TIMEOUT", "CRC_ERR", "PKT_INVALID",
+}
+RESPOSTAS = RESPOSTAS_OK | RESPOSTAS_ERRO
+
+RX_BUFFER = 63    # SERIAL_RX_BUFFER_SIZE - 1 no AVR
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    v = sorted(valores)
+    k = min(len(v) - 1, max(0, int(round(p / 100.0 * (len(v) - 1)))))
+    return v[k]
+
+
+class ControleFluxo:
+    def __init__(self, janela=2, janela_min=1, janela_max=8, timeout_ack=0.25, historico=512,
+                 max_bytes=RX_BUFFER):
+        self.janela = janela
+        self.max_bytes = max_bytes
+        self.janela_min = janela_min
+        self.janela_max = janela_max
+        self.timeout_ack = timeout_ack
+
+        self.em_voo = deque()           # (cmd, t_envio)
+        self.bytes_em_voo = 0
+        self.rtts = deque(maxlen=historico)
+
+        self.acks = 0
+        self.perdidos = 0
+        self.inesperados = 0
+        self.esperas_bytes = 0
+        self.erros = Counter()
+        self._acks_desde_ajuste = 0
+
+    def livres(self):
+        return max(0, self.janela - len(self.em_voo))
+
+    def cabe(self, tamanho, extra=0):
+        """
+        Se mais `tamanho` bytes (além de `extra` já separados para o mesmo
+        lote) cabem no buffer de RX junto com o que está em voo.
+        """
+        if self.max_bytes is None:
+            return True
+        ocupado = self.bytes_em_voo + extra
+        return ocupado == 0 or ocupado + tamanho <= self.max_bytes
+
+    def espera_bytes(self, tamanho):
+        """
+        A janela tem vaga mas o próximo comando não cabe no anel de RX:
+        conta e devolve True.
+        """
+        if self.livres() and not self.cabe(tamanho):
+            self.esperas_bytes += 1
+            return True
+        return False
+
+    def registrar(self, cmds, agora=None):
+        agora = time.monotonic() if agora is None else agora
+        for cmd in cmds:
+            self.em_voo.append((cmd, agora))
+            self.bytes_em_voo += len(cmd)
+
+    def _tirar(self, esquerda=True):
+        cmd, t_envio = self.em_voo.popleft() if esquerda else self.em_voo.pop()
+        self.bytes_em_voo -= len(cmd)
+        return cmd, t_envio
+
+    def cancelar(self, n):
+        """
+        Tira os n últimos registrados (a escrita falhou).
+        """
+        for _ in range(min(n, len(self.em_voo))):
+            self._tirar(esquerda=False)
+
+    def receber(self, linha, agora=None):
+        """
+        Casa uma linha do Arduino com o comando em voo mais antigo.
+        Devolve (cmd, rtt, resposta) ou None se a linha não é resposta.
+        """
+        if linha not in RESPOSTAS:
+            return None
+        if not self.em_voo:
+            self.inesperados += 1
+            return None
+
+        agora = time.monotonic() if agora is None else agora
+        cmd, t_envio = self._tirar()
+        rtt = agora - t_envio
+        self.rtts.append(rtt)
+        self.acks += 1
+
+        if linha in RESPOSTAS_ERRO:
+            self.erros[linha] += 1
+
+        # cresce devagar enquanto o link responde
+        self._acks_desde_ajuste += 1
+        if self._acks_desde_ajuste >= self.janela and self.janela < self.janela_max:
+            self.janela += 1
+            self._acks_desde_ajuste = 0
+
+        return cmd, rtt, linha
+
+    def prazo(self):
+        """
+        Instante em que o comando mais antigo expira (None = nada em voo).
+        """
+        if not self.em_voo:
+            return None
+        return self.em_voo[0][1] + self.timeout_ack
+
+    def expirar(self, agora=None):
+        """
+        Descarta comandos sem ACK dentro do timeout e reduz a janela.
+        Devolve quantos expiraram.
+        """
+        agora = time.monotonic() if agora is None else agora
+        n = 0
+        while self.em_voo and agora - self.em_voo[0][1] >= self.timeout_ack:
+            self._tirar()
+            n += 1
+
+        if n:
+            self.perdidos += n
+            self.janela = max(self.janela_min, self.janela // 2)
+            self._acks_desde_ajuste = 0
+        return n
+
+    def resetar(self):
+        # device reiniciou: nada do que estava em voo vai ser respondido
+        self.perdidos += len(self.em_voo)
+        self.em_voo.clear()
+        self.bytes_em_voo = 0
+        self.janela = self.janela_min
+        self._acks_desde_ajuste = 0
+
+    def rtt_medio(self):
+        if not self.rtts:
+            return None
+        return sum(self.rtts) / len(self.rtts)
+
+    def estado(self):
+        rtts = list(self.rtts)
+        ms = lambda v: None if v is None else round(v * 1000, 2)
+        return {
+            "janela": self.janela,
+            "em_voo": len(self.em_voo),
+            "bytes_em_voo": self.bytes_em_voo,
+            "acks": self.acks,
+            "perdidos": self.perdidos,
+            "inesperados": self.inesperados,
+            "esperas_bytes": self.esperas_bytes,
+            "erros": dict(self.erros),
+            "rtt_p50_ms": ms(percentil(rtts, 50)),
+            "rtt_p95_ms": ms(percentil(rtts, 95)),
+            "rtt_max_ms": ms(max(rtts) if rtts else None),
+        }
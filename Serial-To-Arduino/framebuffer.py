@@ -0,0 +1,66 @@
+"""
+Framebuffer "sombra" da matriz de LEDs.
+
+Os jogos desenham aqui (cor no formato RRRGGGBBBI ou None = apagado)
+e o commit() devolve só os pixels que mudaram em relação ao que o
+Arduino já está mostrando.
+"""
+
+APAGADO = None
+
+
+class Framebuffer:
+    def __init__(self, linhas=8, colunas=8):
+        self.linhas = linhas
+        self.colunas = colunas
+        self.pixels = [APAGADO] * (linhas * colunas)    # o que o jogo desenhou
+        self.mostrado = [APAGADO] * (linhas * colunas)  # o que o device mostra
+
+    def _idx(self, l, c):
+        return l * self.colunas + c
+
+    def dentro(self, l, c):
+        return 0 <= l < self.linhas and 0 <= c < self.colunas
+
+    # ---------- DESENHO ----------
+    def acender(self, l, c, cor):
+        if self.dentro(l, c):
+            self.pixels[self._idx(l, c)] = cor
+
+    def apagar(self, l, c):
+        if self.dentro(l, c):
+            self.pixels[self._idx(l, c)] = APAGADO
+
+    def limpar(self):
+        self.pixels = [APAGADO] * (self.linhas * self.colunas)
+
+    def acesos(self):
+        """
+        Lista (l, c, cor) de todos os pixels acesos no desenho atual.
+        """
+        return [
+            (i // self.colunas, i % self.colunas, p)
+            for i, p in enumerate(self.pixels)
+            if p is not APAGADO
+        ]
+
+    # ---------- DIFF ----------
+    def mudancas(self):
+        """
+        Pixels (l, c, cor) que diferem do que o device está mostrando.
+        cor None = apagar.
+        """
+        return [
+            (i // self.colunas, i % self.colunas, p)
+            for i, (p, m) in enumerate(zip(self.pixels, self.mostrado))
+            if p != m
+        ]
+
+    def commit(self):
+        """
+        Devolve as mudanças pendentes e assume que o device passou
+        a mostrar o desenho atual.
+        """
+        mud = self.mudancas()
+        self.mostrado = list(self.pixels)
+        return mud
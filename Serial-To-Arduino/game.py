@@ -1,521 +1,507 @@
-import serial
-import serial.tools.list_ports
-import time
+import os
 import sys
-import tty
-import termios
-import random
-import select
-import threading
-
-MATRIZ_LINHAS = 8
-MATRIZ_COLUNAS = 8
+import time
+from functools import partial
+
+from framebuffer import Framebuffer
+import protocolo
+import binario
+from dispositivos import Gerenciador
+from metricas import Exportador
+from reator import Reator
+from cadencia import Cadencia
+import regras
+from geometria import Geometria
+from sprites import Atlas
+from animacao import Animador
+from paleta import Paleta
+from oled import TelaOled
+from teclado import Teclado, TODAS, ULTIMA_DIRECAO
+
+# como os painéis estão montados; os jogos desenham em coordenadas lógicas
+# (o painel atual está espelhado na horizontal)
+# ex.: 2x2 painéis = Geometria(2, 2, espelhar_h=True, serpentina_paineis=True)
+GEOMETRIA = Geometria(espelhar_h=True)
+MATRIZ_LINHAS = GEOMETRIA.linhas
+MATRIZ_COLUNAS = GEOMETRIA.colunas
 
 COR_JOGADOR     = "0002550001"  # verde
 COR_MEMORIA     = "2550000001"  # vermelho
 COR_SELECIONADO = "0000002551"  # azul
 COR_X           = "2550000001"  # vermelho
+COR_CABECA      = "0002552551"  # ciano (destaca bem)
 
-MAX_ERROS = 3
+MAX_ERROS = regras.MAX_ERROS
 
-# pacing base + adaptativo (anti travamento)
-USB_PACING_BASE = 0.004
-USB_PACING_MAX  = 0.020
-usb_pacing = USB_PACING_BASE
+# "ascii" = protocolo legado em texto | "binario" = pacotes COBS + CRC-8 (binario.py)
+PROTOCOLO = "ascii"
 
-# heurística de “link degradado”
-timeout_streak = 0
-TIMEOUT_STREAK_RECONNECT = 10  # reconecta após N timeouts seguidos
+# controle de fluxo por ACK (LED_ON_OK, OLED_UPDATED, ...) em vez de pacing fixo
+# janela = comandos em voo; 0 = desliga e volta ao pacing USB_PACING_*
+# benchmark.py no emulador: comandos curtos saem ~2x mais rápido que com
+# pacing (x/ascii: 234 -> 505 cmd/s). Frame F (129 B) não cabe no anel de RX
+# e sai um por vez: janela 1 e 2 empatam (~70 frames/s, contra 88 com pacing
+# fixo, que com --perdas perde 25 de 30 frames)
+FLUXO_JANELA = 2
 
-# ---------- TECLADO ----------
-def getch():
-    fd = sys.stdin.fileno()
-    old = termios.tcgetattr(fd)
-    try:
-        tty.setraw(fd)
-        return sys.stdin.read(1)
-    finally:
-        termios.tcsetattr(fd, termios.TCSADRAIN, old)
-
-def read_key():
-    ch = getch()
-    if ch in ("\r", "\n"):
-        return "ENTER"
-
-    if ch == "\x1b":  # ESC
-        ch2 = getch()
-        if ch2 == "[":
-            ch3 = getch()
-            if ch3 == "A": return "UP"
-            if ch3 == "B": return "DOWN"
-            if ch3 == "C": return "RIGHT"
-            if ch3 == "D": return "LEFT"
-        return ""
-
-    return ch.upper()
-
-def drenar_teclado():
-    """
-    Remove teclas “acumuladas” quando o jogo ficou lento.
-    Não bloqueia.
-    """
-    try:
-        fd = sys.stdin.fileno()
-        old = termios.tcgetattr(fd)
-        try:
-            tty.setraw(fd)
-            while True:
-                r, _, _ = select.select([sys.stdin], [], [], 0)
-                if not r:
-                    break
-                sys.stdin.read(1)
-        finally:
-            termios.tcsetattr(fd, termios.TCSADRAIN, old)
-    except Exception:
-        pass
+# modo paleta: as cores do jogo sobem uma vez por cena (OP_PALETA) e um
+# frame inteiro vira 64 índices de 4 bits (OP_FRAME_IDX, 37 bytes no fio);
+# funciona também com PROTOCOLO = "ascii" (o firmware aceita os dois)
+PALETA_INDEXADA = True
 
-# ---------- SERIAL ----------
-def detectar_arduino():
-    for p in serial.tools.list_ports.comports():
-        if "ACM" in p.device or "USB" in p.device:
-            return p.device
-    return "/dev/ttyACM0"
-
-porta = detectar_arduino()
-print("[PORTA]", porta)
-
-def abrir_serial():
-    s = serial.Serial(
-        porta, 115200,
-        timeout=1,
-        write_timeout=2,
-        rtscts=False,
-        dsrdtr=False
-    )
-    time.sleep(2.5)
-    try:
-        s.reset_input_buffer()
-        s.reset_output_buffer()
-    except Exception:
-        pass
-    return s
+# HUD do OLED desenhado aqui (oled.py, OP_OLED_RAW): só os trechos que
+# mudaram vão no fio; False = comando O (o firmware redesenha a tela toda)
+OLED_FRAMEBUFFER = True
 
-ser = abrir_serial()
+# métricas do link para um coletor externo: arquivo (.json ou texto Prometheus)
+# e/ou socket Unix; None desliga
+METRICAS_ARQUIVO = "/tmp/tvbox_link.prom"
+METRICAS_SOCKET = None
+METRICAS_INTERVALO = 5.0
 
-# tenta ler READY (sem depender disso 100%)
-t0 = time.time()
-while time.time() - t0 < 3.5:
-    try:
-        r = ser.readline().decode(errors="ignore").strip()
-        if r:
-            print("[ARDUINO]", r)
-            if "READY" in r:
-                break
-    except Exception:
-        break
-
-def drenar_serial(max_bytes=4096):
+# tráfego TX/RX de cada display para reproduzir depois (captura.py);
+# um arquivo por display, reescrito a cada execução; None desliga
+CAPTURA = "/tmp/tvbox_captura_{id}.bin"
+
+# frames prontos dos sprites (dígitos, X, check) entre execuções; None desliga
+SPRITES_CACHE = "/tmp/tvbox_sprites.json"
+
+# tempo de 1 byte no fio a 115200 baud (8N1 = 10 bits)
+SEGUNDOS_POR_BYTE = 10 / 115200
+
+# ---------- PARTIDA ----------
+# fases da inicialização em ms desde aqui; impressas em [PARTIDA]
+T_INICIO = time.monotonic()
+fases = {}
+
+def marcar_fase(nome):
+    fases[nome] = round((time.monotonic() - T_INICIO) * 1000, 1)
+
+# ---------- SERIAL ----------
+# todos os Arduinos achados; o display N recebe o painel N da GEOMETRIA e o
+# primeiro também cuida do OLED. Aberto em main()
+dispositivos = None
+
+# ---------- SERIAL SAFE ----------
+def _dados(cmd):
+    # bytes = comando binário pronto (ex.: frame F), str = linha de texto
+    if isinstance(cmd, bytes):
+        return cmd
+    if PROTOCOLO == "binario":
+        return binario.de_ascii(cmd)
+    return (cmd + "\n").encode()
+
+def enviar(cmd, painel=0):
     """
-    Evita acumular lixo/prints do Arduino no buffer.
+    Enfileira o comando no device do painel e volta na hora; pacing,
+    retry e reconexão ficam com o transporte de cada device.
     """
-    try:
-        n = ser.in_waiting
-        if n:
-            ser.read(min(n, max_bytes))
-    except Exception:
-        pass
+    return dispositivos.enviar(painel, _dados(cmd))
 
-def tentar_reconectar():
+def lembrar_tela(painel, chave, cmd):
     """
-    Recuperação automática sem reiniciar o jogo.
+    Estado atual de uma parte da tela do device, reenviado pelo
+    transporte se ele reconectar (ou o Arduino reiniciar).
     """
-    global ser, timeout_streak, usb_pacing
-    try:
-        print("[WARN] Reconectando serial...")
-        try:
-            ser.close()
-        except Exception:
-            pass
-        time.sleep(0.4)
-        ser = abrir_serial()
-        timeout_streak = 0
-        usb_pacing = min(USB_PACING_MAX, USB_PACING_BASE + 0.006)
-
-        # drena qualquer lixo inicial
-        t0 = time.time()
-        while time.time() - t0 < 1.0:
-            drenar_serial()
-            time.sleep(0.05)
-
-        print("[OK] Serial reconectada.")
-        return True
-    except Exception as e:
-        print("[ERRO] Falha ao reconectar:", e)
-        return False
+    disp = dispositivos.get(painel)
+    if disp is not None:
+        disp.link.lembrar(chave, cmd)
 
-# ---------- SERIAL SAFE ----------
-def enviar(cmd, retries=3):
+def _cmd_frame(frame):
+    if PROTOCOLO == "binario":
+        return binario.frame(frame)
+    return protocolo.codificar_frame(frame)
+
+def _cmd_frame_painel(pixels, painel):
+    return _cmd_frame(GEOMETRIA.paineis(pixels)[painel])
+
+def enviar_frame(pixels):
     """
-    Envio robusto:
-    - pacing adaptativo
-    - drena buffer
-    - retry com backoff
-    - auto-reconnect ao detectar sequência de timeouts
+    Atualiza a matriz inteira com uma única escrita (comando F).
+    pixels: cores em ordem lógica (l * colunas + c), None = apagado.
     """
-    global usb_pacing, timeout_streak
-
-    drenar_serial()
-
-    data = (cmd + "\n").encode()
-    for i in range(retries):
-        try:
-            ser.write(data)
-            ser.flush()
-            time.sleep(usb_pacing)
-
-            # sucesso -> reduz pacing gradualmente
-            if usb_pacing > USB_PACING_BASE:
-                usb_pacing = max(USB_PACING_BASE, usb_pacing - 0.001)
-
-            timeout_streak = 0
-            return True
-
-        except serial.SerialTimeoutException:
-            timeout_streak += 1
-
-            # congestionou -> aumenta pacing + backoff
-            usb_pacing = min(USB_PACING_MAX, usb_pacing + 0.003)
-            try:
-                ser.reset_output_buffer()
-            except Exception:
-                pass
-
-            # se está muito degradado, limpa teclado e espera um pouco
-            drenar_teclado()
-            time.sleep(0.08 * (i + 1))
-
-            if timeout_streak >= TIMEOUT_STREAK_RECONNECT:
-                if tentar_reconectar():
-                    # após reconectar, tenta reenviar 1 vez
-                    try:
-                        ser.write(data)
-                        ser.flush()
-                        time.sleep(usb_pacing)
-                        return True
-                    except Exception:
-                        return False
-                return False
-
-        except Exception:
-            timeout_streak += 1
-            drenar_teclado()
-            time.sleep(0.06)
-
-    return False
+    for painel, frame in enumerate(GEOMETRIA.paineis(pixels)):
+        cmd = _cmd_frame(frame)
+        lembrar_tela(painel, "matriz", cmd)
+        enviar(cmd, painel)
+
+tela_oled = TelaOled()
+
+def desenhar_hud(level, vidas, recorde):
+    # mesmo layout que o firmware desenha no comando O
+    t = tela_oled
+    t.limpar()
+    t.texto(4, 5, "LEVEL:", escala=2)
+    t.texto(75, 5, f"{level:02d}", escala=2)
+    t.linha_h(0, 25, 128)
+    t.texto(4, 35, "VIDAS:")
+    for i in range(vidas):
+        t.retangulo(55 + i * 12, 35, 7, 7)
+    t.texto(4, 52, f"HI-SCORE: {recorde:05d}")
 
 def atualizar_oled(level, vidas, recorde):
+    if OLED_FRAMEBUFFER:
+        # redesenha tudo aqui; só os bytes que mudaram vão para o device
+        desenhar_hud(level, vidas, recorde)
+        pacotes = tela_oled.pacotes()
+        # lembra antes de enfileirar: se a fila transbordar no meio, a
+        # ressincronização já leva o estado novo
+        lembrar_tela(0, "oled", tela_oled.pacotes_completos)
+        for pkt in pacotes:
+            enviar(pkt)
+        return
     # Formato: O + LL + V + RRRRR (L = level 2 dígitos, V = vidas 1 dígito, R = recorde 5 dígitos)
-    cmd = f"O{level:02d}{vidas:01d}{recorde:05d}"
+    cmd = _dados(f"O{level:02d}{vidas:01d}{recorde:05d}")
+    lembrar_tela(0, "oled", cmd)
     enviar(cmd)
 
+# ---------- FRAMEBUFFER ----------
+# os jogos desenham no framebuffer; mostrar() envia só o que mudou
+fb = Framebuffer(MATRIZ_LINHAS, MATRIZ_COLUNAS)
+
 def apagar_led(l, c):
-    enviar(f"M{l}{c}")
+    fb.apagar(l, c)
 
 def acender_led(l, c, cor):
-    enviar(f"M{l}{c}{cor}")
+    fb.acender(l, c, cor)
 
 def limpar_matriz():
-    enviar("MCL")
+    fb.limpar()
 
-# ---------- ANIMAÇÕES ----------
-def desenhar_X(cor):
-    limpar_matriz()
-    for i in range(8):
-        acender_led(i, i, cor)
-        acender_led(i, 7 - i, cor)
-
-def animacao_derrota_X():
-    for _ in range(3):
-        desenhar_X(COR_X)
-        time.sleep(0.18)
-        limpar_matriz()
-        time.sleep(0.10)
-    desenhar_X(COR_X)
-    time.sleep(0.22)
-    limpar_matriz()
-
-def desenhar_check_verde():
-    limpar_matriz()
-    pts = [
-        (5,1),(6,2),
-        (6,3),(5,4),
-        (4,5),(3,6),(2,7)
-    ]
-    for l, c in pts:
-        c = 7 - c
-        acender_led(l, c, COR_JOGADOR)
-
-def animacao_vitoria_lenta_verde():
-    desenhar_check_verde()
-    time.sleep(0.24)
-    limpar_matriz()
-    time.sleep(0.12)
-    desenhar_check_verde()
-    time.sleep(0.24)
-    limpar_matriz()
-
-def animacao_round_start(qtd):
-    # leve e lenta (sem loop com sleeps curtos)
-    limpar_matriz()
-    limite = min(qtd, 3)
-    for c in range(limite):
-        acender_led(0, c, COR_JOGADOR)
-    time.sleep(0.18)
-    limpar_matriz()
-
-# ---------- MEMÓRIA (CRESCENTE) ----------
-def memoria_inicial(qtd):
-    qtd = max(2, min(64, qtd))
-    pos = random.sample(range(64), qtd)
-    return {(p // 8, p % 8) for p in pos}
-
-def memoria_adicionar_um(leds_memoria):
-    if len(leds_memoria) >= 64:
-        return leds_memoria
-    livres = [(l, c) for l in range(8) for c in range(8) if (l, c) not in leds_memoria]
-    novo = random.choice(livres)
-    leds_memoria.add(novo)
-    return leds_memoria
-
-# ---------- JOGO (ROUND) ----------
-def loop_round(leds_memoria):
-    acertos = set()
-    erros_totais = 0
-    linha, coluna = 0, 0
-    jogo_iniciado = False
-
-   
-    # mostra memória
-    for l, c in leds_memoria:
-        acender_led(l, c, COR_MEMORIA)
-
-    acender_led(linha, coluna, COR_JOGADOR)
-
-    while True:
-        # drena “lixo” continuamente para não congestionar
-        drenar_serial()
-
-        k = read_key()
-        if not k:
-            continue
+def _por_painel(mudancas):
+    """
+    [(l, c, cor)] lógicos -> {painel: [(l, c, cor)] em coordenadas do device}
+    (tabela pré-compilada da geometria)
+    """
+    saida = {}
+    for p, l, c, cor in GEOMETRIA.mapear(mudancas):
+        saida.setdefault(p, []).append((l, c, cor))
+    return saida
 
-        if k == "P":
-            return None
+paleta = Paleta([COR_JOGADOR, COR_MEMORIA, COR_SELECIONADO, COR_X, COR_CABECA])
+pacote_paleta = paleta.pacote()
+paleta_enviada = set()   # painéis que já receberam a paleta nesta cena
 
-        # setas -> WASD
-        if k == "UP": k = "W"
-        elif k == "DOWN": k = "S"
-        elif k == "LEFT": k = "A"
-        elif k == "RIGHT": k = "D"
+def _com_paleta(cmds, painel):
+    # a paleta vai junto só na primeira vez da cena
+    return cmds if painel in paleta_enviada else [pacote_paleta] + cmds
 
-        # primeira ação apaga memória
-        if not jogo_iniciado and k in ("W", "A", "S", "D", "ENTER"):
-            limpar_matriz()
-            acender_led(linha, coluna, COR_JOGADOR)
-            jogo_iniciado = True
+def _custo_envio(cmds, painel):
+    # estimativa: tempo no fio + pacing por comando
+    n_bytes = sum(len(c) if isinstance(c, bytes) else protocolo.tamanho_cmd(c) for c in cmds)
+    return n_bytes * SEGUNDOS_POR_BYTE + len(cmds) * dispositivos[painel].link.custo_comando()
 
-        # ENTER marca
-        if k == "ENTER":
-            if (linha, coluna) in leds_memoria:
-                if (linha, coluna) not in acertos:
-                    acertos.add((linha, coluna))
-                    acender_led(linha, coluna, COR_SELECIONADO)
+def mostrar():
+    """
+    Sincroniza cada painel com o framebuffer pelo caminho mais barato:
+    - só os pixels que mudaram
+    - MCL + pixels acesos
+    - frame inteiro (F) numa escrita só
+    Cada painel vai para o seu device; as filas andam em paralelo.
+    """
+    mudancas = fb.commit()
+    if not mudancas:
+        return
+
+    por_painel = _por_painel(mudancas)
+    acesos = _por_painel(fb.acesos())
+    frames = GEOMETRIA.paineis(fb.pixels)
+
+    for painel, mud in por_painel.items():
+        if dispositivos.get(painel) is not None:
+            # frame inteiro só é codificado se precisar ressincronizar
+            lembrar_tela(painel, "matriz", partial(_cmd_frame, frames[painel]))
+            _mostrar_painel(painel, mud, acesos.get(painel, []), frames[painel])
+
+def _mostrar_painel(painel, mudancas, acesos, frame):
+    if PROTOCOLO == "binario":
+        # pixels agrupados num pacote só
+        opcoes = [binario.pixels(mudancas)]
+        opcoes.append([binario.limpar()] + binario.pixels(acesos))
+        opcoes.append([binario.frame(frame)])
+    else:
+        opcoes = [[protocolo.cmd_pixel(l, c, cor) for l, c, cor in mudancas]]
+        opcoes.append(["MCL"] + [protocolo.cmd_pixel(l, c, cor) for l, c, cor in acesos])
+        if len(mudancas) > 1:
+            opcoes.append([protocolo.codificar_frame(frame)])
+
+    if PALETA_INDEXADA:
+        indexado = paleta.frame(frame)
+        if indexado is not None:
+            opcoes.append(_com_paleta([indexado], painel))
+
+    _enviar_lista(min(opcoes, key=lambda cmds: _custo_envio(cmds, painel)), painel)
+
+def _enviar_lista(cmds, painel):
+    for cmd in cmds:
+        enviar(cmd, painel)
+        if cmd is pacote_paleta:
+            paleta_enviada.add(painel)
+            lembrar_tela(painel, "paleta", pacote_paleta)
 
-                if acertos == leds_memoria:
-                    return True
-            else:
-                erros_totais += 1
-                animacao_derrota_X()
-
-                if erros_totais >= MAX_ERROS:
-                    return False
-                
-                # Atualiza display
-                atualizar_oled(len(leds_memoria), (MAX_ERROS - erros_totais), 00000)
-                time.sleep(1.0)
-
-                # reseta tentativa (mesma memória)
-                acertos.clear()
-                linha, coluna = 0, 0
-                jogo_iniciado = False
-
-                limpar_matriz()
-                for l, c in leds_memoria:
-                    acender_led(l, c, COR_MEMORIA)
-                acender_led(linha, coluna, COR_JOGADOR)
-            continue
+# ---------- ANIMAÇÕES ----------
+PONTOS_X = [(i, i) for i in range(8)] + [(i, 7 - i) for i in range(8)]
 
-        # movimento (A/D invertidos)
-        nl, nc = linha, coluna
-        if k == "W": nl -= 1
-        elif k == "S": nl += 1
-        elif k == "A": nc += 1   # A -> direita
-        elif k == "D": nc -= 1   # D -> esquerda
-        elif k == "P": return None
-        else:
+PONTOS_CHECK = [
+    (5,1),(6,2),
+    (6,3),(5,4),
+    (4,5),(3,6),(2,7)
+]
+
+def mostrar_sprite(nome, cor):
+    """
+    Desenha um sprite do atlas: o framebuffer vira o frame pronto e,
+    se algo mudou, vai uma escrita só com o blob já codificado.
+    """
+    fb.pixels = list(atlas.pixels(nome, cor))
+    for painel in _por_painel(fb.commit()):
+        if dispositivos.get(painel) is None:
             continue
+        blob = atlas.blob(nome, cor, painel)
+        # cores completas: não depende da paleta chegar antes
+        lembrar_tela(painel, "matriz", partial(_cmd_frame_painel, atlas.pixels(nome, cor), painel))
+        _enviar_lista(_com_paleta([blob], painel) if atlas.formato == "indexado" else [blob], painel)
 
-        if 0 <= nl < 8 and 0 <= nc < 8:
-            if (linha, coluna) not in acertos:
-                apagar_led(linha, coluna)
-            else:
-                acender_led(linha, coluna, COR_SELECIONADO)
+# linhas do tempo (regras.py: a simulação conta os mesmos tempos)
+DERROTA_X = regras.derrota_x(COR_X)
+VITORIA_VERDE = regras.vitoria(COR_JOGADOR)
 
-            linha, coluna = nl, nc
-            acender_led(linha, coluna, COR_JOGADOR)
+def quadros_round_start(qtd):
+    return regras.round_start(qtd, COR_JOGADOR)
 
+def desenhar_quadro(sprite, cor):
+    if sprite is None:
+        limpar_matriz()
+        mostrar()
+    else:
+        mostrar_sprite(sprite, cor)
+
+# ---------- CENAS ----------
+# cada tela (menu, jogos) é uma cena: entrar() / tecla(k) / sair()
+# o reator chama tecla() quando o stdin tem dados e os timers da cena
+reator = Reator()
+teclado = Teclado()
+animador = Animador(reator, desenhar_quadro)
+cena = None
+
+def trocar_cena(nova):
+    global cena
+    animador.cancelar()
+    paleta_enviada.clear()  # paleta sobe de novo na próxima cena
+    if cena:
+        cena.sair()
+    teclado.coletar()  # teclas da tela anterior não vazam pra próxima
+    cena = nova
+    if cena:
+        cena.entrar()
+
+class Cena:
+    # TODAS = cada tecla vai pra tecla() assim que chega
+    # ULTIMA_DIRECAO = a cena lê teclado.coletar() no próprio tick
+    politica_teclado = TODAS
+
+    def __init__(self):
+        self.timers = []
+
+    def depois(self, atraso, callback):
+        t = reator.depois(atraso, callback)
+        self.timers.append(t)
+        return t
+
+    def a_cada(self, periodo, callback):
+        t = reator.a_cada(periodo, callback)
+        self.timers.append(t)
+        return t
+
+    def cadencia(self, periodo, logica, render=None):
+        c = Cadencia(periodo, logica, render).iniciar(reator)
+        self.timers.append(c)
+        return c
+
+    def entrar(self):
+        pass
 
-# =================================================
+    def tecla(self, k):
+        pass
 
+    def sair(self):
+        for t in self.timers:
+            t.cancelar()
+        self.timers.clear()
 
+# ---------- JOGO (MEMÓRIA) ----------
+class Memoria(Cena):
+    def entrar(self):
+        # regras (sorteio, erros, crescimento) em regras.Memoria
+        self.jogo = regras.Memoria(MATRIZ_LINHAS, MATRIZ_COLUNAS)
+        self.ativo = False   # ignora teclas até a memória aparecer
 
-def run_memoria():
-    leds_memoria = memoria_inicial(2)
-    # Atualiza display
-    atualizar_oled(len(leds_memoria), MAX_ERROS, 00000)
-    time.sleep(1.0)
+        # Atualiza display
+        atualizar_oled(len(self.jogo), MAX_ERROS, 00000)
+        self.depois(1.0, self.novo_round)
 
-    while True:
-        animacao_round_start(len(leds_memoria))
+    def novo_round(self):
+        animador.tocar(quadros_round_start(len(self.jogo)), ao_fim=self.reiniciar_tentativa)
 
-        resultado = loop_round(leds_memoria)
+    def reiniciar_tentativa(self):
+        self.jogo.nova_tentativa()
+        self.linha, self.coluna = 0, 0
+        self.jogo_iniciado = False
 
-        if resultado is None:
-            return  # volta pro menu
+        # mostra memória
+        limpar_matriz()
+        for l, c in self.jogo.leds:
+            acender_led(l, c, COR_MEMORIA)
+        acender_led(self.linha, self.coluna, COR_JOGADOR)
+        mostrar()
+        self.ativo = True
 
-        if resultado is True:
-            animacao_vitoria_lenta_verde()
-            memoria_adicionar_um(leds_memoria)
+    def tecla(self, k):
+        if k == "P":
+            trocar_cena(Menu())  # volta pro menu
+            return
 
-        else:
-            desenhar_X(COR_X)
-            time.sleep(0.3)
+        if not self.ativo:
+            return
+
+        # setas -> WASD
+        if k == "UP": k = "W"
+        elif k == "DOWN": k = "S"
+        elif k == "LEFT": k = "A"
+        elif k == "RIGHT": k = "D"
+
+        # primeira ação apaga memória
+        if not self.jogo_iniciado and k in ("W", "A", "S", "D", "ENTER"):
             limpar_matriz()
-            leds_memoria = memoria_inicial(2)
+            acender_led(self.linha, self.coluna, COR_JOGADOR)
+            self.jogo_iniciado = True
 
+        # ENTER marca
+        if k == "ENTER":
+            self.marcar()
+        else:
+            self.mover(k)
 
+        # envia o que mudou com esta tecla
+        mostrar()
 
+    def marcar(self):
+        resultado = self.jogo.marcar(self.linha, self.coluna)
+        if resultado in ("acerto", "vitoria"):
+            acender_led(self.linha, self.coluna, COR_SELECIONADO)
+            if resultado == "vitoria":
+                self.vitoria()
+            return
 
-# Direções
-CIMA  = (-1, 0)
-BAIXO = (1, 0)
-ESQ   = (0, -1)
-DIR   = (0, 1)
+        if resultado == "derrota":
+            self.derrota()
+            return
 
-direcao_atual = DIR
-lock = threading.Lock()
-rodando = True
+        # Atualiza display e reseta tentativa (mesma memória) depois de 1 s
+        # apagado; qualquer tecla pula a espera
+        atualizar_oled(len(self.jogo), (MAX_ERROS - self.jogo.erros), 00000)
+        animador.tocar(regras.erro_memoria(COR_X), ao_fim=self.reiniciar_tentativa)
 
-# ---------- UTIL ----------
-def gerar_comida(cobra):
-    livres = [(l, c) for l in range(8) for c in range(8) if (l, c) not in cobra]
-    return random.choice(livres) if livres else None
+    def mover(self, k):
+        nl, nc = self.linha, self.coluna
+        if k == "W": nl -= 1
+        elif k == "S": nl += 1
+        elif k == "A": nc -= 1
+        elif k == "D": nc += 1
+        else:
+            return
 
-def direcao_oposta(d1, d2):
-    return (d1[0] + d2[0] == 0) and (d1[1] + d2[1] == 0)
+        if 0 <= nl < MATRIZ_LINHAS and 0 <= nc < MATRIZ_COLUNAS:
+            if (self.linha, self.coluna) not in self.jogo.acertos:
+                apagar_led(self.linha, self.coluna)
+            else:
+                acender_led(self.linha, self.coluna, COR_SELECIONADO)
 
-# ---------- INPUT THREAD ----------
-def thread_input():
-    global direcao_atual, rodando
+            self.linha, self.coluna = nl, nc
+            acender_led(self.linha, self.coluna, COR_JOGADOR)
 
-    while rodando:
-        k = read_key()
+    def vitoria(self):
+        animador.tocar(VITORIA_VERDE, ao_fim=self.proximo_nivel)
 
-        if not k:
-            continue
+    def proximo_nivel(self):
+        self.jogo.proximo_nivel()
+        self.novo_round()
 
-        if k == "P":
-            rodando = False
-            return
+    def derrota(self):
+        animador.tocar(regras.derrota_memoria(COR_X), ao_fim=self.recomecar)
 
-        if k == "UP": k = "W"
-        elif k == "DOWN": k = "S"
-        elif k == "LEFT": k = "D"
-        elif k == "RIGHT": k = "A"
+    def recomecar(self):
+        self.jogo.recomecar()
+        self.novo_round()
 
-        with lock:
-            if k == "W" and not direcao_oposta(direcao_atual, CIMA):
-                direcao_atual = CIMA
-            elif k == "S" and not direcao_oposta(direcao_atual, BAIXO):
-                direcao_atual = BAIXO
-            elif k == "A" and not direcao_oposta(direcao_atual, ESQ):
-                direcao_atual = ESQ
-            elif k == "D" and not direcao_oposta(direcao_atual, DIR):
-                direcao_atual = DIR
 
-# ---------- JOGO ----------
-def run_cobrinha():
-    global direcao_atual, rodando
+# ---------- JOGO (COBRINHA) ----------
+class Cobrinha(Cena):
+    TICK_RATE = regras.TICK_RATE
+    politica_teclado = ULTIMA_DIRECAO
 
-    cobra = [(4,4), (4,3), (4,2)]
-    direcao_atual = DIR
-    comida = gerar_comida(cobra)
+    def entrar(self):
+        # regras (movimento, comida, colisão) em regras.Cobra
+        self.jogo = regras.Cobra(MATRIZ_LINHAS, MATRIZ_COLUNAS)
 
-    score = 0
-    tick_rate = 0.22
+        limpar_matriz()
+        mostrar()
 
-    limpar_matriz()
+        # lógica em passo fixo; render separado (pula frames se atrasar)
+        self.passo = self.cadencia(self.TICK_RATE, self.tick, self.render)
 
-    rodando = True
+    def sair(self):
+        super().sair()
+        print("[COBRINHA]", self.passo.estado())
 
-    # start input thread
-    t = threading.Thread(target=thread_input, daemon=True)
-    t.start()
+    def tecla(self, k):
+        if k == "P":
+            limpar_matriz()
+            mostrar()
+            trocar_cena(Menu())
+            return
 
-    while rodando:
-        inicio = time.time()
+        if k == "UP": k = "W"
+        elif k == "DOWN": k = "S"
+        elif k == "LEFT": k = "A"
+        elif k == "RIGHT": k = "D"
 
-        # direção atual
-        with lock:
-            direcao = direcao_atual
+        if k in regras.TECLAS:
+            self.jogo.virar(regras.TECLAS.index(k))
 
-        # movimento (com wrap-around)
-        head = cobra[0]
-        nova = ((head[0] + direcao[0]) % 8, (head[1] + direcao[1]) % 8)
+    def tick(self):
+        # só a última direção desde o tick anterior vale
+        for k in teclado.coletar(ULTIMA_DIRECAO):
+            self.tecla(k)
+            if cena is not self:
+                return
 
         # colisão
-        if nova in cobra:
-            animacao_derrota_X()
-            break
+        if not self.jogo.passo():
+            self.passo.cancelar()
+            animador.tocar(DERROTA_X, ao_fim=lambda: trocar_cena(Menu()))
 
-        cobra.insert(0, nova)
+    def render(self):
+        # redesenha a cena inteira; mostrar() só envia o que mudou
+        cobra = self.jogo.corpo
+        comida = self.jogo.comida
 
-        if nova == comida:
-            score += 1
-            comida = gerar_comida(cobra)
-        else:
-            tail = cobra.pop()
-            apagar_led(tail[0], tail[1])
-
-        # ---------- RENDER ----------
-        COR_CABECA = "0002552551"  # ciano (destaca bem)
+        limpar_matriz()
 
         # cabeça
-        acender_led(cobra[0][0], cobra[0][1], COR_CABECA)
+        cabeca = cobra.cabeca()
+        acender_led(cabeca[0], cabeca[1], COR_CABECA)
 
-        # corpo (opcional, só se quiser reforçar)
-        for l, c in cobra[1:]:
+        # corpo
+        corpo = iter(cobra)
+        next(corpo)
+        for l, c in corpo:
             acender_led(l, c, COR_JOGADOR)
 
         if comida:
             acender_led(comida[0], comida[1], COR_MEMORIA)
 
-        # controle de tempo
-        elapsed = time.time() - inicio
-        time.sleep(max(0, tick_rate - elapsed))
-
-    rodando = False
-    limpar_matriz()
+        mostrar()
 
 
 DIGITOS = {
@@ -549,30 +535,36 @@ DIGITOS = {
 }
 
 JOGOS = [
-    {"nome": "Memoria", "runner": run_memoria},
-    {"nome": "Snake",   "runner": run_cobrinha},
+    {"nome": "Memoria", "cena": Memoria},
+    {"nome": "Snake",   "cena": Cobrinha},
 ]
-def desenhar_digito(digito, cor):
-    limpar_matriz()
-
-    grid = DIGITOS[str(digito)]
-
-    altura = len(grid)      # 7
-    largura = len(grid[0])  # 5
-
-    offset_l = (8 - altura) // 2  # ≈ 0 ou 1
-    offset_c = (8 - largura) // 2 # ≈ 1
 
-    for l in range(altura):
-        for c in range(largura):
-            if grid[l][c] == "1":
-                c_corrigido = largura - 1 - c
+# ---------- SPRITES ----------
+# compilados uma vez (ou lidos do cache): mostrar um é lookup + uma escrita
+atlas = None
+
+def compilar_sprites():
+    if PALETA_INDEXADA:
+        atlas = Atlas(GEOMETRIA, "indexado", cache=SPRITES_CACHE, paleta=paleta)
+    else:
+        atlas = Atlas(GEOMETRIA, "binario" if PROTOCOLO == "binario" else "frame", cache=SPRITES_CACHE)
+    for d, grade in DIGITOS.items():
+        atlas.de_grade(d, grade)
+    atlas.registrar("X", PONTOS_X)
+    atlas.registrar("check", PONTOS_CHECK)
+    for n in (1, 2, 3):
+        atlas.registrar(f"round{n}", [(0, c) for c in range(n)])
+
+    atlas.carregar().compilar(
+        [(d, COR_SELECIONADO) for d in DIGITOS]
+        + [("X", COR_X), ("check", COR_JOGADOR)]
+        + [(f"round{n}", COR_JOGADOR) for n in (1, 2, 3)]
+    )
+    atlas.salvar()
+    return atlas
 
-                acender_led(
-                    l + offset_l,
-                    c_corrigido + offset_c,
-                    cor
-                )
+def desenhar_digito(digito, cor):
+    mostrar_sprite(str(digito), cor)
 
 
 def desenhar_menu(selecionado):
@@ -580,49 +572,109 @@ def desenhar_menu(selecionado):
     desenhar_digito(selecionado + 1, cor)
 
 
-def loop_menu():
-    idx = 0
-    desenhar_menu(idx)
-
-    while True:
-        drenar_serial()
-        k = read_key()
-
-        if not k:
-            continue
+class Menu(Cena):
+    def entrar(self):
+        self.idx = 0
+        desenhar_menu(self.idx)
 
+    def tecla(self, k):
         if k in ("LEFT", "A"):
-            idx = (idx - 1) % len(JOGOS)
-            desenhar_menu(idx)
+            self.idx = (self.idx - 1) % len(JOGOS)
+            desenhar_menu(self.idx)
 
         elif k in ("RIGHT", "D"):
-            idx = (idx + 1) % len(JOGOS)
-            desenhar_menu(idx)
+            self.idx = (self.idx + 1) % len(JOGOS)
+            desenhar_menu(self.idx)
 
         elif k == "ENTER":
             limpar_matriz()
-            return JOGOS[idx]["runner"]
+            mostrar()
+            trocar_cena(JOGOS[self.idx]["cena"]())  # executa jogo selecionado
 
         elif k == "P":
-            return None
+            reator.parar()
+
+
+def despachar_teclas():
+    while teclado.fila:
+        if animador.ativo:
+            # animação tocando: P volta pro menu, qualquer outra tecla a pula
+            k = teclado.fila.popleft()
+            if k == "P":
+                trocar_cena(Menu())
+            else:
+                animador.tecla(k)
+        elif cena and cena.politica_teclado == TODAS:
+            cena.tecla(teclado.fila.popleft())
+        else:
+            break
+
+def ao_esc():
+    teclado.expirar()
+    despachar_teclas()
 
+def ao_teclado():
+    if not teclado.ler():  # stdin fechou
+        reator.parar()
+        return
+    if teclado.prazo_esc() is not None:
+        # sequência incompleta: se não completar logo era um ESC sozinho
+        reator.depois(teclado.timeout_esc, ao_esc)
+    despachar_teclas()
 
 
 # ---------- MAIN ----------
+def main():
+    global dispositivos, atlas
 
-print("\n=== SISTEMA DE JOGOS ===")
+    # as portas abrem em segundo plano: o menu já responde e o primeiro
+    # frame fica na fila até o link subir
+    dispositivos = Gerenciador(fluxo_janela=FLUXO_JANELA, captura=CAPTURA).abrir(esperar=False)
+    # listar_portas() sempre devolve uma porta e os ids da sessão são
+    # 0..n-1: o display 0 existe mesmo abrindo (ou se a abertura falhar)
+    link = dispositivos[0].link
+    marcar_fase("dispositivos")
 
-try:
-    while True:
-        runner = loop_menu()
+    # um conjunto de métricas por display, com o label display="<id>"
+    exportador = Exportador(
+        dispositivos.metricas(), METRICAS_ARQUIVO, METRICAS_SOCKET, METRICAS_INTERVALO
+    ).iniciar()
 
-        if runner is None:
-            break
+    atlas = compilar_sprites()
+    marcar_fase("sprites")
+
+    print("\n=== SISTEMA DE JOGOS ===")
+
+    try:
+        # modo cbreak uma vez para a sessão toda (Ctrl+C continua valendo)
+        teclado.abrir()
+        reator.registrar(teclado.fileno(), ao_teclado)
 
-        runner()  # executa jogo selecionado
+        trocar_cena(Menu())
+        marcar_fase("menu")
+        print(f"[PARTIDA] menu pronto em {fases['menu']:.0f} ms")
+        reator.rodar()
 
-except KeyboardInterrupt:
-    pass
-finally:
-    limpar_matriz()
-    ser.close()
\ No newline at end of file
+    except KeyboardInterrupt:
+        pass
+    finally:
+        teclado.fechar()
+        trocar_cena(None)
+        limpar_matriz()
+        mostrar()
+        dispositivos.fechar()
+        exportador.parar()
+        atlas.salvar()
+        print("[PARTIDA]", fases, f"displays prontos em {dispositivos.t_partida * 1000:.0f} ms"
+              if dispositivos.t_partida is not None else "displays ainda abrindo")
+        print("[LINK]", link.estado())
+        for d in dispositivos:
+            print("[DISPLAY]", d.estado())
+            if d.link.gravador:
+                print("[CAPTURA]", d.link.gravador.estado())
+        if OLED_FRAMEBUFFER:
+            print("[OLED]", tela_oled.estado())
+
+
+if __name__ == "__main__":
+    main()
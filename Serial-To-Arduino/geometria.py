@@ -0,0 +1,113 @@
+"""
+Geometria da parede de LEDs: N painéis quadrados encadeados.
+
+Os jogos desenham em coordenadas lógicas (linha 0 em cima, coluna 0 à
+esquerda, do jeito que o jogador vê). A Geometria descreve como isso cai
+no hardware e compila a descrição uma vez numa tabela:
+
+    tabela[l * colunas + c]  -> endereço no device
+    inversa[endereço]        -> índice lógico
+
+endereço = painel * area + linha_dev * tamanho + coluna_dev, onde
+(linha_dev, coluna_dev) é o que o firmware recebe em M{l}{c} / F / pacotes.
+
+Descrição:
+- paineis_l x paineis_c painéis de tamanho x tamanho (ex.: 2x2 = 16x16,
+  1x4 = 8x32), encadeados linha a linha
+- serpentina_paineis: linhas ímpares de painéis encadeadas da direita
+  pra esquerda
+- rotacao (0/90/180/270, horário), espelhar_h, espelhar_v: como cada
+  painel está montado
+- serpentina: linhas ímpares de pixels invertidas dentro do painel (só
+  para strip cru; o MatrizOledSerial.ino já faz isso no mapXY)
+
+Com a tabela pronta, mapear um frame inteiro é uma indexação por pixel,
+sem if no caminho quente.
+"""
+
+
+class Geometria:
+    def __init__(self, paineis_l=1, paineis_c=1, tamanho=8, rotacao=0,
+                 espelhar_h=False, espelhar_v=False, serpentina=False,
+                 serpentina_paineis=False):
+        if rotacao % 90:
+            raise ValueError("rotacao deve ser 0, 90, 180 ou 270")
+
+        self.paineis_l = paineis_l
+        self.paineis_c = paineis_c
+        self.tamanho = tamanho
+        self.rotacao = rotacao % 360
+        self.espelhar_h = espelhar_h
+        self.espelhar_v = espelhar_v
+        self.serpentina = serpentina
+        self.serpentina_paineis = serpentina_paineis
+
+        self.linhas = paineis_l * tamanho
+        self.colunas = paineis_c * tamanho
+        self.n_paineis = paineis_l * paineis_c
+        self.area = tamanho * tamanho
+
+        self.tabela = self._compilar()
+        self.inversa = [0] * len(self.tabela)
+        for i, end in enumerate(self.tabela):
+            self.inversa[end] = i
+
+    def _endereco(self, L, C):
+        t = self.tamanho
+        pl, pc = divmod(L, t)[0], divmod(C, t)[0]
+        l, c = L % t, C % t
+
+        # ordem do painel na corrente
+        if self.serpentina_paineis and pl % 2:
+            pc = self.paineis_c - 1 - pc
+        painel = pl * self.paineis_c + pc
+
+        # montagem do painel
+        if self.espelhar_h:
+            c = t - 1 - c
+        if self.espelhar_v:
+            l = t - 1 - l
+        for _ in range(self.rotacao // 90):
+            l, c = c, t - 1 - l
+
+        # fiação dentro do painel
+        if self.serpentina and l % 2:
+            c = t - 1 - c
+
+        return painel * self.area + l * t + c
+
+    def _compilar(self):
+        return [self._endereco(L, C) for L in range(self.linhas) for C in range(self.colunas)]
+
+    # ---------- APLICAÇÃO ----------
+    def ponto(self, l, c):
+        """
+        (l, c) lógico -> (painel, linha_dev, coluna_dev).
+        """
+        painel, resto = divmod(self.tabela[l * self.colunas + c], self.area)
+        return (painel,) + divmod(resto, self.tamanho)
+
+    def mapear(self, mudancas):
+        """
+        [(l, c, cor)] lógicos -> [(painel, linha_dev, coluna_dev, cor)].
+        """
+        tabela, colunas, area, t = self.tabela, self.colunas, self.area, self.tamanho
+        saida = []
+        for l, c, cor in mudancas:
+            painel, resto = divmod(tabela[l * colunas + c], area)
+            saida.append((painel, resto // t, resto % t, cor))
+        return saida
+
+    def paineis(self, pixels):
+        """
+        Frame lógico inteiro -> lista de frames por painel, cada um com
+        `area` pixels na ordem do device (pronto para o comando F).
+        """
+        dev = [pixels[i] for i in self.inversa]
+        a = self.area
+        return [dev[k * a:(k + 1) * a] for k in range(self.n_paineis)]
+
+    def __repr__(self):
+        return (f"Geometria({self.paineis_l}x{self.paineis_c} de {self.tamanho}x{self.tamanho}, "
+                f"rot={self.rotacao}, h={self.espelhar_h}, v={self.espelhar_v}, "
+                f"serp={self.serpentina}, serp_paineis={self.serpentina_paineis})")
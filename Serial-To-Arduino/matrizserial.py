@@ -1,9 +1,13 @@
 import serial
 import serial.tools.list_ports
 import time
+import os
 import sys
 
 def detectar_arduino():
+    # PORTA_SERIAL força a porta (ex.: pty do emulador.py)
+    if os.environ.get("PORTA_SERIAL"):
+        return os.environ["PORTA_SERIAL"]
     for p in serial.tools.list_ports.comports():
         dev = p.device.lower()
         desc = (p.description or "").lower()
@@ -0,0 +1,338 @@
+"""
+Métricas de saúde do link serial.
+
+MetricasLink junta contadores, histogramas e gauges do transporte:
+- latência de cada escrita (histograma em ms)
+- bytes enviados / recebidos
+- SerialTimeoutException, retries por número da tentativa, falhas
+- reconexões (quantidade e duração) e tempo até a tela voltar
+  (ressincronização)
+- gauges lidos na hora (pacing atual, profundidade da fila, janela de ACK)
+
+snapshot() devolve um dict (API em processo); texto() devolve o formato de
+texto do Prometheus. As funções snapshot()/texto() do módulo fazem o mesmo
+para vários displays, com o label display="<id>". O Exportador grava isso periodicamente num arquivo
+(.json ou .prom, escrita atômica) e/ou responde num socket Unix, para um
+coletor externo raspar.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from collections import Counter
+
+PREFIXO = "tvbox_link"
+
+# limites dos buckets em ms (o último é +Inf)
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+
+class Histograma:
+    def __init__(self, limites=BUCKETS_MS):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.n = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, valor_ms):
+        i = 0
+        while i < len(self.limites) and valor_ms > self.limites[i]:
+            i += 1
+        self.contagens[i] += 1
+        self.n += 1
+        self.soma += valor_ms
+        if valor_ms > self.maximo:
+            self.maximo = valor_ms
+
+    def percentil(self, p):
+        """
+        Aproximação pelo limite superior do bucket.
+        """
+        if not self.n:
+            return None
+        alvo = p / 100.0 * self.n
+        acc = 0
+        for i, cnt in enumerate(self.contagens):
+            acc += cnt
+            if acc >= alvo:
+                return self.limites[i] if i < len(self.limites) else self.maximo
+        return self.maximo
+
+    def snapshot(self):
+        return {
+            "n": self.n,
+            "soma": round(self.soma, 3),
+            "media": round(self.soma / self.n, 3) if self.n else None,
+            "max": round(self.maximo, 3),
+            "p50": self.percentil(50),
+            "p95": self.percentil(95),
+            "p99": self.percentil(99),
+            "buckets": dict(zip([str(l) for l in self.limites] + ["+Inf"], self.contagens)),
+        }
+
+
+class MetricasLink:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inicio = time.time()
+
+        self.escrita_ms = Histograma()
+        self.reconexao_ms = Histograma((50, 100, 250, 500, 1000, 2500, 5000, 10000))
+        # da perda do link até o device confirmar a tela reenviada
+        self.recuperacao_ms = Histograma((50, 100, 250, 500, 1000, 2500, 5000, 10000))
+
+        self.bytes_tx = 0
+        self.bytes_rx = 0
+        self.escritas = 0
+        self.timeouts = 0
+        self.erros_escrita = 0
+        self.falhas = 0
+        self.retries = Counter()     # tentativa (2, 3, ...) -> quantas vezes foi preciso
+        self.reconexoes = 0
+        self.reconexoes_falhas = 0
+        self.ultima_reconexao = None
+        self.ressincronizacoes = 0
+
+        self._gauges = {}
+
+    # ---------- EVENTOS ----------
+    def escrita(self, segundos, n_bytes, tentativa=1):
+        with self.lock:
+            self.escrita_ms.observar(segundos * 1000.0)
+            self.escritas += 1
+            self.bytes_tx += n_bytes
+            if tentativa > 1:
+                self.retries[tentativa] += 1
+
+    def timeout(self):
+        with self.lock:
+            self.timeouts += 1
+
+    def erro_escrita(self):
+        with self.lock:
+            self.erros_escrita += 1
+
+    def falha(self):
+        # comando desistido depois de todos os retries
+        with self.lock:
+            self.falhas += 1
+
+    def recebido(self, n_bytes):
+        with self.lock:
+            self.bytes_rx += n_bytes
+
+    def reconexao(self, segundos, ok):
+        with self.lock:
+            self.reconexao_ms.observar(segundos * 1000.0)
+            if ok:
+                self.reconexoes += 1
+            else:
+                self.reconexoes_falhas += 1
+            self.ultima_reconexao = time.time()
+
+    def ressincronizacao(self):
+        with self.lock:
+            self.ressincronizacoes += 1
+
+    def recuperacao(self, segundos):
+        with self.lock:
+            self.recuperacao_ms.observar(segundos * 1000.0)
+
+    def gauge(self, nome, fonte):
+        """
+        Registra um valor lido na hora do snapshot (fonte é um callable).
+        """
+        self._gauges[nome] = fonte
+
+    # ---------- LEITURA ----------
+    def snapshot(self):
+        with self.lock:
+            snap = {
+                "uptime_s": round(time.time() - self.inicio, 1),
+                "bytes_tx": self.bytes_tx,
+                "bytes_rx": self.bytes_rx,
+                "escritas": self.escritas,
+                "timeouts": self.timeouts,
+                "erros_escrita": self.erros_escrita,
+                "falhas": self.falhas,
+                "retries": {str(k): v for k, v in sorted(self.retries.items())},
+                "reconexoes": self.reconexoes,
+                "reconexoes_falhas": self.reconexoes_falhas,
+                "ultima_reconexao": self.ultima_reconexao,
+                "ressincronizacoes": self.ressincronizacoes,
+                "escrita_ms": self.escrita_ms.snapshot(),
+                "reconexao_ms": self.reconexao_ms.snapshot(),
+                "recuperacao_ms": self.recuperacao_ms.snapshot(),
+            }
+        for nome, fonte in self._gauges.items():
+            try:
+                snap[nome] = fonte()
+            except Exception:
+                snap[nome] = None
+        return snap
+
+    def texto(self):
+        """
+        Formato de texto do Prometheus (node_exporter textfile / scrape).
+        """
+        return texto(self)
+
+    def familias(self, familias, labels=None):
+        """
+        Junta as amostras deste link em `familias` ({nome: (tipo, [linhas])}),
+        cada uma com os `labels` dados (ex.: {"display": 0}).
+        """
+        s = self.snapshot()
+        labels = labels or {}
+
+        def tipo(nome, t):
+            familias.setdefault(nome, (t, []))
+
+        def linha(familia, nome, valor, **extra):
+            if isinstance(valor, bool):
+                valor = int(valor)
+            if isinstance(valor, (int, float)):
+                pares = {**labels, **extra}
+                lbl = "{" + ",".join(f'{k}="{v}"' for k, v in pares.items()) + "}" if pares else ""
+                familias[familia][1].append(f"{PREFIXO}_{nome}{lbl} {valor}")
+
+        for nome in ("bytes_tx", "bytes_rx", "escritas", "timeouts", "erros_escrita",
+                     "falhas", "reconexoes", "reconexoes_falhas", "ressincronizacoes"):
+            tipo(nome + "_total", "counter")
+            linha(nome + "_total", nome + "_total", s[nome])
+        tipo("retries_total", "counter")
+        for tentativa, n in s["retries"].items():
+            linha("retries_total", "retries_total", n, tentativa=tentativa)
+
+        for hist in ("escrita_ms", "reconexao_ms", "recuperacao_ms"):
+            tipo(hist, "histogram")
+            acc = 0
+            for le, n in s[hist]["buckets"].items():
+                acc += n
+                linha(hist, hist + "_bucket", acc, le=le)
+            linha(hist, hist + "_sum", s[hist]["soma"])
+            linha(hist, hist + "_count", s[hist]["n"])
+
+        # gauge sem valor (ex.: janela sem fluxo) fica de fora, com o TYPE
+        for nome in self._gauges:
+            if isinstance(s.get(nome), (int, float)):
+                tipo(nome, "gauge")
+                linha(nome, nome, s[nome])
+        tipo("uptime_s", "gauge")
+        linha("uptime_s", "uptime_s", s["uptime_s"])
+        return familias
+
+
+def _por_display(metricas):
+    # um link só (sem label) ou {id do display: MetricasLink}
+    if isinstance(metricas, MetricasLink):
+        return [({}, metricas)]
+    return [({"display": id}, m) for id, m in sorted(metricas.items())]
+
+
+def snapshot(metricas):
+    """
+    snapshot() de um link, ou {id do display: snapshot} de vários.
+    """
+    if isinstance(metricas, MetricasLink):
+        return metricas.snapshot()
+    return {str(id): m.snapshot() for id, m in sorted(metricas.items())}
+
+
+def texto(metricas):
+    """
+    Texto do Prometheus de um link ou de vários ({id: MetricasLink}, cada
+    amostra com display="<id>"). As amostras de uma métrica ficam juntas
+    debaixo de um TYPE só, como o formato pede.
+    """
+    familias = {}
+    for labels, m in _por_display(metricas):
+        m.familias(familias, labels)
+    out = []
+    for nome, (t, linhas) in familias.items():
+        out.append(f"# TYPE {PREFIXO}_{nome} {t}")
+        out += linhas
+    return "\n".join(out) + "\n"
+
+
+class Exportador:
+    """
+    Thread que grava o snapshot a cada `intervalo` segundos em `arquivo`
+    (.json = JSON, outro = texto Prometheus) e/ou serve em `socket_unix`
+    (cada conexão recebe o snapshot em JSON e é fechada). `metricas` é um
+    MetricasLink ou {id do display: MetricasLink}.
+    """
+    def __init__(self, metricas, arquivo=None, socket_unix=None, intervalo=5.0):
+        self.metricas = metricas
+        self.arquivo = arquivo
+        self.socket_unix = socket_unix
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._threads = []
+
+    def iniciar(self):
+        if self.arquivo:
+            self._threads.append(threading.Thread(target=self._loop_arquivo, daemon=True))
+        if self.socket_unix:
+            self._threads.append(threading.Thread(target=self._loop_socket, daemon=True))
+        for t in self._threads:
+            t.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self.arquivo:
+            # chamado do finally do jogo: disco cheio / pasta sumida não
+            # pode impedir o resto do encerramento
+            try:
+                self.gravar()
+            except OSError:
+                pass
+
+    def gravar(self):
+        if self.arquivo.endswith(".json"):
+            conteudo = json.dumps(snapshot(self.metricas), indent=1)
+        else:
+            conteudo = texto(self.metricas)
+        tmp = self.arquivo + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(conteudo)
+        os.replace(tmp, self.arquivo)
+
+    def _loop_arquivo(self):
+        while not self._parar.is_set():
+            try:
+                self.gravar()
+            except OSError:
+                pass
+            self._parar.wait(self.intervalo)
+
+    def _loop_socket(self):
+        try:
+            os.unlink(self.socket_unix)
+        except FileNotFoundError:
+            pass
+        srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        srv.bind(self.socket_unix)
+        srv.listen(4)
+        srv.settimeout(0.5)
+        try:
+            while not self._parar.is_set():
+                try:
+                    conn, _ = srv.accept()
+                except socket.timeout:
+                    continue
+                with conn:
+                    try:
+                        conn.sendall(json.dumps(snapshot(self.metricas)).encode() + b"\n")
+                    except OSError:
+                        pass
+        finally:
+            srv.close()
+            try:
+                os.unlink(self.socket_unix)
+            except OSError:
+                pass
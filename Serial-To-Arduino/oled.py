@@ -0,0 +1,287 @@
+"""
+Framebuffer do OLED (SSD1306 128x64, 1 bit por pixel) desenhado no host.
+
+Mesmo layout do buffer do Adafruit_SSD1306: 8 páginas de 8 linhas; o byte
+página * 128 + coluna guarda as linhas 8*página .. 8*página+7 daquela
+coluna (bit 0 em cima). O firmware copia cada região recebida direto no
+buffer do display e manda só aquelas colunas pelo I2C, sem redesenhar a
+tela inteira.
+
+A TelaOled guarda, por página, a faixa de colunas mexida desde o último
+commit(). No commit a faixa é comparada com o que o device já tem e só os
+trechos que mudaram de fato viram pacotes:
+
+    OP_OLED_RAW payload = [página u8][coluna u8][n bytes]   (1 <= n <= 128)
+
+Mudar um dígito do HUD custa ~6 bytes de dados em vez do redesenho
+inteiro (1024 bytes no I2C) do comando O.
+"""
+
+import binario
+
+LARGURA = 128
+ALTURA = 64
+PAGINAS = ALTURA // 8
+BYTES_TELA = LARGURA * PAGINAS
+
+# trechos iguais mais curtos que isso vão junto na mesma região
+# (um pacote novo custa delimitadores + opcode + página/coluna + CRC)
+GAP_MAX = 6
+
+# fonte 5x7 (a mesma do Adafruit GFX): 5 colunas, bit 0 em cima
+FONTE = {
+    " ": (0x00, 0x00, 0x00, 0x00, 0x00),
+    "!": (0x00, 0x00, 0x5F, 0x00, 0x00),
+    "-": (0x08, 0x08, 0x08, 0x08, 0x08),
+    ".": (0x00, 0x60, 0x60, 0x00, 0x00),
+    "/": (0x20, 0x10, 0x08, 0x04, 0x02),
+    ":": (0x00, 0x36, 0x36, 0x00, 0x00),
+    "x": (0x44, 0x28, 0x10, 0x28, 0x44),
+    "0": (0x3E, 0x51, 0x49, 0x45, 0x3E),
+    "1": (0x00, 0x42, 0x7F, 0x40, 0x00),
+    "2": (0x42, 0x61, 0x51, 0x49, 0x46),
+    "3": (0x21, 0x41, 0x45, 0x4B, 0x31),
+    "4": (0x18, 0x14, 0x12, 0x7F, 0x10),
+    "5": (0x27, 0x45, 0x45, 0x45, 0x39),
+    "6": (0x3C, 0x4A, 0x49, 0x49, 0x30),
+    "7": (0x01, 0x71, 0x09, 0x05, 0x03),
+    "8": (0x36, 0x49, 0x49, 0x49, 0x36),
+    "9": (0x06, 0x49, 0x49, 0x29, 0x1E),
+    "A": (0x7E, 0x11, 0x11, 0x11, 0x7E),
+    "B": (0x7F, 0x49, 0x49, 0x49, 0x36),
+    "C": (0x3E, 0x41, 0x41, 0x41, 0x22),
+    "D": (0x7F, 0x41, 0x41, 0x22, 0x1C),
+    "E": (0x7F, 0x49, 0x49, 0x49, 0x41),
+    "F": (0x7F, 0x09, 0x09, 0x09, 0x01),
+    "G": (0x3E, 0x41, 0x49, 0x49, 0x7A),
+    "H": (0x7F, 0x08, 0x08, 0x08, 0x7F),
+    "I": (0x00, 0x41, 0x7F, 0x41, 0x00),
+    "J": (0x20, 0x40, 0x41, 0x3F, 0x01),
+    "K": (0x7F, 0x08, 0x14, 0x22, 0x41),
+    "L": (0x7F, 0x40, 0x40, 0x40, 0x40),
+    "M": (0x7F, 0x02, 0x0C, 0x02, 0x7F),
+    "N": (0x7F, 0x04, 0x08, 0x10, 0x7F),
+    "O": (0x3E, 0x41, 0x41, 0x41, 0x3E),
+    "P": (0x7F, 0x09, 0x09, 0x09, 0x06),
+    "Q": (0x3E, 0x41, 0x51, 0x21, 0x5E),
+    "R": (0x7F, 0x09, 0x19, 0x29, 0x46),
+    "S": (0x46, 0x49, 0x49, 0x49, 0x31),
+    "T": (0x01, 0x01, 0x7F, 0x01, 0x01),
+    "U": (0x3F, 0x40, 0x40, 0x40, 0x3F),
+    "V": (0x1F, 0x20, 0x40, 0x20, 0x1F),
+    "W": (0x3F, 0x40, 0x38, 0x40, 0x3F),
+    "X": (0x63, 0x14, 0x08, 0x14, 0x63),
+    "Y": (0x07, 0x08, 0x70, 0x08, 0x07),
+    "Z": (0x61, 0x51, 0x49, 0x45, 0x43),
+}
+AVANCO = 6     # 5 colunas + 1 de espaço
+
+
+def aplicar_regiao(buf, payload):
+    """
+    Decodificador de referência: aplica o payload do OP_OLED_RAW sobre um
+    framebuffer de 1024 bytes (in place). ValueError se o payload é inválido.
+    """
+    if len(payload) < 3:
+        raise ValueError("PKT_INVALID")
+    pagina, coluna = payload[0], payload[1]
+    dados = payload[2:]
+    if pagina >= PAGINAS or coluna + len(dados) > LARGURA:
+        raise ValueError("PKT_INVALID")
+    i = pagina * LARGURA + coluna
+    buf[i:i + len(dados)] = dados
+    return buf
+
+
+def para_texto(buf):
+    """
+    Framebuffer -> texto com meio-blocos (2 linhas de pixel por linha).
+    """
+    linhas = []
+    for y in range(0, ALTURA, 2):
+        p, bit = y // 8, y % 8
+        linha = []
+        for x in range(LARGURA):
+            b = buf[p * LARGURA + x]
+            cima, baixo = (b >> bit) & 1, (b >> (bit + 1)) & 1
+            linha.append(" ▀▄█"[cima | (baixo << 1)])
+        linhas.append("".join(linha).rstrip())
+    return "\n".join(linhas)
+
+
+class TelaOled:
+    def __init__(self):
+        self.buf = bytearray(BYTES_TELA)
+        self.enviado = bytearray(BYTES_TELA)   # o que o device tem
+        self._sujo = [None] * PAGINAS          # página -> [c0, c1) mexido
+
+        self.commits = 0
+        self.regioes = 0
+        self.bytes_dados = 0
+
+        # a porta abre sem resetar o Arduino: o OLED pode estar com a tela
+        # da sessão anterior
+        self.invalidar()
+
+    def invalidar(self):
+        """
+        Esquece o que o device tem: o próximo commit manda as páginas
+        inteiras (sem isso sobram pixels que o host acha que estão
+        apagados).
+        """
+        self.enviado[:] = bytes(b ^ 0xFF for b in self.buf)
+        for p in range(PAGINAS):
+            self._marcar(p, 0, LARGURA)
+
+    # ---------- SUJEIRA ----------
+    def _marcar(self, pagina, c0, c1):
+        faixa = self._sujo[pagina]
+        if faixa is None:
+            self._sujo[pagina] = [c0, c1]
+        else:
+            faixa[0] = min(faixa[0], c0)
+            faixa[1] = max(faixa[1], c1)
+
+    # ---------- PRIMITIVAS ----------
+    def limpar(self):
+        self.buf[:] = bytes(BYTES_TELA)
+        for p in range(PAGINAS):
+            self._marcar(p, 0, LARGURA)
+
+    def pixel(self, x, y, aceso=True):
+        if not (0 <= x < LARGURA and 0 <= y < ALTURA):
+            return
+        p = y >> 3
+        i = p * LARGURA + x
+        if aceso:
+            self.buf[i] |= 1 << (y & 7)
+        else:
+            self.buf[i] &= ~(1 << (y & 7)) & 0xFF
+        self._marcar(p, x, x + 1)
+
+    def retangulo(self, x, y, w, h, cheio=True, aceso=True):
+        if not cheio:
+            self.retangulo(x, y, w, 1, True, aceso)
+            self.retangulo(x, y + h - 1, w, 1, True, aceso)
+            self.retangulo(x, y, 1, h, True, aceso)
+            self.retangulo(x + w - 1, y, 1, h, True, aceso)
+            return
+        x0, x1 = max(0, x), min(LARGURA, x + w)
+        y0, y1 = max(0, y), min(ALTURA, y + h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        # uma máscara por página: preenche 8 linhas por byte
+        for p in range(y0 >> 3, ((y1 - 1) >> 3) + 1):
+            topo = max(y0, p * 8) - p * 8
+            base = min(y1, p * 8 + 8) - p * 8
+            mascara = ((1 << (base - topo)) - 1) << topo
+            i = p * LARGURA
+            for c in range(x0, x1):
+                if aceso:
+                    self.buf[i + c] |= mascara
+                else:
+                    self.buf[i + c] &= ~mascara & 0xFF
+            self._marcar(p, x0, x1)
+
+    def linha_h(self, x, y, w, aceso=True):
+        self.retangulo(x, y, w, 1, True, aceso)
+
+    def linha_v(self, x, y, h, aceso=True):
+        self.retangulo(x, y, 1, h, True, aceso)
+
+    def linha(self, x0, y0, x1, y1, aceso=True):
+        # Bresenham
+        dx, dy = abs(x1 - x0), -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        erro = dx + dy
+        while True:
+            self.pixel(x0, y0, aceso)
+            if x0 == x1 and y0 == y1:
+                return
+            e2 = 2 * erro
+            if e2 >= dy:
+                erro += dy
+                x0 += sx
+            if e2 <= dx:
+                erro += dx
+                y0 += sy
+
+    def caractere(self, x, y, ch, escala=1):
+        glifo = FONTE.get(ch, FONTE.get(ch.upper(), FONTE[" "]))
+        for dx, coluna in enumerate(glifo):
+            for dy in range(7):
+                if coluna >> dy & 1:
+                    if escala == 1:
+                        self.pixel(x + dx, y + dy)
+                    else:
+                        self.retangulo(x + dx * escala, y + dy * escala, escala, escala)
+        return x + AVANCO * escala
+
+    def texto(self, x, y, s, escala=1, fundo=False):
+        """
+        Escreve s a partir de (x, y); fundo=True apaga a caixa antes (para
+        sobrescrever um texto anterior). Devolve o x final.
+        """
+        if fundo:
+            self.retangulo(x, y, len(s) * AVANCO * escala, 8 * escala, True, False)
+        for ch in s:
+            x = self.caractere(x, y, ch, escala)
+        return x
+
+    # ---------- ENVIO ----------
+    def commit(self):
+        """
+        Regiões que mudaram desde o último commit: [(página, coluna, bytes)].
+        """
+        regioes = []
+        for p, faixa in enumerate(self._sujo):
+            if faixa is None:
+                continue
+            self._sujo[p] = None
+            base = p * LARGURA
+            c, fim = faixa
+            while c < fim:
+                if self.buf[base + c] == self.enviado[base + c]:
+                    c += 1
+                    continue
+                inicio = c
+                ultimo = c        # última coluna diferente do trecho
+                c += 1
+                while c < fim and c - ultimo <= GAP_MAX:
+                    if self.buf[base + c] != self.enviado[base + c]:
+                        ultimo = c
+                    c += 1
+                dados = bytes(self.buf[base + inicio:base + ultimo + 1])
+                self.enviado[base + inicio:base + ultimo + 1] = dados
+                regioes.append((p, inicio, dados))
+                c = ultimo + 1
+        self.commits += 1
+        self.regioes += len(regioes)
+        self.bytes_dados += sum(len(d) for _, _, d in regioes)
+        return regioes
+
+    def pacotes(self):
+        return [binario.oled_raw(p, c, dados) for p, c, dados in self.commit()]
+
+    def pacotes_completos(self):
+        """
+        O que o device tem, para ressincronizar um display que acabou de
+        ligar (tela apagada): só os trechos acesos de cada página.
+        """
+        pacotes = []
+        for p in range(PAGINAS):
+            linha = self.enviado[p * LARGURA:(p + 1) * LARGURA]
+            acesos = [c for c in range(LARGURA) if linha[c]]
+            if acesos:
+                c0, c1 = acesos[0], acesos[-1] + 1
+                pacotes.append(binario.oled_raw(p, c0, linha[c0:c1]))
+        return pacotes
+
+    def estado(self):
+        return {
+            "commits": self.commits,
+            "regioes": self.regioes,
+            "bytes_dados": self.bytes_dados,
+            "bytes_por_commit": round(self.bytes_dados / self.commits, 1) if self.commits else None,
+        }
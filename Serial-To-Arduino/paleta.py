@@ -0,0 +1,54 @@
+"""
+Paleta de cores indexadas (até 16) para o modo OP_PALETA / OP_FRAME_IDX.
+
+O índice 0 é sempre o apagado (None). Os jogos continuam desenhando com
+as strings RRRGGGBBBI; a Paleta só traduz o frame para índices na hora de
+enviar e diz quando ele não cabe (alguma cor fora da paleta).
+"""
+
+import binario
+
+
+class Paleta:
+    def __init__(self, cores=()):
+        self.cores = [None]
+        self._indice = {None: 0}
+        for cor in cores:
+            self.adicionar(cor)
+
+    def adicionar(self, cor):
+        if cor in self._indice:
+            return self._indice[cor]
+        if len(self.cores) >= binario.MAX_CORES_PALETA:
+            raise ValueError("paleta cheia")
+        self._indice[cor] = len(self.cores)
+        self.cores.append(cor)
+        return self._indice[cor]
+
+    def indice(self, cor):
+        return self._indice.get(cor)
+
+    def indices(self, pixels):
+        """
+        Frame (cores) -> índices, ou None se alguma cor não está na paleta.
+        """
+        idx = self._indice
+        try:
+            return [idx[p] for p in pixels]
+        except KeyError:
+            return None
+
+    def pacote(self):
+        return binario.paleta(self.cores)
+
+    def frame(self, pixels):
+        """
+        Pacote OP_FRAME_IDX do frame, ou None se não couber na paleta.
+        """
+        indices = self.indices(pixels)
+        if indices is None:
+            return None
+        return binario.frame_indexado(indices)
+
+    def __len__(self):
+        return len(self.cores)
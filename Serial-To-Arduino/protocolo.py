@@ -0,0 +1,90 @@
+"""
+Codificação dos comandos da matriz (MatrizOledSerial.ino) no lado do host.
+
+Frame completo (comando F):
+    'F' + 64 pixels RGB565 big-endian (2 bytes cada) = 129 bytes
+    pixels em ordem lógica linha a linha (l * 8 + c); o Arduino aplica mapXY
+    a intensidade (dígito I da cor) já vem aplicada no RGB
+    resposta: FRAME_OK
+
+A 115200 baud (10 bits/byte) o frame leva ~11 ms no fio, contra até
+64 comandos M{l}{c}RRRGGGBBBI com um strip.show() cada.
+"""
+
+MATRIZ_LINHAS = 8
+MATRIZ_COLUNAS = 8
+NUM_PIXELS = MATRIZ_LINHAS * MATRIZ_COLUNAS
+
+CMD_FRAME = b"F"
+TAMANHO_FRAME = len(CMD_FRAME) + 2 * NUM_PIXELS
+
+
+# ---------- CORES ----------
+def aplicar_intensidade(v, i):
+    # mesma conta do firmware (aplicarIntensidade)
+    return (v * i) // 9
+
+def cor_para_rgb(cor):
+    """
+    "RRRGGGBBB[I]" -> (r, g, b) com a intensidade aplicada.
+    None -> apagado.
+    """
+    if cor is None:
+        return (0, 0, 0)
+    r = min(255, int(cor[0:3]))
+    g = min(255, int(cor[3:6]))
+    b = min(255, int(cor[6:9]))
+    i = 9
+    if len(cor) >= 10:
+        i = max(1, min(9, int(cor[9])))
+    return (aplicar_intensidade(r, i), aplicar_intensidade(g, i), aplicar_intensidade(b, i))
+
+def rgb565(r, g, b):
+    return ((r >> 3) << 11) | ((g >> 2) << 5) | (b >> 3)
+
+def rgb565_para_rgb(v):
+    # expansão igual à do firmware (replica os bits altos nos baixos)
+    r5 = (v >> 11) & 0x1F
+    g6 = (v >> 5) & 0x3F
+    b5 = v & 0x1F
+    return ((r5 << 3) | (r5 >> 2), (g6 << 2) | (g6 >> 4), (b5 << 3) | (b5 >> 2))
+
+
+# ---------- FRAME ----------
+def codificar_frame(pixels):
+    """
+    pixels: 64 cores (RRRGGGBBBI / None) em ordem lógica -> bytes do comando F.
+    """
+    if len(pixels) != NUM_PIXELS:
+        raise ValueError(f"frame precisa de {NUM_PIXELS} pixels, veio {len(pixels)}")
+
+    out = bytearray(CMD_FRAME)
+    for cor in pixels:
+        v = rgb565(*cor_para_rgb(cor))
+        out.append(v >> 8)
+        out.append(v & 0xFF)
+    return bytes(out)
+
+def decodificar_frame(data):
+    """
+    Decodificador de referência (faz o mesmo que o firmware):
+    bytes do comando F -> lista de 64 (r, g, b) em ordem lógica.
+    """
+    if len(data) != TAMANHO_FRAME or data[:1] != CMD_FRAME:
+        raise ValueError("frame inválido")
+
+    return [
+        rgb565_para_rgb((data[1 + 2 * i] << 8) | data[2 + 2 * i])
+        for i in range(NUM_PIXELS)
+    ]
+
+
+# ---------- COMANDOS ASCII ----------
+def cmd_pixel(l, c, cor):
+    if cor is None:
+        return f"M{l}{c}"
+    return f"M{l}{c}{cor}"
+
+def tamanho_cmd(cmd):
+    # bytes no fio, com o '\n'
+    return len(cmd) + 1
@@ -0,0 +1,121 @@
+"""
+Reator single-thread: um selectors (epoll no Linux) olhando vários fds
+ao mesmo tempo + timers com prazo absoluto.
+
+Os jogos não têm mais loops bloqueantes: registram um callback para
+quando o fd tiver dados (teclado, serial, ...) e callbacks de tick /
+atraso. Nada de thread extra nem lock para dividir estado.
+"""
+
+import heapq
+import itertools
+import selectors
+import time
+
+
+class Timer:
+    __slots__ = ("quando", "periodo", "callback", "ativo")
+
+    def __init__(self, quando, periodo, callback):
+        self.quando = quando
+        self.periodo = periodo
+        self.callback = callback
+        self.ativo = True
+
+    def cancelar(self):
+        self.ativo = False
+
+
+class Reator:
+    def __init__(self):
+        self.sel = selectors.DefaultSelector()
+        self._timers = []            # heap (quando, seq, Timer)
+        self._seq = itertools.count()
+        self.rodando = False
+
+    @staticmethod
+    def agora():
+        return time.monotonic()
+
+    # ---------- FDs ----------
+    def registrar(self, fd, callback):
+        """
+        callback() é chamado sempre que o fd tiver dados para ler.
+        """
+        self.sel.register(fd, selectors.EVENT_READ, callback)
+
+    def remover(self, fd):
+        try:
+            self.sel.unregister(fd)
+        except (KeyError, ValueError):
+            pass
+
+    # ---------- TIMERS ----------
+    def _agendar(self, timer):
+        heapq.heappush(self._timers, (timer.quando, next(self._seq), timer))
+        return timer
+
+    def em(self, quando, callback):
+        """
+        Chama callback() uma vez no instante absoluto `quando` (monotonic).
+        """
+        return self._agendar(Timer(quando, None, callback))
+
+    def depois(self, atraso, callback):
+        """
+        Chama callback() uma vez daqui a `atraso` segundos.
+        """
+        return self._agendar(Timer(self.agora() + atraso, None, callback))
+
+    def a_cada(self, periodo, callback, atraso=None):
+        """
+        Chama callback() a cada `periodo` segundos. Os prazos são absolutos
+        (inicio + n * periodo), então o tempo gasto no callback não acumula.
+        """
+        primeiro = self.agora() + (periodo if atraso is None else atraso)
+        return self._agendar(Timer(primeiro, periodo, callback))
+
+    # ---------- LOOP ----------
+    def parar(self):
+        self.rodando = False
+
+    def _proximo_prazo(self):
+        while self._timers and not self._timers[0][2].ativo:
+            heapq.heappop(self._timers)
+        return self._timers[0][0] if self._timers else None
+
+    def _disparar_timers(self):
+        agora = self.agora()
+        while self._timers and self._timers[0][0] <= agora:
+            _, _, t = heapq.heappop(self._timers)
+            if not t.ativo:
+                continue
+            if t.periodo is not None:
+                t.quando += t.periodo
+                if t.quando <= agora:
+                    # ficou pra trás: pula os ticks perdidos em vez de disparar em rajada
+                    t.quando = agora + t.periodo
+                self._agendar(t)
+            else:
+                t.ativo = False
+            t.callback()
+            if not self.rodando:
+                return
+
+    def rodar_uma_vez(self, timeout_max=None):
+        prazo = self._proximo_prazo()
+        timeout = timeout_max
+        if prazo is not None:
+            espera = max(0.0, prazo - self.agora())
+            timeout = espera if timeout is None else min(timeout, espera)
+
+        for key, _ in self.sel.select(timeout):
+            key.data()
+            if not self.rodando:
+                return
+        self._disparar_timers()
+
+    def rodar(self):
+        self.rodando = True
+        while self.rodando:
+            self.rodar_uma_vez()
@@ -0,0 +1,135 @@
+"""
+Regras e tempos dos jogos (cobrinha e memória), sem nada de tela ou link.
+
+O game.py desenha e toca as animações em cima destas regras; a
+simulacao.py roda as mesmas regras (SimCobrinha / SimMemoria) e conta os
+mesmos tempos no relógio virtual. A versão em lote (NumPy) da simulação
+usa as constantes daqui e é conferida contra a escalar em test_simulacao.
+
+Direções são índices em DIRECOES, na ordem das teclas W S A D: a oposta
+de d é d ^ 1.
+"""
+
+import random
+
+from tabuleiro import Tabuleiro, Corpo
+
+# ---------- CONSTANTES ----------
+DIRECOES = ((-1, 0), (1, 0), (0, -1), (0, 1))
+TECLAS = "WSAD"
+CIMA, BAIXO, ESQ, DIR = range(4)
+
+TICK_RATE = 0.22          # s por passo da cobrinha
+MAX_ERROS = 3             # erros no mesmo round da memória = derrota
+MEMORIA_INICIAL = 2       # LEDs no primeiro round (mínimo 2)
+MEMORIA_CRESCIMENTO = 1   # LEDs a mais por vitória
+ESPERA_ERRO = 1.0         # matriz apagada depois de um erro na memória
+
+
+# ---------- ANIMAÇÕES ----------
+# linhas do tempo: (sprite, cor, duração em s); sprite None = matriz apagada
+def derrota_x(cor):
+    return [("X", cor, 0.18), (None, None, 0.10)] * 3 + [
+        ("X", cor, 0.22),
+        (None, None, 0),
+    ]
+
+def vitoria(cor):
+    return [
+        ("check", cor, 0.24),
+        (None, None, 0.12),
+        ("check", cor, 0.24),
+        (None, None, 0),
+    ]
+
+def round_start(qtd, cor):
+    # leve e lenta
+    return [(f"round{min(qtd, 3)}", cor, 0.18), (None, None, 0)]
+
+def erro_memoria(cor):
+    # tenta de novo (mesma memória) depois de 1 s apagado
+    return derrota_x(cor) + [(None, None, ESPERA_ERRO)]
+
+def derrota_memoria(cor):
+    return derrota_x(cor)[:-1] + [("X", cor, 0.3), (None, None, 0)]
+
+def duracao(quadros):
+    return sum(d for _, _, d in quadros)
+
+
+# ---------- COBRINHA ----------
+class Cobra:
+    """
+    Começa com 3 células no meio indo para a direita; vira para qualquer
+    lado menos o oposto; anda com wrap-around; comer cresce 1 e vale 1
+    ponto; bater no próprio corpo mata.
+    """
+    def __init__(self, linhas=8, colunas=8, rng=random):
+        self.rng = rng
+        self.tab = Tabuleiro(linhas, colunas)
+        l, c = linhas // 2, colunas // 2
+        self.corpo = Corpo(self.tab, [(l, c), (l, c - 1), (l, c - 2)])
+        self.direcao = DIR
+        self.comida = self.tab.livre_aleatoria(rng)
+        self.score = 0
+
+    def virar(self, d):
+        if d != self.direcao ^ 1:
+            self.direcao = d
+
+    def passo(self):
+        """
+        Um tick. False = bateu no corpo (a cobra fica onde estava).
+        """
+        nova = self.tab.vizinha(*self.corpo.cabeca(), *DIRECOES[self.direcao])
+        if nova in self.corpo:
+            return False
+        self.corpo.empurrar(*nova)
+        if nova == self.comida:
+            self.score += 1
+            self.comida = self.tab.livre_aleatoria(self.rng)
+        else:
+            self.corpo.recolher()
+        return True
+
+
+# ---------- MEMÓRIA ----------
+class Memoria:
+    """
+    LEDs sorteados para guardar. Um erro recomeça a tentativa com a mesma
+    memória; `max_erros` erros no round = derrota e volta para `inicial`
+    LEDs; acertar todos soma `crescimento`.
+    """
+    def __init__(self, linhas=8, colunas=8, inicial=MEMORIA_INICIAL,
+                 crescimento=MEMORIA_CRESCIMENTO, max_erros=MAX_ERROS, rng=random):
+        self.linhas, self.colunas = linhas, colunas
+        self.inicial, self.crescimento, self.max_erros = inicial, crescimento, max_erros
+        self.rng = rng
+        self.recomecar()
+
+    def recomecar(self):
+        self.leds = Tabuleiro(self.linhas, self.colunas)
+        self.leds.ocupar_aleatorias(max(2, self.inicial), self.rng)
+        self.erros = 0
+        self.nova_tentativa()
+
+    def nova_tentativa(self):
+        self.acertos = set()
+
+    def proximo_nivel(self):
+        self.leds.ocupar_aleatorias(self.crescimento, self.rng)
+        self.erros = 0
+        self.nova_tentativa()
+
+    def marcar(self, l, c):
+        """
+        ENTER em (l, c): "acerto", "vitoria", "erro" ou "derrota".
+        """
+        if (l, c) in self.leds:
+            self.acertos.add((l, c))
+            return "vitoria" if len(self.acertos) == len(self.leds) else "acerto"
+        self.erros += 1
+        return "derrota" if self.erros >= self.max_erros else "erro"
+
+    def __len__(self):
+        return len(self.leds)
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Simulação sem device das regras da cobrinha e da memória, com relógio
+virtual (nada espera tempo de verdade).
+
+Duas versões de cada jogo:
+- SimCobrinha / SimMemoria: um tabuleiro, as regras do game.py (regras.py,
+  o mesmo código que o jogo roda) e um jogador simulado (referência)
+- LoteCobrinha / LoteMemoria: milhares de tabuleiros independentes em
+  arrays NumPy, todos avançando juntos a cada passo. A LoteCobrinha sorteia
+  a comida como o Tabuleiro: mesma semente e mesmas teclas = mesmas
+  partidas da SimCobrinha (test_simulacao). A LoteMemoria é um modelo
+  estatístico do mesmo jogador (tentativa inteira por sorteio)
+
+Entradas da cobrinha: roteiro ("WWDD.S", "." = nenhuma tecla, repetido),
+aleatória ou gulosa (vai na direção da comida evitando bater). A memória
+usa um jogador simulado que guarda com certeza até `span` LEDs; acima
+disso lembra cada um com chance span / n e chuta o resto.
+
+O relógio virtual conta o tempo que o jogo levaria: TICK_RATE por tick da
+cobrinha; teclas + animações (as linhas do tempo de regras.py) na memória.
+
+Ex.:
+    python3 simulacao.py cobrinha --tabuleiros 4096 --ticks 2000 --entrada gulosa
+    python3 simulacao.py memoria --tabuleiros 4096 --tentativas 500 --max-erros 3 --span 7
+    python3 simulacao.py cobrinha --escalar --tabuleiros 64
+"""
+
+import argparse
+import random
+import time
+
+import regras
+from fluxo import percentil
+from regras import DIRECOES, TECLAS, TICK_RATE
+
+try:
+    import numpy as np
+except ImportError:     # só as versões em lote precisam
+    np = None
+
+SEM_TECLA = -1
+
+# tempos das animações do game.py (s)
+T_ROUND = regras.duracao(regras.round_start(1, None))
+T_VITORIA = regras.duracao(regras.vitoria(None))
+T_ERRO = regras.duracao(regras.erro_memoria(None))
+T_DERROTA = regras.duracao(regras.derrota_memoria(None))
+T_MORTE_COBRA = regras.duracao(regras.derrota_x(None))
+T_TECLA = 0.25                    # jogador humano, por tecla
+# média da distância Manhattan entre duas células de um 8x8 + ENTER
+TECLAS_POR_MARCA = 2 * (8 * 8 - 1) / (3 * 8) + 1
+
+
+class RelogioVirtual:
+    def __init__(self):
+        self.t = 0.0
+
+    def agora(self):
+        return self.t
+
+    def avancar(self, dt):
+        self.t += dt
+        return self.t
+
+
+def _teclas_roteiro(roteiro):
+    return [TECLAS.index(k) if k in TECLAS else SEM_TECLA for k in roteiro.upper()]
+
+
+def _resumo(valores):
+    if not valores:
+        return {"n": 0}
+    return {
+        "n": len(valores),
+        "media": round(sum(valores) / len(valores), 2),
+        "p50": percentil(valores, 50),
+        "p95": percentil(valores, 95),
+        "max": max(valores),
+    }
+
+
+# ---------- COBRINHA ----------
+class SimCobrinha:
+    """
+    Uma cobrinha (regras.Cobra, a mesma do game.Cobrinha); reinicia ao
+    morrer.
+    """
+    def __init__(self, linhas=8, colunas=8, tick_rate=TICK_RATE, rng=None, relogio=None):
+        self.linhas, self.colunas = linhas, colunas
+        self.tick_rate = tick_rate
+        self.rng = rng or random.Random()
+        self.relogio = relogio or RelogioVirtual()
+        self.scores = []
+        self.duracoes = []        # ticks por partida
+        self.ticks = 0
+        self._nova_partida()
+
+    def _nova_partida(self):
+        self.jogo = regras.Cobra(self.linhas, self.colunas, self.rng)
+        self.ticks_partida = 0
+
+    def passo(self, tecla=SEM_TECLA):
+        if tecla != SEM_TECLA:
+            self.jogo.virar(tecla)
+        self.ticks += 1
+        self.ticks_partida += 1
+        self.relogio.avancar(self.tick_rate)
+
+        if not self.jogo.passo():
+            self.scores.append(self.jogo.score)
+            self.duracoes.append(self.ticks_partida)
+            self.relogio.avancar(T_MORTE_COBRA)
+            self._nova_partida()
+            return False
+        return True
+
+    def gulosa(self):
+        # direção que encurta a distância (com wrap) e não bate
+        jogo = self.jogo
+        cl, cc = jogo.corpo.cabeca()
+        melhor, custo_min = SEM_TECLA, None
+        for d, (dl, dc) in enumerate(DIRECOES):
+            if d == jogo.direcao ^ 1:
+                continue
+            nova = jogo.tab.vizinha(cl, cc, dl, dc)
+            custo = 1000 if nova in jogo.corpo else 0
+            if jogo.comida:
+                dl_ = abs(nova[0] - jogo.comida[0])
+                dc_ = abs(nova[1] - jogo.comida[1])
+                custo += min(dl_, self.linhas - dl_) + min(dc_, self.colunas - dc_)
+            if custo_min is None or custo < custo_min:
+                melhor, custo_min = d, custo
+        return melhor
+
+
+class LoteCobrinha:
+    """
+    n cobrinhas independentes em arrays (n, linhas * colunas); passo()
+    avança todas de uma vez. Tabuleiro que morre recomeça na hora.
+
+    A ocupação é a mesma partição do Tabuleiro (ordem[:n_livres] livres,
+    pos = célula -> índice em ordem), com as mesmas trocas: a comida sai
+    de ordem[int(u * n_livres)] como em livre_aleatoria().
+    """
+    def __init__(self, n, linhas=8, colunas=8, tick_rate=TICK_RATE, semente=None):
+        if np is None:
+            raise RuntimeError("LoteCobrinha precisa do numpy")
+        self.n, self.linhas, self.colunas = n, linhas, colunas
+        self.celulas = linhas * colunas
+        self.tick_rate = tick_rate
+        self.rng = np.random.default_rng(semente)
+        self.relogio = RelogioVirtual()
+
+        self.ordem = np.zeros((n, self.celulas), dtype=np.int32)
+        self.pos = np.zeros((n, self.celulas), dtype=np.int32)
+        self.n_livres = np.zeros(n, dtype=np.int32)
+        self.corpo = np.zeros((n, self.celulas), dtype=np.int32)   # buffer circular
+        self.i_cabeca = np.zeros(n, dtype=np.int32)
+        self.i_cauda = np.zeros(n, dtype=np.int32)
+        self.direcao = np.zeros(n, dtype=np.int8)
+        self.comida = np.zeros(n, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.ticks_partida = np.zeros(n, dtype=np.int32)
+        self._linhas_ar = np.arange(n)
+
+        self._dl = np.array([d[0] for d in DIRECOES], dtype=np.int32)
+        self._dc = np.array([d[1] for d in DIRECOES], dtype=np.int32)
+
+        self.ticks = 0
+        self.scores = []          # arrays por passo, juntados no estado()
+        self.duracoes = []
+        self.t_virtual = np.zeros(n)    # tempo de jogo de cada tabuleiro
+        self._reiniciar(self._linhas_ar)
+
+    # ---------- TABULEIRO ----------
+    def _trocar(self, idx, a, b):
+        ca, cb = self.ordem[idx, a], self.ordem[idx, b]
+        self.ordem[idx, a], self.ordem[idx, b] = cb, ca
+        self.pos[idx, ca], self.pos[idx, cb] = b, a
+
+    def _ocupar(self, idx, cel):
+        self.n_livres[idx] -= 1
+        self._trocar(idx, self.pos[idx, cel], self.n_livres[idx])
+
+    def _liberar(self, idx, cel):
+        self._trocar(idx, self.pos[idx, cel], self.n_livres[idx])
+        self.n_livres[idx] += 1
+
+    def _ocupado(self, cel):
+        return self.pos[self._linhas_ar, cel] >= self.n_livres
+
+    def _reiniciar(self, idx):
+        l, c = self.linhas // 2, self.colunas // 2
+        self.ordem[idx] = np.arange(self.celulas)
+        self.pos[idx] = np.arange(self.celulas)
+        self.n_livres[idx] = self.celulas
+        # cauda -> cabeça, na ordem do Corpo
+        for k, cel in enumerate((l * self.colunas + c - 2, l * self.colunas + c - 1, l * self.colunas + c)):
+            self.corpo[idx, k] = cel
+            self._ocupar(idx, np.full(len(idx), cel))
+        self.i_cauda[idx] = 0
+        self.i_cabeca[idx] = 2
+        self.direcao[idx] = regras.DIR
+        self.score[idx] = 0
+        self.ticks_partida[idx] = 0
+        self._sortear_comida(idx)
+
+    def _sortear_comida(self, idx):
+        cheio = self.n_livres[idx] == 0
+        self.comida[idx[cheio]] = -1     # tabuleiro cheio: sem comida
+        idx = idx[~cheio]
+        if not len(idx):
+            return
+        k = (self.rng.random(len(idx)) * self.n_livres[idx]).astype(np.int32)
+        self.comida[idx] = self.ordem[idx, k]
+
+    def _vizinhas(self, d):
+        cab = self.corpo[self._linhas_ar, self.i_cabeca]
+        l, c = cab // self.colunas, cab % self.colunas
+        return ((l + self._dl[d]) % self.linhas) * self.colunas + (c + self._dc[d]) % self.colunas
+
+    # ---------- PASSO ----------
+    def passo(self, teclas):
+        """
+        teclas: array (n,) com 0..3 (W S A D) ou SEM_TECLA.
+        """
+        teclas = np.asarray(teclas)
+        muda = (teclas >= 0) & (teclas != (self.direcao ^ 1))
+        self.direcao = np.where(muda, teclas, self.direcao).astype(np.int8)
+
+        nova = self._vizinhas(self.direcao)
+        bate = self._ocupado(nova)
+        anda = np.nonzero(~bate)[0]
+
+        # cabeça entra
+        self.i_cabeca[anda] = (self.i_cabeca[anda] + 1) % self.celulas
+        self.corpo[anda, self.i_cabeca[anda]] = nova[anda]
+        self._ocupar(anda, nova[anda])
+
+        # cauda sai (quem não comeu)
+        comeu = nova[anda] == self.comida[anda]
+        solta = anda[~comeu]
+        self._liberar(solta, self.corpo[solta, self.i_cauda[solta]])
+        self.i_cauda[solta] = (self.i_cauda[solta] + 1) % self.celulas
+
+        comeram = anda[comeu]
+        self.score[comeram] += 1
+        self._sortear_comida(comeram)
+
+        self.ticks += 1
+        self.ticks_partida += 1
+        self.t_virtual += self.tick_rate
+        self.relogio.avancar(self.tick_rate)
+
+        mortos = np.nonzero(bate)[0]
+        if len(mortos):
+            self.scores.append(self.score[mortos].copy())
+            self.duracoes.append(self.ticks_partida[mortos].copy())
+            self.t_virtual[mortos] += T_MORTE_COBRA
+            self._reiniciar(mortos)
+        return bate
+
+    def aleatoria(self, chance=0.3):
+        aperta = self.rng.random(self.n) < chance
+        return np.where(aperta, self.rng.integers(0, 4, self.n), SEM_TECLA)
+
+    def gulosa(self):
+        custo = np.empty((4, self.n), dtype=np.int32)
+        fl, fc = self.comida // self.colunas, self.comida % self.colunas
+        for d in range(4):
+            viz = self._vizinhas(np.full(self.n, d))
+            vl, vc = viz // self.colunas, viz % self.colunas
+            dl, dc = np.abs(vl - fl), np.abs(vc - fc)
+            dist = np.minimum(dl, self.linhas - dl) + np.minimum(dc, self.colunas - dc)
+            custo[d] = (np.where(self.comida >= 0, dist, 0)
+                        + 1000 * self._ocupado(viz)
+                        + 2000 * (self.direcao == (d ^ 1)))
+        return custo.argmin(0)
+
+    def estado(self):
+        scores = np.concatenate(self.scores).tolist() if self.scores else []
+        duracoes = np.concatenate(self.duracoes).tolist() if self.duracoes else []
+        return {"partidas": len(scores), "score": _resumo(scores), "ticks_partida": _resumo(duracoes)}
+
+
+# ---------- MEMÓRIA ----------
+def _chance_lembrar(n, span):
+    return 1.0 if n <= span else span / n
+
+
+class SimMemoria:
+    """
+    Um tabuleiro da memória (regras.Memoria, a mesma do game.Memoria) com
+    um jogador simulado que marca o que lembra e chuta o resto.
+    """
+    def __init__(self, linhas=8, colunas=8, inicial=regras.MEMORIA_INICIAL,
+                 crescimento=regras.MEMORIA_CRESCIMENTO, max_erros=regras.MAX_ERROS,
+                 span=7, rng=None, relogio=None):
+        self.linhas, self.colunas = linhas, colunas
+        self.span = span
+        self.rng = rng or random.Random()
+        self.relogio = relogio or RelogioVirtual()
+        self.jogo = regras.Memoria(linhas, colunas, inicial, crescimento, max_erros, self.rng)
+        self.tentativas = 0
+        self.teclas = 0
+        self.niveis = []          # LEDs na memória quando perdeu
+        self.relogio.avancar(T_ROUND)
+
+    def _andar(self, de, para):
+        # setas até a célula + ENTER
+        n = abs(de[0] - para[0]) + abs(de[1] - para[1]) + 1
+        self.teclas += n
+        self.relogio.avancar(n * T_TECLA)
+        return para
+
+    def tentativa(self):
+        """
+        Uma tentativa do jogador. Devolve "vitoria", "erro" ou "derrota".
+        """
+        self.tentativas += 1
+        jogo = self.jogo
+        alvos = jogo.leds.ocupadas()
+        p = _chance_lembrar(len(alvos), self.span)
+        lembrados = [a for a in alvos if self.rng.random() < p]
+
+        # marca os que lembra e chuta os outros entre as células ainda não
+        # marcadas, até vencer ou errar
+        marcados = set(lembrados)
+        candidatas = [(l, c) for l in range(self.linhas) for c in range(self.colunas)
+                      if (l, c) not in marcados]
+        self.rng.shuffle(candidatas)
+        pos = (0, 0)
+        resultado = None
+        for alvo in lembrados + candidatas:
+            pos = self._andar(pos, alvo)
+            resultado = jogo.marcar(*alvo)
+            if resultado != "acerto":
+                break
+
+        if resultado == "derrota":
+            self.niveis.append(len(jogo))
+            self.relogio.avancar(T_DERROTA + T_ROUND)
+            jogo.recomecar()
+        elif resultado == "erro":
+            self.relogio.avancar(T_ERRO)
+            jogo.nova_tentativa()
+        else:
+            self.relogio.avancar(T_VITORIA + T_ROUND)
+            jogo.proximo_nivel()
+        return resultado
+
+
+class LoteMemoria:
+    """
+    n jogadores da memória em arrays; cada passo é uma tentativa de todos.
+    As teclas de cada marcação entram pela distância média
+    (TECLAS_POR_MARCA), sem sortear posições.
+    """
+    def __init__(self, n, linhas=8, colunas=8, inicial=regras.MEMORIA_INICIAL,
+                 crescimento=regras.MEMORIA_CRESCIMENTO, max_erros=regras.MAX_ERROS,
+                 span=7, semente=None):
+        if np is None:
+            raise RuntimeError("LoteMemoria precisa do numpy")
+        self.n = n
+        self.celulas = linhas * colunas
+        self.inicial, self.crescimento, self.max_erros = max(2, inicial), crescimento, max_erros
+        self.span = span
+        self.rng = np.random.default_rng(semente)
+        self.relogio = RelogioVirtual()
+
+        self.leds = np.full(n, self.inicial, dtype=np.int32)
+        self.erros = np.zeros(n, dtype=np.int32)
+        self.t_virtual = np.full(n, T_ROUND)
+        self.tentativas = 0
+        self.teclas = 0
+        self.niveis = []
+
+    def passo(self):
+        n_leds = self.leds
+        p = np.where(n_leds <= self.span, 1.0, self.span / np.maximum(n_leds, 1))
+        lembrados = self.rng.binomial(n_leds, p)
+        faltam = n_leds - lembrados
+        candidatas = self.celulas - lembrados
+        marcas = lembrados.astype(np.float64)
+
+        # chutes em sequência até errar ou achar todas
+        errou = np.zeros(self.n, dtype=bool)
+        ativos = faltam > 0
+        while ativos.any():
+            acerta = self.rng.random(self.n) * candidatas < faltam
+            marcas += ativos
+            faltam = np.where(ativos & acerta, faltam - 1, faltam)
+            candidatas = np.where(ativos, candidatas - 1, candidatas)
+            errou |= ativos & ~acerta
+            ativos &= acerta & (faltam > 0)
+
+        teclas = marcas * TECLAS_POR_MARCA
+        self.teclas += int(teclas.sum())
+        self.t_virtual += teclas * T_TECLA
+        self.tentativas += 1
+
+        venceu = ~errou
+        self.leds = np.where(venceu, np.minimum(self.leds + self.crescimento, self.celulas), self.leds)
+        self.erros = np.where(venceu, 0, self.erros + errou)
+        perdeu = self.erros >= self.max_erros
+        if perdeu.any():
+            self.niveis.append(self.leds[perdeu].copy())
+        self.t_virtual += np.where(venceu, T_VITORIA + T_ROUND,
+                                   np.where(perdeu, T_DERROTA + T_ROUND, T_ERRO))
+        self.leds = np.where(perdeu, self.inicial, self.leds)
+        self.erros = np.where(perdeu, 0, self.erros)
+        self.relogio.avancar(float(self.t_virtual.mean()) - self.relogio.agora())
+        return venceu, perdeu
+
+    def estado(self):
+        niveis = np.concatenate(self.niveis).tolist() if self.niveis else []
+        return {"derrotas": len(niveis), "leds_ao_perder": _resumo(niveis),
+                "leds_agora": _resumo(self.leds.tolist())}
+
+
+# ---------- CLI ----------
+def rodar_cobrinha(args):
+    roteiro = _teclas_roteiro(args.roteiro) if args.roteiro else None
+    t0 = time.perf_counter()
+    if args.escalar:
+        rng = random.Random(args.semente)
+        sims = [SimCobrinha(tick_rate=args.tick_rate, rng=rng) for _ in range(args.tabuleiros)]
+        for t in range(args.ticks):
+            for s in sims:
+                if roteiro:
+                    tecla = roteiro[t % len(roteiro)]
+                elif args.entrada == "gulosa":
+                    tecla = s.gulosa()
+                else:
+                    tecla = rng.randrange(4) if rng.random() < 0.3 else SEM_TECLA
+                s.passo(tecla)
+        scores = [v for s in sims for v in s.scores]
+        duracoes = [v for s in sims for v in s.duracoes]
+        est = {"partidas": len(scores), "score": _resumo(scores), "ticks_partida": _resumo(duracoes)}
+    else:
+        lote = LoteCobrinha(args.tabuleiros, tick_rate=args.tick_rate, semente=args.semente)
+        for t in range(args.ticks):
+            if roteiro:
+                teclas = np.full(args.tabuleiros, roteiro[t % len(roteiro)])
+            elif args.entrada == "gulosa":
+                teclas = lote.gulosa()
+            else:
+                teclas = lote.aleatoria()
+            lote.passo(teclas)
+        est = lote.estado()
+    dt = time.perf_counter() - t0
+
+    total = args.ticks * args.tabuleiros
+    print(f"[COBRINHA] {args.tabuleiros} tabuleiros x {args.ticks} ticks em {dt:.2f} s "
+          f"= {total / dt:,.0f} ticks/s ({args.ticks * args.tick_rate:,.0f} s virtuais por tabuleiro)")
+    print("[PARTIDAS]", est)
+
+
+def rodar_memoria(args):
+    t0 = time.perf_counter()
+    if args.escalar:
+        rng = random.Random(args.semente)
+        sims = [SimMemoria(inicial=args.inicial, crescimento=args.crescimento,
+                           max_erros=args.max_erros, span=args.span, rng=rng)
+                for _ in range(args.tabuleiros)]
+        for _ in range(args.tentativas):
+            for s in sims:
+                s.tentativa()
+        niveis = [v for s in sims for v in s.niveis]
+        est = {"derrotas": len(niveis), "leds_ao_perder": _resumo(niveis),
+               "leds_agora": _resumo([len(s.jogo) for s in sims])}
+        t_virtual = sum(s.relogio.agora() for s in sims) / len(sims)
+    else:
+        lote = LoteMemoria(args.tabuleiros, inicial=args.inicial, crescimento=args.crescimento,
+                           max_erros=args.max_erros, span=args.span, semente=args.semente)
+        for _ in range(args.tentativas):
+            lote.passo()
+        est = lote.estado()
+        t_virtual = lote.relogio.agora()
+    dt = time.perf_counter() - t0
+
+    total = args.tentativas * args.tabuleiros
+    print(f"[MEMORIA] {args.tabuleiros} tabuleiros x {args.tentativas} tentativas em {dt:.2f} s "
+          f"= {total / dt:,.0f} tentativas/s ({t_virtual:,.0f} s virtuais por tabuleiro)")
+    print("[PARTIDAS]", est)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Simulação das regras dos jogos sem device")
+    sub = ap.add_subparsers(dest="jogo", required=True)
+
+    c = sub.add_parser("cobrinha")
+    c.add_argument("--ticks", type=int, default=1000)
+    c.add_argument("--tick-rate", type=float, default=TICK_RATE)
+    c.add_argument("--entrada", choices=("aleatoria", "gulosa"), default="gulosa")
+    c.add_argument("--roteiro", help='teclas repetidas a cada tick, ex.: "WWDD.S" (. = nenhuma)')
+
+    m = sub.add_parser("memoria")
+    m.add_argument("--tentativas", type=int, default=200)
+    m.add_argument("--inicial", type=int, default=regras.MEMORIA_INICIAL, help="LEDs no primeiro round")
+    m.add_argument("--crescimento", type=int, default=regras.MEMORIA_CRESCIMENTO,
+                   help="LEDs a mais por vitória")
+    m.add_argument("--max-erros", type=int, default=regras.MAX_ERROS)
+    m.add_argument("--span", type=float, default=7, help="LEDs que o jogador guarda com certeza")
+
+    for p in (c, m):
+        p.add_argument("--tabuleiros", type=int, default=4096)
+        p.add_argument("--escalar", action="store_true", help="um tabuleiro por vez (sem numpy)")
+        p.add_argument("--semente", type=int)
+    args = ap.parse_args()
+
+    if not args.escalar and np is None:
+        ap.error("a versão em lote precisa do numpy (ou use --escalar)")
+    if args.jogo == "cobrinha":
+        rodar_cobrinha(args)
+    else:
+        rodar_memoria(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Atlas de sprites (dígitos do menu, X, check, ...) pré-compilados.
+
+Cada sprite é registrado uma vez como lista de pontos lógicos (já
+posicionados na matriz). Para cada (sprite, cor) o atlas guarda:
+- pixels(): o frame lógico inteiro (para o framebuffer saber o que ficou
+  na tela)
+- blob(): o comando de frame de cada painel, já codificado e na ordem do
+  device (F ou pacote binário), pronto para uma escrita só
+
+No formato "indexado" o blob é um OP_FRAME_IDX (37 bytes) com os índices
+da `paleta` passada; quem envia garante que a paleta já está no device.
+
+Os blobs podem ser gravados/lidos de um cache em disco (JSON). A chave do
+cache inclui a geometria, o formato e os próprios sprites, então mudar
+qualquer um deles invalida o arquivo sozinho.
+"""
+
+import hashlib
+import json
+import os
+
+import binario
+import protocolo
+
+FORMATOS = {
+    "frame": protocolo.codificar_frame,   # comando F (texto/ASCII)
+    "binario": binario.frame,             # pacote COBS OP_FRAME
+    "indexado": None,                     # pacote COBS OP_FRAME_IDX (precisa de paleta)
+}
+
+# sobe quando o formato do arquivo de cache muda
+VERSAO_CACHE = 2
+
+
+class Atlas:
+    def __init__(self, geometria, formato="frame", cache=None, paleta=None):
+        self.geo = geometria
+        self.formato = formato
+        self.codificar = FORMATOS[formato]
+        self.cache = cache
+        self.paleta = paleta
+        if formato == "indexado":
+            if paleta is None:
+                raise ValueError("formato indexado precisa de paleta")
+            self.codificar = paleta.frame
+
+        self.sprites = {}    # nome -> tupla de (l, c)
+        self._pixels = {}    # (nome, cor) -> frame lógico
+        self._blobs = {}     # (nome, cor, painel) -> bytes
+        self._sujo = False
+
+        self.compilados = 0
+        self.do_cache = 0
+
+    # ---------- REGISTRO ----------
+    def registrar(self, nome, pontos):
+        self.sprites[nome] = tuple(
+            (l, c) for l, c in pontos if 0 <= l < self.geo.linhas and 0 <= c < self.geo.colunas
+        )
+        return self
+
+    def de_grade(self, nome, grade):
+        """
+        Sprite a partir de linhas de "0"/"1", centralizado na matriz. Sobra
+        ímpar de colunas fica à esquerda (dígito de 5 em 8: colunas 2..6),
+        como no desenho antigo, que centralizava nas colunas espelhadas.
+        """
+        altura, largura = len(grade), len(grade[0])
+        off_l = (self.geo.linhas - altura) // 2
+        off_c = (self.geo.colunas - largura + 1) // 2
+        pontos = [
+            (l + off_l, c + off_c)
+            for l in range(altura) for c in range(largura)
+            if grade[l][c] == "1"
+        ]
+        return self.registrar(nome, pontos)
+
+    # ---------- CONSULTA ----------
+    def pixels(self, nome, cor):
+        chave = (nome, cor)
+        pix = self._pixels.get(chave)
+        if pix is None:
+            pix = [None] * (self.geo.linhas * self.geo.colunas)
+            for l, c in self.sprites[nome]:
+                pix[l * self.geo.colunas + c] = cor
+            self._pixels[chave] = pix
+        return pix
+
+    def blob(self, nome, cor, painel=0):
+        chave = (nome, cor, painel)
+        b = self._blobs.get(chave)
+        if b is None:
+            b = self.codificar(self.geo.paineis(self.pixels(nome, cor))[painel])
+            if b is None:
+                raise ValueError(f"cor {cor!r} do sprite {nome!r} fora da paleta")
+            self._blobs[chave] = b
+            self.compilados += 1
+            self._sujo = True
+        return b
+
+    def compilar(self, pares):
+        """
+        Pré-compila [(nome, cor), ...] para todos os painéis (ex.: na
+        inicialização).
+        """
+        for nome, cor in pares:
+            for painel in range(self.geo.n_paineis):
+                self.blob(nome, cor, painel)
+        return self
+
+    # ---------- CACHE EM DISCO ----------
+    def _chave(self):
+        cores = self.paleta.cores if self.paleta else None
+        desc = json.dumps([VERSAO_CACHE, repr(self.geo), self.formato, cores, sorted(self.sprites.items())])
+        return hashlib.sha1(desc.encode()).hexdigest()
+
+    def carregar(self):
+        if not self.cache or not os.path.exists(self.cache):
+            return self
+        try:
+            with open(self.cache) as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if dados.get("chave") != self._chave():
+            return self
+        for k, hexa in dados.get("blobs", {}).items():
+            nome, cor, painel = k.split("|")
+            chave = (nome, cor or None, int(painel))
+            if nome in self.sprites and chave not in self._blobs:
+                self._blobs[chave] = bytes.fromhex(hexa)
+                self.do_cache += 1
+        return self
+
+    def salvar(self):
+        if not self.cache or not self._sujo:
+            return
+        dados = {
+            "chave": self._chave(),
+            "blobs": {f"{n}|{c or ''}|{p}": b.hex() for (n, c, p), b in self._blobs.items()},
+        }
+        tmp = self.cache + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(dados, f)
+            os.replace(tmp, self.cache)
+            self._sujo = False
+        except OSError:
+            pass
+
+    def estado(self):
+        return {
+            "sprites": len(self.sprites),
+            "blobs": len(self._blobs),
+            "compilados": self.compilados,
+            "do_cache": self.do_cache,
+        }
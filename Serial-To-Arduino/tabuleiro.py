@@ -0,0 +1,145 @@
+"""
+Estado do tabuleiro dos jogos (snake, memória), de qualquer tamanho.
+
+Tabuleiro guarda a ocupação das células num array só, particionado:
+    ordem[:n_livres]  = células livres
+    ordem[n_livres:]  = células ocupadas
+mais `pos` (célula -> índice em ordem). Ocupar / liberar é uma troca de
+duas posições, então tudo é O(1):
+- ocupado(l, c)
+- ocupar / liberar
+- livre_aleatoria() (sorteia um índice em ordem[:n_livres])
+e iterar as ocupadas custa só o número de ocupadas, não o tabuleiro todo.
+
+Corpo é o corpo da cobra num buffer circular (cabeça entra, cauda sai sem
+mover a lista) que marca/desmarca as células no Tabuleiro.
+"""
+
+import random
+
+
+class Tabuleiro:
+    def __init__(self, linhas=8, colunas=8):
+        self.linhas = linhas
+        self.colunas = colunas
+        self.n = linhas * colunas
+        self.ordem = list(range(self.n))
+        self.pos = list(range(self.n))
+        self.n_livres = self.n
+
+    # ---------- COORDENADAS ----------
+    def indice(self, l, c):
+        return l * self.colunas + c
+
+    def coord(self, i):
+        return divmod(i, self.colunas)
+
+    def dentro(self, l, c):
+        return 0 <= l < self.linhas and 0 <= c < self.colunas
+
+    def vizinha(self, l, c, dl, dc):
+        # passo com wrap-around nas bordas
+        return (l + dl) % self.linhas, (c + dc) % self.colunas
+
+    # ---------- OCUPAÇÃO ----------
+    def ocupado(self, l, c):
+        return self.pos[l * self.colunas + c] >= self.n_livres
+
+    def _trocar(self, a, b):
+        ordem, pos = self.ordem, self.pos
+        ca, cb = ordem[a], ordem[b]
+        ordem[a], ordem[b] = cb, ca
+        pos[ca], pos[cb] = b, a
+
+    def ocupar(self, l, c):
+        i = l * self.colunas + c
+        if self.pos[i] < self.n_livres:
+            # troca com a última livre e encolhe a parte livre
+            self.n_livres -= 1
+            self._trocar(self.pos[i], self.n_livres)
+
+    def liberar(self, l, c):
+        i = l * self.colunas + c
+        if self.pos[i] >= self.n_livres:
+            # troca com a primeira ocupada e cresce a parte livre
+            self._trocar(self.pos[i], self.n_livres)
+            self.n_livres += 1
+
+    def limpar(self):
+        self.ordem = list(range(self.n))
+        self.pos = list(range(self.n))
+        self.n_livres = self.n
+
+    def livre_aleatoria(self, rng=random):
+        # só rng.random(): serve também um numpy.random.Generator (a
+        # simulação em lote sorteia igual)
+        if not self.n_livres:
+            return None
+        return self.coord(self.ordem[int(rng.random() * self.n_livres)])
+
+    def ocupar_aleatorias(self, qtd, rng=random):
+        for _ in range(min(qtd, self.n_livres)):
+            self.ocupar(*self.livre_aleatoria(rng))
+
+    # ---------- LEITURA ----------
+    def ocupadas(self):
+        return [self.coord(i) for i in self.ordem[self.n_livres:]]
+
+    def __len__(self):
+        return self.n - self.n_livres
+
+    def __contains__(self, lc):
+        return self.ocupado(*lc)
+
+    def __iter__(self):
+        return iter(self.ocupadas())
+
+
+class Corpo:
+    """
+    Corpo da cobra: buffer circular de índices, cabeça primeiro.
+    """
+    def __init__(self, tabuleiro, celulas=()):
+        self.tab = tabuleiro
+        self.buf = [0] * tabuleiro.n
+        self.cabeca_i = 0          # posição da cabeça em buf
+        self.tamanho = 0
+        # celulas vem da cabeça pra cauda: empurra da cauda pra cabeça
+        for l, c in reversed(list(celulas)):
+            self.empurrar(l, c)
+
+    def empurrar(self, l, c):
+        """
+        Nova cabeça.
+        """
+        self.cabeca_i = (self.cabeca_i - 1) % len(self.buf)
+        self.buf[self.cabeca_i] = self.tab.indice(l, c)
+        self.tamanho += 1
+        self.tab.ocupar(l, c)
+
+    def recolher(self):
+        """
+        Tira a cauda e devolve a célula.
+        """
+        i = (self.cabeca_i + self.tamanho - 1) % len(self.buf)
+        self.tamanho -= 1
+        lc = self.tab.coord(self.buf[i])
+        self.tab.liberar(*lc)
+        return lc
+
+    def cabeca(self):
+        return self.tab.coord(self.buf[self.cabeca_i])
+
+    def cauda(self):
+        return self.tab.coord(self.buf[(self.cabeca_i + self.tamanho - 1) % len(self.buf)])
+
+    def __len__(self):
+        return self.tamanho
+
+    def __contains__(self, lc):
+        return self.tab.ocupado(*lc)
+
+    def __iter__(self):
+        n = len(self.buf)
+        for k in range(self.tamanho):
+            yield self.tab.coord(self.buf[(self.cabeca_i + k) % n])
@@ -0,0 +1,206 @@
+"""
+Teclado persistente para os jogos.
+
+Em vez de trocar o modo do terminal a cada caractere (getch) e fazer três
+reads bloqueantes por seta (read_key), o Teclado:
+- entra em modo cbreak uma vez por sessão (sem eco, sem buffer de linha;
+  Ctrl+C continua gerando KeyboardInterrupt e os prints saem normais)
+- lê tudo o que estiver disponível de uma vez (os.read)
+- decodifica sequências ANSI (ESC [ A, ESC O A, ESC [ 3 ~ ...) guardando
+  sequências incompletas entre leituras; um ESC sozinho vira "ESC" depois
+  de `timeout_esc`, nunca trava
+- coloca as teclas numa fila ("ENTER", "UP", "DOWN", "LEFT", "RIGHT",
+  "ESC" ou o caractere em maiúsculo)
+
+coletar(ULTIMA_DIRECAO) esvazia a fila mantendo só a última direção (por
+tick), em vez de jogar tudo fora como o drenar_teclado fazia.
+"""
+
+import os
+import select
+import sys
+import termios
+import time
+import tty
+from collections import deque
+
+ESC = 0x1B
+
+# final da sequência CSI/SS3 -> tecla
+SETAS = {ord("A"): "UP", ord("B"): "DOWN", ord("C"): "RIGHT", ord("D"): "LEFT"}
+
+DIRECOES = {"UP", "DOWN", "LEFT", "RIGHT", "W", "A", "S", "D"}
+
+# políticas de coleta
+TODAS = "todas"
+ULTIMA_DIRECAO = "ultima_direcao"
+
+
+class Teclado:
+    def __init__(self, fd=None, timeout_esc=0.05, max_fila=64):
+        self.fd = sys.stdin.fileno() if fd is None else fd
+        self.timeout_esc = timeout_esc
+        self.fila = deque(maxlen=max_fila)
+
+        self._buf = bytearray()      # sequência de escape incompleta
+        self._t_esc = None           # quando o ESC pendente chegou
+        self._modo_antigo = None
+
+        self.lidos = 0               # bytes
+        self.leituras = 0            # chamadas a os.read
+        self.coalescidas = 0         # direções descartadas por ULTIMA_DIRECAO
+
+    # ---------- SESSÃO ----------
+    def abrir(self):
+        if self._modo_antigo is None and os.isatty(self.fd):
+            self._modo_antigo = termios.tcgetattr(self.fd)
+            tty.setcbreak(self.fd)
+        return self
+
+    def fechar(self):
+        if self._modo_antigo is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self._modo_antigo)
+            self._modo_antigo = None
+
+    def __enter__(self):
+        return self.abrir()
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fileno(self):
+        return self.fd
+
+    # ---------- LEITURA ----------
+    def ler(self, agora=None):
+        """
+        Lê o que houver no fd (não bloqueia se chamado quando o fd está
+        pronto). Devolve False se o stdin fechou.
+        """
+        data = os.read(self.fd, 256)
+        if not data:
+            return False
+        self.leituras += 1
+        self.lidos += len(data)
+        self.alimentar(data, agora)
+        return True
+
+    def alimentar(self, data, agora=None):
+        self._buf += data
+        self._decodificar()
+        if self._buf and self._t_esc is None:
+            self._t_esc = time.monotonic() if agora is None else agora
+        elif not self._buf:
+            self._t_esc = None
+
+    def prazo_esc(self):
+        """
+        Instante em que o ESC pendente deve ser liberado (None = nada pendente).
+        """
+        if self._t_esc is None:
+            return None
+        return self._t_esc + self.timeout_esc
+
+    def expirar(self, agora=None):
+        """
+        Sequência incompleta há mais de timeout_esc: era um ESC sozinho.
+        """
+        prazo = self.prazo_esc()
+        agora = time.monotonic() if agora is None else agora
+        if prazo is None or agora < prazo:
+            return
+        resto = bytes(self._buf[1:])
+        self._buf.clear()
+        self._t_esc = None
+        self.fila.append("ESC")
+        if resto:
+            self.alimentar(resto, agora)
+
+    def _decodificar(self):
+        buf = self._buf
+        i = 0
+        n = len(buf)
+        while i < n:
+            b = buf[i]
+            if b != ESC:
+                if b in (0x0D, 0x0A):
+                    self.fila.append("ENTER")
+                elif 0x20 <= b < 0x7F:
+                    self.fila.append(chr(b).upper())
+                i += 1
+                continue
+
+            # ESC: precisa de pelo menos mais um byte pra decidir
+            if i + 1 >= n:
+                break
+            intro = buf[i + 1]
+            if intro == ord("O"):                 # SS3 (modo aplicação)
+                if i + 2 >= n:
+                    break
+                tecla = SETAS.get(buf[i + 2])
+                if tecla:
+                    self.fila.append(tecla)
+                i += 3
+            elif intro == ord("["):               # CSI: parâmetros + byte final
+                j = i + 2
+                while j < n and not (0x40 <= buf[j] <= 0x7E):
+                    j += 1
+                if j >= n:
+                    break
+                tecla = SETAS.get(buf[j])
+                if tecla:
+                    self.fila.append(tecla)
+                i = j + 1
+            else:                                 # ESC seguido de outra tecla
+                self.fila.append("ESC")
+                i += 1
+        del buf[:i]
+
+    # ---------- CONSUMO ----------
+    def coletar(self, politica=TODAS):
+        """
+        Esvazia a fila. Com ULTIMA_DIRECAO as direções são reduzidas à
+        última (na posição dela); as outras teclas ficam todas, em ordem.
+        """
+        eventos = list(self.fila)
+        self.fila.clear()
+        if politica != ULTIMA_DIRECAO:
+            return eventos
+
+        ultima = None
+        for i, k in enumerate(eventos):
+            if k in DIRECOES:
+                ultima = i
+        saida = [k for i, k in enumerate(eventos) if k not in DIRECOES or i == ultima]
+        self.coalescidas += len(eventos) - len(saida)
+        return saida
+
+    def esperar(self, timeout=None):
+        """
+        Versão bloqueante para scripts sem reator: espera até ter tecla
+        (ou o timeout) e devolve coletar().
+        """
+        fim = None if timeout is None else time.monotonic() + timeout
+        while not self.fila:
+            espera = None if fim is None else max(0.0, fim - time.monotonic())
+            prazo = self.prazo_esc()
+            if prazo is not None:
+                ate_esc = max(0.0, prazo - time.monotonic())
+                espera = ate_esc if espera is None else min(espera, ate_esc)
+
+            r, _, _ = select.select([self.fd], [], [], espera)
+            if r:
+                if not self.ler():
+                    raise EOFError
+            self.expirar()
+            if fim is not None and time.monotonic() >= fim:
+                break
+        return self.coletar()
+
+    def estado(self):
+        return {
+            "leituras": self.leituras,
+            "bytes": self.lidos,
+            "na_fila": len(self.fila),
+            "coalescidas": self.coalescidas,
+        }
@@ -0,0 +1,195 @@
+"""
+Ida e volta do protocolo binário (binario.py): empacotar/desempacotar,
+Decodificador de fluxo e de_ascii, incluindo CRC corrompido, pacote
+truncado e 0x00 no payload.
+
+    python3 -m unittest test_binario     (ou python3 -m pytest)
+"""
+
+import random
+import unittest
+
+import binario
+import protocolo
+from emulador import Firmware, FRAME_TIMEOUT_S
+
+OPS = (binario.OP_PIXELS, binario.OP_LIMPAR, binario.OP_FRAME, binario.OP_OLED,
+       binario.OP_PALETA, binario.OP_FRAME_IDX, binario.OP_DELTA, binario.OP_OLED_RAW)
+
+
+def _corpo(pkt):
+    # bytes entre os dois delimitadores
+    assert pkt[0] == binario.DELIM and pkt[-1] == binario.DELIM
+    return pkt[1:-1]
+
+
+class TestEmpacotar(unittest.TestCase):
+    def test_ida_e_volta(self):
+        rng = random.Random(1)
+        for op in OPS:
+            for n in (0, 1, 2, 31, 128, 253, 254, 255, 600):
+                payload = bytes(rng.randrange(256) for _ in range(n))
+                pkt = binario.empacotar(op, payload)
+                self.assertNotIn(0, _corpo(pkt))
+                self.assertEqual(binario.desempacotar(pkt), (op, payload))
+
+    def test_zeros_no_payload(self):
+        for payload in (b"\x00", b"\x00" * 10, b"\x00\x01\x00", b"\x01" + b"\x00" * 300,
+                        bytes(range(256))):
+            pkt = binario.empacotar(binario.OP_PIXELS, payload)
+            self.assertNotIn(0, _corpo(pkt))
+            self.assertEqual(binario.desempacotar(pkt), (binario.OP_PIXELS, payload))
+
+    def test_sem_delimitadores(self):
+        pkt = binario.empacotar(binario.OP_FRAME, b"\x12\x00\x34")
+        self.assertEqual(binario.desempacotar(_corpo(pkt)), (binario.OP_FRAME, b"\x12\x00\x34"))
+
+    def test_crc_conhecido(self):
+        # CRC-8 polinômio 0x07, init 0: "123456789" -> 0xF4
+        self.assertEqual(binario.crc8(b"123456789"), 0xF4)
+
+    def test_crc_corrompido(self):
+        rng = random.Random(2)
+        payload = bytes(rng.randrange(1, 256) for _ in range(40))
+        corpo = bytearray(_corpo(binario.empacotar(binario.OP_PIXELS, payload)))
+        # sem zeros no payload o COBS é um bloco só: troca qualquer byte de dado
+        for i in range(1, len(corpo)):
+            ruim = bytearray(corpo)
+            ruim[i] ^= 0x01 if ruim[i] != 0x01 else 0x02
+            with self.assertRaises(ValueError):
+                binario.desempacotar(bytes(ruim))
+
+    def test_so_o_crc_errado(self):
+        corpo = bytearray([binario.OP_LIMPAR, 0])
+        corpo[-1] = binario.crc8(corpo[:1]) ^ 0xFF
+        pkt = bytes([0]) + binario.cobs_codificar(bytes(corpo)) + bytes([0])
+        with self.assertRaisesRegex(ValueError, "CRC_ERR"):
+            binario.desempacotar(pkt)
+
+    def test_truncado(self):
+        payload = b"\x05\x00\x07" * 10
+        corpo = _corpo(binario.empacotar(binario.OP_PIXELS, payload))
+        for n in range(len(corpo)):
+            with self.assertRaises(ValueError):
+                binario.desempacotar(corpo[:n])
+
+    def test_cobs_invalido(self):
+        with self.assertRaises(ValueError):
+            binario.cobs_decodificar(b"\x05\x01\x02")    # bloco passa do fim
+        with self.assertRaises(ValueError):
+            binario.cobs_decodificar(b"\x02\x01\x00")    # zero dentro
+
+
+class TestDecodificador(unittest.TestCase):
+    def test_fluxo_byte_a_byte(self):
+        pacotes = [binario.empacotar(op, bytes([op, 0, op])) for op in OPS]
+        dec = binario.Decodificador()
+        saida = []
+        for b in b"".join(pacotes):
+            saida += dec.alimentar(bytes([b]))
+        self.assertEqual(saida, [(op, bytes([op, 0, op])) for op in OPS])
+
+    def test_lixo_entre_pacotes(self):
+        a = binario.empacotar(binario.OP_LIMPAR)
+        b = binario.empacotar(binario.OP_OLED, b"01300042")
+        dec = binario.Decodificador()
+        # texto ASCII antes/entre pacotes não vira pacote
+        saida = dec.alimentar(b"MCL\n" + a + b + b"\x00\x00" + b)
+        self.assertEqual(saida, [(binario.OP_LIMPAR, b""), (binario.OP_OLED, b"01300042"),
+                                 (binario.OP_OLED, b"01300042")])
+
+    def test_pacote_ruim_nao_derruba_o_proximo(self):
+        bom = binario.empacotar(binario.OP_FRAME_IDX, bytes(32))
+        ruim = bytearray(binario.empacotar(binario.OP_FRAME_IDX, bytes(32)))
+        ruim[3] ^= 0x40
+        truncado = bom[:-5] + b"\x00"
+        dec = binario.Decodificador()
+        saida = dec.alimentar(bytes(ruim) + truncado + bom)
+        self.assertEqual(saida[0][0], None)
+        self.assertEqual(saida[-1], (binario.OP_FRAME_IDX, bytes(32)))
+        self.assertTrue(all(op is None for op, _ in saida[:-1]))
+
+
+class TestDeAscii(unittest.TestCase):
+    def test_limpar(self):
+        self.assertEqual(binario.desempacotar(binario.de_ascii("MCL")), (binario.OP_LIMPAR, b""))
+
+    def test_oled(self):
+        self.assertEqual(binario.desempacotar(binario.de_ascii("O02300042")),
+                         (binario.OP_OLED, b"02300042"))
+
+    def test_pixel(self):
+        op, payload = binario.desempacotar(binario.de_ascii("M352550000001"))
+        self.assertEqual(op, binario.OP_PIXELS)
+        self.assertEqual(payload[0], (3 << 4) | 5)
+        v = (payload[1] << 8) | payload[2]
+        self.assertEqual(v, protocolo.rgb565(*protocolo.cor_para_rgb("2550000001")))
+
+    def test_pixel_apagado(self):
+        op, payload = binario.desempacotar(binario.de_ascii("M00"))
+        self.assertEqual((op, payload), (binario.OP_PIXELS, b"\x00\x00\x00"))
+
+    def test_sem_equivalente(self):
+        for cmd in ("X", "M", "Mab", "PING"):
+            with self.assertRaises(ValueError):
+                binario.de_ascii(cmd)
+
+    def test_agrupado_mais_de_3x(self):
+        mudancas = [(l, c, "2550000001") for l in range(4) for c in range(8)]
+        ascii_ = sum(protocolo.tamanho_cmd(protocolo.cmd_pixel(l, c, cor)) for l, c, cor in mudancas)
+        binario_ = sum(len(p) for p in binario.pixels(mudancas))
+        self.assertGreaterEqual(ascii_ / binario_, 3)
+
+
+class TestFirmware(unittest.TestCase):
+    def _alimentar(self, fw, data, t):
+        respostas = []
+        for b in data:
+            respostas += [r for r, _, _ in fw.receber(b, t)]
+        return respostas
+
+    def test_zero_solto_expira_em_silencio(self):
+        fw = Firmware()
+        self.assertEqual(self._alimentar(fw, b"\x00", 0.0), [])
+        respostas = self._alimentar(fw, b"MCL\n", 2 * FRAME_TIMEOUT_S)
+        self.assertEqual(respostas, ["MATRIZ_CLEARED"])
+
+    def test_zero_solto_antes_de_texto(self):
+        # texto logo depois (bem antes do timeout) não pode sumir no COBS
+        for cmd, resposta in ((b"MCL\n", "MATRIZ_CLEARED"), (b"O01300042\n", "OLED_UPDATED"),
+                              (b"PING\n", "PONG"), (b"M352550000001\n", "LED_ON_OK")):
+            fw = Firmware()
+            self.assertEqual(self._alimentar(fw, b"\x00" + cmd, 0.0), [resposta])
+            self.assertFalse(fw.em_pacote)
+
+    def test_zero_solto_antes_de_frame_f(self):
+        pixels = ["2550000009"] + [None] * (protocolo.NUM_PIXELS - 1)
+        fw = Firmware()
+        respostas = self._alimentar(fw, b"\x00" + protocolo.codificar_frame(pixels), 0.0)
+        self.assertEqual(respostas, ["FRAME_OK"])
+        self.assertEqual(fw.matriz()[0][0], (255, 0, 0))
+
+    def test_zero_solto_antes_de_pacote(self):
+        fw = Firmware()
+        self.assertEqual(self._alimentar(fw, b"\x00" + binario.limpar(), 0.0), ["MATRIZ_CLEARED"])
+
+    def test_codigo_cobs_com_letra_de_comando(self):
+        # primeiro zero no índice 76 de op+payload+crc: o código COBS é 77
+        # = "M", e o pacote continua valendo
+        payload = bytearray(b"\x11" * 128)
+        payload[75] = 0
+        pkt = binario.empacotar(binario.OP_FRAME, bytes(payload))
+        self.assertEqual(pkt[1], ord("M"))
+        fw = Firmware()
+        self.assertEqual(self._alimentar(fw, pkt, 0.0), ["FRAME_OK"])
+
+    def test_pacote_interrompido(self):
+        fw = Firmware()
+        pkt = binario.limpar()
+        self._alimentar(fw, pkt[:-2], 0.0)
+        self.assertEqual(self._alimentar(fw, b"MCL\n", 2 * FRAME_TIMEOUT_S),
+                         ["PKT_INVALID", "MATRIZ_CLEARED"])
+
+
+if __name__ == "__main__":
+    unittest.main()
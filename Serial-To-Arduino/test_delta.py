@@ -0,0 +1,94 @@
+"""
+CodificadorDelta (delta.py): corridas de ida e volta e a base que só anda
+com FRAME_OK.
+
+    python3 -m unittest test_delta     (ou python3 -m pytest)
+"""
+
+import random
+import unittest
+
+import binario
+import protocolo
+from delta import CodificadorDelta, aplicar_corridas, codificar_corridas
+
+CORES = (None, "2550000001", "0002550001", "0000002551")
+
+
+def _frame(rng, base=None, mudancas=64):
+    pixels = list(base) if base else [None] * protocolo.NUM_PIXELS
+    for i in rng.sample(range(protocolo.NUM_PIXELS), mudancas):
+        pixels[i] = rng.choice(CORES)
+    return pixels
+
+
+def _rgb565(pixels):
+    return [protocolo.rgb565(*protocolo.cor_para_rgb(p)) for p in pixels]
+
+
+def _aplicar(device, pkt):
+    # o que o firmware faz com o pacote (device em RGB565)
+    op, payload = binario.desempacotar(pkt)
+    if op == binario.OP_FRAME:
+        return [(payload[2 * i] << 8) | payload[2 * i + 1] for i in range(protocolo.NUM_PIXELS)]
+    return aplicar_corridas(device, payload)
+
+
+class TestCorridas(unittest.TestCase):
+    def test_ida_e_volta(self):
+        rng = random.Random(3)
+        for mudancas in (0, 1, 2, 5, 30, 64):
+            a = _rgb565(_frame(rng))
+            b = list(a)
+            for i in rng.sample(range(len(b)), mudancas):
+                b[i] ^= rng.randrange(1, 0x10000)
+            self.assertEqual(aplicar_corridas(a, codificar_corridas(a, b)), b)
+
+
+class TestCodificador(unittest.TestCase):
+    def test_base_so_anda_com_frame_ok(self):
+        cod = CodificadorDelta()
+        rng = random.Random(4)
+        f1 = _frame(rng)
+        pkt = cod.codificar(f1)
+        self.assertIsNone(cod.base)
+        cod.confirmar(pkt, "FRAME_OK")
+        self.assertEqual(cod.base, _rgb565(f1))
+        self.assertFalse(cod.pendentes)
+
+    def test_delta_vale_em_qualquer_frame_em_voo(self):
+        # sem ACK ainda, o device pode estar em qualquer um dos frames já
+        # enviados: o próximo delta tem que acertar a tela em todos
+        cod = CodificadorDelta()
+        rng = random.Random(5)
+        frame = _frame(rng)
+        device = _aplicar(None, cod.codificar(frame))
+        estados = [device]
+        for _ in range(6):
+            frame = _frame(rng, frame, mudancas=4)
+            pkt = cod.codificar(frame)
+            if pkt is None:
+                continue
+            for estado in estados:
+                self.assertEqual(_aplicar(estado, pkt), _rgb565(frame))
+            estados.append(_aplicar(estados[-1], pkt))
+
+    def test_erro_e_perda_pedem_keyframe(self):
+        rng = random.Random(6)
+        for resposta in ("CRC_ERR", "PKT_INVALID", "FRAME_TIMEOUT", None):
+            cod = CodificadorDelta()
+            frame = _frame(rng)
+            cod.confirmar(cod.codificar(frame), "FRAME_OK")
+            frame = _frame(rng, frame, mudancas=2)
+            pkt = cod.codificar(frame)
+            self.assertEqual(binario.desempacotar(pkt)[0], binario.OP_DELTA)
+            if resposta is None:
+                cod.resync()
+            else:
+                cod.confirmar(pkt, resposta)
+            frame = _frame(rng, frame, mudancas=2)
+            self.assertEqual(binario.desempacotar(cod.codificar(frame))[0], binario.OP_FRAME)
+
+
+if __name__ == "__main__":
+    unittest.main()
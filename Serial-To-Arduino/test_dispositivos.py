@@ -0,0 +1,70 @@
+"""
+Handshake de abertura (dispositivos.esperar_pronto): READY ou PONG, e as
+respostas dos PINGs que ainda estavam no caminho não sobram para o
+primeiro comando.
+
+    python3 -m unittest test_dispositivos     (ou python3 -m pytest)
+"""
+
+import unittest
+from collections import deque
+
+from dispositivos import PING, esperar_pronto
+
+
+class SerialFalsa:
+    """
+    Porta que responde por roteiro: cada PING escrito libera as linhas da
+    próxima entrada de `roteiro` ("" = nada chega).
+    """
+    def __init__(self, roteiro):
+        self.timeout = 1
+        self.roteiro = deque(roteiro)
+        self.entrada = deque()
+        self.pings = 0
+
+    def write(self, data):
+        self.pings += data == PING
+        if data == PING and self.roteiro:
+            self.entrada.extend(l.encode() + b"\n" for l in self.roteiro.popleft().split())
+
+    def readline(self):
+        return self.entrada.popleft() if self.entrada else b""
+
+    def reset_input_buffer(self):
+        self.entrada.clear()
+
+
+class TestEsperarPronto(unittest.TestCase):
+    def _esperar(self, ser, timeout=1.0):
+        return esperar_pronto(ser, timeout=timeout, intervalo_ping=0.01)[0]
+
+    def test_pong(self):
+        ser = SerialFalsa(["PONG"])
+        self.assertEqual(self._esperar(ser), "PING")
+        self.assertEqual(ser.pings, 1)
+        self.assertEqual(ser.timeout, 1)
+
+    def test_ready_com_ping_cortado(self):
+        # boot: dois PINGs somem, o terceiro chega cortado e vira
+        # CMD_INVALID logo depois do READY
+        ser = SerialFalsa(["", "", "READY_SYSTEM CMD_INVALID"])
+        self.assertEqual(self._esperar(ser), "READY")
+        self.assertFalse(ser.entrada)
+
+    def test_pong_atrasado(self):
+        # o PONG do primeiro PING só chega junto com o do segundo
+        ser = SerialFalsa(["", "PONG PONG"])
+        self.assertEqual(self._esperar(ser), "PING")
+        self.assertFalse(ser.entrada)
+
+    def test_firmware_antigo(self):
+        ser = SerialFalsa(["CMD_INVALID"])
+        self.assertEqual(self._esperar(ser), "PING")
+
+    def test_timeout(self):
+        self.assertIsNone(self._esperar(SerialFalsa([]), timeout=0.05))
+
+
+if __name__ == "__main__":
+    unittest.main()
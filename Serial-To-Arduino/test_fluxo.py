@@ -0,0 +1,56 @@
+"""
+ControleFluxo (fluxo.py): janela de comandos e limite de bytes em voo
+(anel de RX do Arduino).
+
+    python3 -m unittest test_fluxo     (ou python3 -m pytest)
+"""
+
+import unittest
+
+from fluxo import ControleFluxo, RX_BUFFER
+
+PIXEL = b"M002550000001\n"          # 14 B
+FRAME = b"F" + bytes(128)           # 129 B, maior que o anel
+
+
+class TestFluxo(unittest.TestCase):
+    def test_ack_casa_com_o_mais_antigo(self):
+        f = ControleFluxo(janela=2)
+        f.registrar([PIXEL, b"MCL\n"], agora=0.0)
+        cmd, rtt, resposta = f.receber("LED_ON_OK", agora=0.01)
+        self.assertEqual((cmd, resposta), (PIXEL, "LED_ON_OK"))
+        self.assertAlmostEqual(rtt, 0.01)
+        self.assertIsNone(f.receber("PONG"))
+        self.assertEqual(f.bytes_em_voo, 4)
+
+    def test_limite_de_bytes(self):
+        f = ControleFluxo(janela=8)
+        n = RX_BUFFER // len(PIXEL)
+        f.registrar([PIXEL] * n)
+        self.assertFalse(f.cabe(len(PIXEL)))
+        self.assertTrue(f.espera_bytes(len(PIXEL)))
+        f.receber("LED_ON_OK")
+        self.assertTrue(f.cabe(len(PIXEL)))
+        self.assertFalse(f.espera_bytes(len(PIXEL)))
+        self.assertEqual(f.esperas_bytes, 1)
+
+    def test_frame_f_so_com_a_linha_vazia(self):
+        # maior que o anel: sai sozinho, qualquer que seja a janela
+        f = ControleFluxo(janela=4)
+        self.assertTrue(f.cabe(len(FRAME)))
+        f.registrar([FRAME])
+        self.assertFalse(f.cabe(len(FRAME)))
+        self.assertFalse(f.cabe(len(PIXEL)))
+        self.assertEqual(f.livres(), 3)
+        f.receber("FRAME_OK")
+        self.assertTrue(f.cabe(len(FRAME)))
+
+    def test_sem_limite_de_bytes(self):
+        f = ControleFluxo(janela=4, max_bytes=None)
+        f.registrar([FRAME, FRAME])
+        self.assertTrue(f.cabe(len(FRAME)))
+        self.assertFalse(f.espera_bytes(len(FRAME)))
+
+
+if __name__ == "__main__":
+    unittest.main()
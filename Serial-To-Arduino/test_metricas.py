@@ -0,0 +1,108 @@
+"""
+Métricas do link (metricas.py): texto do Prometheus de um display e de
+vários, com o label display="<id>" e um TYPE só por métrica; o estado de
+cada display do Gerenciador (emulador.py) vai junto.
+
+    python3 -m unittest test_metricas     (ou python3 -m pytest)
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import metricas
+from dispositivos import Gerenciador
+from emulador import Emulador
+from metricas import Exportador, MetricasLink
+
+
+def _metricas(n_bytes):
+    m = MetricasLink()
+    m.escrita(0.003, n_bytes)
+    m.escrita(0.004, n_bytes, tentativa=2)
+    m.gauge("fila_profundidade", lambda: 1)
+    m.gauge("janela_ack", lambda: None)
+    return m
+
+
+def _amostras(texto):
+    return [l for l in texto.splitlines() if not l.startswith("#")]
+
+
+class TestTexto(unittest.TestCase):
+    def test_um_display_sem_label(self):
+        texto = _metricas(10).texto()
+        self.assertIn("tvbox_link_bytes_tx_total 20", texto)
+        self.assertIn('tvbox_link_retries_total{tentativa="2"} 1', texto)
+        self.assertIn('tvbox_link_escrita_ms_bucket{le="+Inf"} 2', texto)
+        self.assertNotIn("display=", texto)
+        self.assertNotIn("janela_ack", texto)
+
+    def test_varios_displays(self):
+        texto = metricas.texto({1: _metricas(7), 0: _metricas(10)})
+        self.assertIn('tvbox_link_bytes_tx_total{display="0"} 20', texto)
+        self.assertIn('tvbox_link_bytes_tx_total{display="1"} 14', texto)
+        self.assertIn('tvbox_link_retries_total{display="1",tentativa="2"} 1', texto)
+        self.assertIn('tvbox_link_escrita_ms_bucket{display="0",le="+Inf"} 2', texto)
+        self.assertIn('tvbox_link_fila_profundidade{display="1"} 1', texto)
+
+        # um TYPE por métrica, com as amostras dela logo abaixo
+        linhas = texto.splitlines()
+        tipos = [l.split()[2] for l in linhas if l.startswith("# TYPE")]
+        self.assertEqual(len(tipos), len(set(tipos)))
+        familia = None
+        for l in linhas:
+            if l.startswith("# TYPE"):
+                familia = l.split()[2]
+            else:
+                self.assertTrue(l.startswith(familia), l)
+
+        um = _amostras(_metricas(10).texto())
+        self.assertEqual(len(_amostras(texto)), 2 * len(um))
+
+
+class TestExportador(unittest.TestCase):
+    def test_arquivo(self):
+        with tempfile.TemporaryDirectory() as d:
+            grupo = {0: _metricas(10), 1: _metricas(7)}
+            prom = os.path.join(d, "link.prom")
+            Exportador(grupo, prom).gravar()
+            with open(prom) as f:
+                self.assertEqual(f.read(), metricas.texto(grupo))
+
+            arq = os.path.join(d, "link.json")
+            Exportador(grupo, arq).gravar()
+            with open(arq) as f:
+                snap = json.load(f)
+            self.assertEqual(sorted(snap), ["0", "1"])
+            self.assertEqual(snap["1"]["bytes_tx"], 14)
+
+
+class TestGerenciador(unittest.TestCase):
+    def test_estado_por_display(self):
+        emus = [Emulador().iniciar() for _ in range(2)]
+        with tempfile.TemporaryDirectory() as d:
+            ger = Gerenciador([e.porta for e in emus] + [os.path.join(d, "sumiu")],
+                              memoria=os.path.join(d, "portas.json"))
+            try:
+                ger.abrir()
+                ger.enviar(0, b"MCL\n")
+                texto = metricas.texto(ger.metricas())
+            finally:
+                ger.fechar()
+                for e in emus:
+                    e.parar()
+        for id in (0, 1):
+            self.assertIn(f'tvbox_link_conectado{{display="{id}"}} 1', texto)
+            self.assertIn(f'tvbox_link_falhou{{display="{id}"}} 0', texto)
+            self.assertIn(f'tvbox_link_abrir_ms{{display="{id}"}}', texto)
+        self.assertIn('tvbox_link_falhou{display="2"} 1', texto)
+        self.assertIn('tvbox_link_conectado{display="2"} 0', texto)
+        # porta que não abriu não tem tempo de abertura
+        self.assertNotIn('tvbox_link_abrir_ms{display="2"}', texto)
+        self.assertEqual(texto.count("# TYPE tvbox_link_bytes_s_medio gauge"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Framebuffer do OLED (oled.py): as regiões sujas da TelaOled, passadas pelo
+pacote OP_OLED_RAW e pelo decodificador de referência (aplicar_regiao),
+têm que reproduzir o framebuffer desenhado no host.
+
+    python3 -m unittest test_oled     (ou python3 -m pytest)
+"""
+
+import random
+import unittest
+
+import binario
+import oled
+from oled import TelaOled, aplicar_regiao
+
+
+def _aplicar(device, pacotes):
+    for pkt in pacotes:
+        op, payload = binario.desempacotar(pkt)
+        assert op == binario.OP_OLED_RAW
+        aplicar_regiao(device, payload)
+    return device
+
+
+class TestRegioes(unittest.TestCase):
+    def setUp(self):
+        # device e host começam sincronizados (tela apagada)
+        self.tela = TelaOled()
+        self.device = _aplicar(bytearray(b"\xaa" * oled.BYTES_TELA), self.tela.pacotes())
+        self.assertEqual(self.device, self.tela.buf)
+
+    def _sincronizar(self):
+        _aplicar(self.device, self.tela.pacotes())
+        self.assertEqual(self.device, self.tela.buf)
+
+    def test_hud(self):
+        t = self.tela
+        t.texto(4, 5, "LEVEL:", escala=2)
+        t.texto(75, 5, "07", escala=2)
+        t.linha_h(0, 25, 128)
+        t.texto(4, 52, "HI-SCORE: 00042")
+        self._sincronizar()
+        # mudar um dígito só manda o trecho dele
+        t.texto(75, 5, "08", escala=2, fundo=True)
+        pacotes = t.pacotes()
+        self.assertLess(sum(len(p) for p in pacotes), 60)
+        _aplicar(self.device, pacotes)
+        self.assertEqual(self.device, t.buf)
+
+    def test_ultima_coluna_e_pagina(self):
+        t = self.tela
+        t.pixel(oled.LARGURA - 1, oled.ALTURA - 1)
+        pacotes = t.pacotes()
+        self.assertEqual(len(pacotes), 1)
+        self.assertEqual(binario.desempacotar(pacotes[0])[1],
+                         bytes([oled.PAGINAS - 1, oled.LARGURA - 1, 0x80]))
+        _aplicar(self.device, pacotes)
+        self.assertEqual(self.device, t.buf)
+
+        t.retangulo(oled.LARGURA - 10, oled.ALTURA - 12, 10, 12)
+        t.linha_v(0, 0, oled.ALTURA)
+        self._sincronizar()
+
+    def test_pagina_inteira(self):
+        self.tela.linha_h(0, 63, oled.LARGURA)
+        pacotes = self.tela.pacotes()
+        self.assertEqual(len(pacotes), 1)
+        self.assertEqual(len(binario.desempacotar(pacotes[0])[1]), 2 + oled.LARGURA)
+        _aplicar(self.device, pacotes)
+        self.assertEqual(self.device, self.tela.buf)
+
+    def test_commit_vazio(self):
+        t = self.tela
+        self.assertEqual(t.pacotes(), [])
+        # redesenhar igual suja a faixa mas não gera pacote
+        t.texto(4, 35, "VIDAS:")
+        self._sincronizar()
+        t.texto(4, 35, "VIDAS:")
+        self.assertEqual(t.pacotes(), [])
+
+    def test_aleatorio(self):
+        rng = random.Random(8)
+        t = self.tela
+        for _ in range(50):
+            for _ in range(rng.randrange(1, 6)):
+                x, y = rng.randrange(-4, oled.LARGURA), rng.randrange(-4, oled.ALTURA)
+                t.retangulo(x, y, rng.randrange(1, 20), rng.randrange(1, 20),
+                            cheio=rng.random() < 0.5, aceso=rng.random() < 0.7)
+            self._sincronizar()
+
+    def test_invalidar(self):
+        t = self.tela
+        t.texto(4, 5, "LEVEL:", escala=2)
+        self._sincronizar()
+        # device com lixo (ex.: tela da sessão anterior, pacotes perdidos)
+        self.device[:] = bytes(random.Random(9).randrange(256) for _ in range(oled.BYTES_TELA))
+        t.invalidar()
+        pacotes = t.pacotes()
+        self.assertEqual(len(pacotes), oled.PAGINAS)
+        _aplicar(self.device, pacotes)
+        self.assertEqual(self.device, t.buf)
+        self.assertEqual(t.pacotes(), [])
+
+    def test_tela_nova_reenvia_tudo(self):
+        # sessão anterior deixou pixels acesos que o host novo não desenhou
+        device = bytearray(b"\xff" * oled.BYTES_TELA)
+        t = TelaOled()
+        t.texto(0, 0, "OI")
+        _aplicar(device, t.pacotes())
+        self.assertEqual(device, t.buf)
+
+    def test_pacotes_completos(self):
+        # ressincronização de um device que acabou de ligar (tela apagada)
+        t = self.tela
+        t.texto(4, 5, "LEVEL:", escala=2)
+        t.pixel(oled.LARGURA - 1, oled.ALTURA - 1)
+        t.pixel(0, 0)
+        self._sincronizar()
+        device = _aplicar(bytearray(oled.BYTES_TELA), t.pacotes_completos())
+        self.assertEqual(device, t.buf)
+
+    def test_pacotes_completos_tela_apagada(self):
+        self.assertEqual(self.tela.pacotes_completos(), [])
+
+    def test_regiao_invalida(self):
+        buf = bytearray(oled.BYTES_TELA)
+        for payload in (b"", b"\x00\x00", bytes([oled.PAGINAS, 0, 1]),
+                        bytes([0, oled.LARGURA - 1, 1, 2])):
+            with self.assertRaises(ValueError):
+                aplicar_regiao(buf, payload)
+        self.assertEqual(buf, bytearray(oled.BYTES_TELA))
+
+
+if __name__ == "__main__":
+    unittest.main()
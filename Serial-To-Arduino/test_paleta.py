@@ -0,0 +1,97 @@
+"""
+Modo paleta (paleta.py + OP_PALETA/OP_FRAME_IDX do binario.py): frame ->
+paleta + frame indexado -> decodificador de referência -> mesmos pixels,
+e a volta para o frame de cores completas quando a paleta não dá conta.
+
+    python3 -m unittest test_paleta     (ou python3 -m pytest)
+"""
+
+import random
+import unittest
+
+import binario
+import protocolo
+from emulador import Firmware
+from paleta import Paleta
+
+CORES = ("2550000001", "0002550001", "0000002559", "2552552555", "1280640323")
+
+
+def _rgb(cor):
+    # o que o device mostra: a cor passa por RGB565 no caminho
+    return protocolo.rgb565_para_rgb(protocolo.rgb565(*protocolo.cor_para_rgb(cor)))
+
+
+def _decodificar(paleta, pkt):
+    op, payload = binario.desempacotar(paleta.pacote())
+    assert op == binario.OP_PALETA
+    cores = binario.decodificar_paleta(payload)
+    op, payload = binario.desempacotar(pkt)
+    assert op == binario.OP_FRAME_IDX
+    return binario.decodificar_frame_indexado(payload, cores)
+
+
+class TestPaleta(unittest.TestCase):
+    def test_ida_e_volta(self):
+        rng = random.Random(7)
+        paleta = Paleta(CORES)
+        pixels = [rng.choice((None,) + CORES) for _ in range(protocolo.NUM_PIXELS)]
+        pkt = paleta.frame(pixels)
+        self.assertEqual(len(pkt), 37)
+        self.assertEqual(_decodificar(paleta, pkt), [_rgb(p) for p in pixels])
+
+    def test_paleta_cheia(self):
+        cores = [f"{i * 16:03d}0000009" for i in range(1, binario.MAX_CORES_PALETA)]
+        paleta = Paleta(cores)
+        self.assertEqual(len(paleta), binario.MAX_CORES_PALETA)
+        # os 16 índices, inclusive o 15 no nibble baixo
+        pixels = ([None] + cores) * (protocolo.NUM_PIXELS // binario.MAX_CORES_PALETA)
+        self.assertEqual(_decodificar(paleta, paleta.frame(pixels)), [_rgb(p) for p in pixels])
+        with self.assertRaises(ValueError):
+            paleta.adicionar("0012550009")
+
+    def test_cor_fora_da_paleta_cai_no_frame_inteiro(self):
+        # mais cores do que a paleta guarda: frame() diz que não cabe e o
+        # frame vai com cores completas (OP_FRAME), sem perder nenhum pixel
+        cores = [f"{i * 8:03d}1000009" for i in range(1, binario.MAX_CORES_PALETA + 4)]
+        paleta = Paleta(cores[:binario.MAX_CORES_PALETA - 1])
+        pixels = (cores + [None]) * 4
+        pixels = pixels[:protocolo.NUM_PIXELS]
+        self.assertIsNone(paleta.indices(pixels))
+        self.assertIsNone(paleta.frame(pixels))
+
+        op, payload = binario.desempacotar(binario.frame(pixels))
+        self.assertEqual(op, binario.OP_FRAME)
+        self.assertEqual(protocolo.decodificar_frame(protocolo.CMD_FRAME + payload),
+                         [_rgb(p) for p in pixels])
+
+    def test_indice_sem_cor_apaga(self):
+        paleta = Paleta(CORES[:2])
+        op, payload = binario.desempacotar(binario.frame_indexado([15] * protocolo.NUM_PIXELS))
+        cores = binario.decodificar_paleta(binario.desempacotar(paleta.pacote())[1])
+        self.assertEqual(binario.decodificar_frame_indexado(payload, cores),
+                         [(0, 0, 0)] * protocolo.NUM_PIXELS)
+
+    def test_firmware(self):
+        # o emulador usa os mesmos decodificadores: a matriz tem que bater
+        paleta = Paleta(CORES)
+        pixels = [CORES[i % len(CORES)] if i % 3 else None for i in range(protocolo.NUM_PIXELS)]
+        fw = Firmware()
+        respostas = []
+        for pkt in (paleta.pacote(), paleta.frame(pixels)):
+            for b in pkt:
+                respostas += [r for r, _, _ in fw.receber(b, 0.0)]
+        self.assertEqual(respostas, ["PALETA_OK", "FRAME_OK"])
+        self.assertEqual([rgb for linha in fw.matriz() for rgb in linha], [_rgb(p) for p in pixels])
+
+    def test_payload_invalido(self):
+        with self.assertRaises(ValueError):
+            binario.decodificar_paleta(b"")
+        with self.assertRaises(ValueError):
+            binario.decodificar_paleta(b"\x00" * (2 * binario.MAX_CORES_PALETA + 2))
+        with self.assertRaises(ValueError):
+            binario.decodificar_frame_indexado(b"\x00" * 31, [(0, 0, 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Frame F (protocolo.py): codificar_frame / decodificar_frame de ida e volta
+nos extremos do RGB565 e validação de tamanho e prefixo.
+
+    python3 -m unittest test_protocolo     (ou python3 -m pytest)
+"""
+
+import unittest
+
+import protocolo
+
+
+def _cor(r, g, b, i=9):
+    return f"{r:03d}{g:03d}{b:03d}{i}"
+
+
+class TestRgb565(unittest.TestCase):
+    def test_extremos(self):
+        self.assertEqual(protocolo.rgb565(0, 0, 0), 0)
+        self.assertEqual(protocolo.rgb565(255, 255, 255), 0xFFFF)
+        self.assertEqual(protocolo.rgb565_para_rgb(0), (0, 0, 0))
+        self.assertEqual(protocolo.rgb565_para_rgb(0xFFFF), (255, 255, 255))
+
+    def test_bits_baixos(self):
+        # R e B guardam 5 bits, G guarda 6: o que cabe abaixo disso some
+        self.assertEqual(protocolo.rgb565_para_rgb(protocolo.rgb565(7, 3, 7)), (0, 0, 0))
+        self.assertEqual(protocolo.rgb565_para_rgb(protocolo.rgb565(8, 4, 8)), (8, 4, 8))
+        for v in range(256):
+            r, g, b = protocolo.rgb565_para_rgb(protocolo.rgb565(v, v, v))
+            self.assertEqual((r >> 3, g >> 2, b >> 3), (v >> 3, v >> 2, v >> 3))
+
+
+class TestFrame(unittest.TestCase):
+    def _ida_e_volta(self, pixels):
+        data = protocolo.codificar_frame(pixels)
+        self.assertEqual(len(data), protocolo.TAMANHO_FRAME)
+        self.assertEqual(len(data), 129)
+        self.assertEqual(data[:1], b"F")
+        esperado = [protocolo.rgb565_para_rgb(protocolo.rgb565(*protocolo.cor_para_rgb(p)))
+                    for p in pixels]
+        self.assertEqual(protocolo.decodificar_frame(data), esperado)
+        return data
+
+    def test_apagado_e_branco(self):
+        self._ida_e_volta([None] * protocolo.NUM_PIXELS)
+        data = self._ida_e_volta([_cor(255, 255, 255)] * protocolo.NUM_PIXELS)
+        self.assertEqual(data[1:], b"\xff" * 128)
+        self.assertEqual(protocolo.decodificar_frame(data)[0], (255, 255, 255))
+
+    def test_extremos_por_canal(self):
+        valores = (0, 1, 3, 4, 7, 8, 127, 128, 200, 251, 252, 255)
+        pixels = []
+        for v in valores:
+            pixels += [_cor(v, 0, 0), _cor(0, v, 0), _cor(0, 0, v)]
+        pixels += [_cor(255, 255, 255, i) for i in range(1, 10)]
+        pixels += [None] * (protocolo.NUM_PIXELS - len(pixels))
+        self._ida_e_volta(pixels)
+
+    def test_ordem_logica(self):
+        pixels = [None] * protocolo.NUM_PIXELS
+        pixels[9] = _cor(255, 0, 0)          # linha 1, coluna 1
+        data = protocolo.codificar_frame(pixels)
+        self.assertEqual(data[1 + 2 * 9:3 + 2 * 9], b"\xf8\x00")
+        saida = protocolo.decodificar_frame(data)
+        self.assertEqual(saida[9], (255, 0, 0))
+        self.assertEqual(saida.count((0, 0, 0)), protocolo.NUM_PIXELS - 1)
+
+    def test_tamanho_errado(self):
+        with self.assertRaises(ValueError):
+            protocolo.codificar_frame([None] * (protocolo.NUM_PIXELS - 1))
+        data = protocolo.codificar_frame([None] * protocolo.NUM_PIXELS)
+        for ruim in (data[:-1], data + b"\x00", b"", b"F"):
+            with self.assertRaises(ValueError):
+                protocolo.decodificar_frame(ruim)
+
+    def test_prefixo_errado(self):
+        data = protocolo.codificar_frame([None] * protocolo.NUM_PIXELS)
+        for prefixo in (b"M", b"f", b"\x00"):
+            with self.assertRaises(ValueError):
+                protocolo.decodificar_frame(prefixo + data[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()
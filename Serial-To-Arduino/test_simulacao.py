@@ -0,0 +1,112 @@
+"""
+Regras dos jogos (regras.py) e simulação (simulacao.py): a cobrinha em
+lote (NumPy) tem que jogar as mesmas partidas que a escalar, que roda o
+mesmo regras.Cobra do game.py.
+
+    python3 -m unittest test_simulacao     (ou python3 -m pytest)
+"""
+
+import random
+import unittest
+
+import regras
+from simulacao import LoteCobrinha, SimCobrinha, SEM_TECLA, _teclas_roteiro
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _roteiro(semente, n):
+    rng = random.Random(semente)
+    return "".join(rng.choice("WSAD....") for _ in range(n))
+
+
+@unittest.skipIf(np is None, "a simulação em lote precisa do numpy")
+class TestLoteIgualEscalar(unittest.TestCase):
+    def _comparar(self, semente, ticks, teclas=None):
+        sim = SimCobrinha(rng=np.random.default_rng(semente))
+        lote = LoteCobrinha(1, semente=semente)
+        for t in range(ticks):
+            if teclas is None:
+                tecla = sim.gulosa()
+                self.assertEqual(lote.gulosa()[0], tecla)
+            else:
+                tecla = teclas[t % len(teclas)]
+            vivo = sim.passo(tecla)
+            self.assertEqual(bool(lote.passo(np.array([tecla]))[0]), not vivo, t)
+            self.assertEqual(int(lote.score[0]), sim.jogo.score)
+        self.assertEqual(np.concatenate(lote.scores).tolist() if lote.scores else [], sim.scores)
+        self.assertEqual(np.concatenate(lote.duracoes).tolist() if lote.duracoes else [], sim.duracoes)
+        return sim
+
+    def test_roteiro(self):
+        mortes = 0
+        for semente in range(8):
+            sim = self._comparar(semente, 400, _teclas_roteiro(_roteiro(semente, 97)))
+            mortes += len(sim.scores)
+        self.assertGreater(mortes, 8)
+
+    def test_gulosa(self):
+        sim = self._comparar(42, 3000)
+        self.assertTrue(sim.scores)
+        self.assertGreater(max(sim.scores), 5)
+
+    def test_sem_tecla(self):
+        # sempre para a direita: nunca bate, come o que estiver na linha
+        sim = self._comparar(3, 200, [SEM_TECLA])
+        self.assertEqual(sim.scores, [])
+
+
+class TestRegras(unittest.TestCase):
+    def test_cobra_nao_vira_para_tras(self):
+        cobra = regras.Cobra(rng=random.Random(1))
+        cobra.virar(regras.ESQ)
+        self.assertEqual(cobra.direcao, regras.DIR)
+        cobra.virar(regras.CIMA)
+        self.assertTrue(cobra.passo())
+        self.assertEqual(cobra.corpo.cabeca(), (3, 4))
+
+    def test_cobra_bate(self):
+        cobra = regras.Cobra(rng=random.Random(1))
+        # come duas vezes (comida logo à frente) para ter corpo onde bater
+        for _ in range(2):
+            cobra.comida = cobra.tab.vizinha(*cobra.corpo.cabeca(), *regras.DIRECOES[cobra.direcao])
+            self.assertTrue(cobra.passo())
+        self.assertEqual((len(cobra.corpo), cobra.score), (5, 2))
+        for d in (regras.BAIXO, regras.ESQ):
+            cobra.virar(d)
+            self.assertTrue(cobra.passo())
+        cobra.virar(regras.CIMA)
+        self.assertFalse(cobra.passo())
+
+    def test_memoria(self):
+        jogo = regras.Memoria(rng=random.Random(2))
+        self.assertEqual(len(jogo), regras.MEMORIA_INICIAL)
+        for _ in range(regras.MAX_ERROS - 1):
+            fora = next((l, c) for l in range(8) for c in range(8) if (l, c) not in jogo.leds)
+            self.assertEqual(jogo.marcar(*fora), "erro")
+            jogo.nova_tentativa()
+        primeiro, segundo = jogo.leds.ocupadas()
+        self.assertEqual(jogo.marcar(*primeiro), "acerto")
+        self.assertEqual(jogo.marcar(*primeiro), "acerto")
+        self.assertEqual(jogo.marcar(*segundo), "vitoria")
+
+        jogo.proximo_nivel()
+        self.assertEqual((len(jogo), jogo.erros), (regras.MEMORIA_INICIAL + 1, 0))
+        fora = next((l, c) for l in range(8) for c in range(8) if (l, c) not in jogo.leds)
+        resultados = [jogo.marcar(*fora) for _ in range(regras.MAX_ERROS)]
+        self.assertEqual(resultados[-1], "derrota")
+        jogo.recomecar()
+        self.assertEqual((len(jogo), jogo.erros), (regras.MEMORIA_INICIAL, 0))
+
+    def test_tempos(self):
+        self.assertAlmostEqual(regras.duracao(regras.derrota_x(None)), 1.06)
+        self.assertAlmostEqual(regras.duracao(regras.erro_memoria(None)), 2.06)
+        self.assertAlmostEqual(regras.duracao(regras.derrota_memoria(None)), 1.36)
+        self.assertAlmostEqual(regras.duracao(regras.vitoria(None)), 0.60)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+Atlas de sprites (sprites.py): os dígitos do menu, passados pela
+Geometria do game.py, têm que acender os mesmos LEDs do desenho antigo
+(acender_led ponto a ponto com a coluna espelhada à mão).
+
+    python3 -m unittest test_sprites     (ou python3 -m pytest)
+"""
+
+import unittest
+
+from geometria import Geometria
+from sprites import Atlas
+
+# o mesmo "1" e "3" do DIGITOS do game.py
+DIGITOS = {
+    "1": ["00100", "01100", "00100", "00100", "00100", "00100", "01110"],
+    "3": ["11110", "00001", "00001", "01110", "00001", "00001", "11110"],
+}
+
+
+def _desenho_antigo(grade):
+    # M{l}{c} que o game.py mandava antes da Geometria
+    altura, largura = len(grade), len(grade[0])
+    offset_l, offset_c = (8 - altura) // 2, (8 - largura) // 2
+    return {
+        (l + offset_l, largura - 1 - c + offset_c)
+        for l in range(altura) for c in range(largura) if grade[l][c] == "1"
+    }
+
+
+class TestDigitos(unittest.TestCase):
+    def test_mesmos_leds_do_desenho_antigo(self):
+        geo = Geometria(espelhar_h=True)
+        atlas = Atlas(geo)
+        for d, grade in DIGITOS.items():
+            atlas.de_grade(d, grade)
+            leds = {(l, c) for _, l, c, _ in geo.mapear([(l, c, None) for l, c in atlas.sprites[d]])}
+            self.assertEqual(leds, _desenho_antigo(grade), d)
+
+    def test_colunas_visuais(self):
+        atlas = Atlas(Geometria()).de_grade("3", DIGITOS["3"])
+        self.assertEqual({c for _, c in atlas.sprites["3"]}, {2, 3, 4, 5, 6})
+        self.assertEqual({l for l, _ in atlas.sprites["3"]}, set(range(7)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,596 @@
+"""
+Transporte serial assíncrono.
+
+A classe TransporteSerial é dona da porta: os jogos chamam enviar()/submit()
+e seguem a vida; uma task asyncio (numa thread própria) tira os comandos da
+fila, junta vários numa escrita só e cuida do pacing adaptativo, retry e
+reconexão que antes travavam o enviar() do game.py.
+
+O transporte também guarda o estado atual da tela (lembrar()): depois de
+uma reconexão, ou se o Arduino reiniciar sozinho (READY no meio do jogo),
+esse estado volta para a frente da fila antes de qualquer comando
+pendente, e o tempo até o device confirmar entra em recuperacao_ms.
+
+Sem porta aberta (ser=None) a abertura acontece na thread do transporte:
+iniciar(esperar=False) volta na hora e o que for enviado antes da porta
+abrir fica na fila e sai assim que ela estiver pronta.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+import serial
+
+from metricas import MetricasLink
+
+# pacing base + adaptativo (anti travamento)
+USB_PACING_BASE = 0.004
+USB_PACING_MAX  = 0.020
+
+# heurística de “link degradado”
+TIMEOUT_STREAK_RECONNECT = 10  # reconecta após N timeouts seguidos
+
+# esperas entre tentativas de reabrir (a porta pode sumir por um instante
+# enquanto o USB re-enumera)
+RECONEXAO_ESPERAS = (0.0, 0.05, 0.1, 0.2, 0.4, 0.8)
+
+# o que fazer quando a fila enche
+DESCARTAR_ANTIGO = "descartar_antigo"  # joga fora o comando mais velho
+DESCARTAR_NOVO   = "descartar_novo"    # recusa o comando novo
+BLOQUEAR         = "bloquear"          # quem enviou espera ter espaço
+
+
+class TransporteSerial:
+    """
+    Fila de saída limitada + escritor asyncio.
+
+    abrir: função que abre e devolve um serial.Serial (usada na reconexão)
+    ser: porta já aberta (opcional; sem ela o transporte abre sozinho)
+    max_fila: comandos na fila antes de aplicar a política
+    max_lote: bytes juntados numa única escrita
+    ao_receber: callback(linha) chamado com cada linha vinda do Arduino
+    fluxo: ControleFluxo (fluxo.py) para pacing por ACK; None = pacing fixo
+    gravador: captura.Gravador que registra cada TX/RX (None = não grava)
+    pacing_base / pacing_max: limites do pacing adaptativo (s por comando)
+
+    Sem fluxo o pacing é por comando (cada comando ASCII faz um
+    strip.show() no Arduino), mas é um asyncio.sleep no escritor:
+    ninguém fora do transporte espera por ele. Com fluxo, o próximo
+    comando sai assim que a janela de ACKs tiver espaço.
+    """
+    def __init__(self, abrir, ser=None, max_fila=256, politica=DESCARTAR_ANTIGO,
+                 max_lote=64, ao_receber=None, retries=3, fluxo=None,
+                 pacing_base=USB_PACING_BASE, pacing_max=USB_PACING_MAX, gravador=None):
+        self.abrir = abrir
+        self.ser = ser
+        self.max_fila = max_fila
+        self.politica = politica
+        self.max_lote = max_lote
+        self.ao_receber = ao_receber
+        self.retries = retries
+        self.fluxo = fluxo
+        self.gravador = gravador
+
+        self.pacing_base = pacing_base
+        self.pacing_max = pacing_max
+        self.pacing = pacing_base
+        self.timeout_streak = 0
+
+        self.fila = deque()
+        self.loop = None
+        self._thread = None
+        self._pronto = threading.Event()
+        self._tem_dados = None
+        self._tem_espaco = None
+        self._escritor_task = None
+        self._conexao_task = None
+        self._fim = None
+        self._ocioso = None
+        self._ack = None
+        self._rx = bytearray()
+
+        # estado da tela para ressincronizar: chave -> cmd (ou função que o
+        # gera), reenviado na ordem em que as chaves apareceram
+        self.tela = {}
+        self._t_falha = None        # início da sequência de falhas atual
+        self._marca_tela = None     # último comando da ressincronização em curso
+        self._t_perda = None
+
+        # primeira abertura: `abertura` marca o fim da tentativa (ok ou erro)
+        self.abertura = threading.Event()
+        self.erro = None
+        self.ao_abrir = None            # callback() no fim da tentativa
+
+        # com fluxo, na thread do loop: ao_ack(cmd, resposta) para cada
+        # resposta casada com o seu comando; ao_perda() quando o device pode
+        # não ter recebido o que foi escrito (ACK não veio, reconexão, READY)
+        self.ao_ack = None
+        self.ao_perda = None
+        self.t_conectado = None         # monotônico
+        self.t_primeira_escrita = None  # monotônico
+
+        # contadores da fila; os do link ficam em self.metricas
+        self.enfileirados = 0
+        self.descartados = 0
+        self.recusados = 0
+        self.comandos_escritos = 0
+        self.max_profundidade = 0
+
+        self.metricas = MetricasLink()
+        self.metricas.gauge("pacing_s", lambda: round(self.pacing, 4))
+        self.metricas.gauge("fila_profundidade", lambda: len(self.fila))
+        self.metricas.gauge("fila_descartados", lambda: self.descartados + self.recusados)
+        self.metricas.gauge("timeout_streak", lambda: self.timeout_streak)
+        self.metricas.gauge("janela_ack", lambda: self.fluxo.janela if self.fluxo else None)
+
+    # ---------- API ----------
+    @staticmethod
+    def _bytes(cmd):
+        return cmd if isinstance(cmd, bytes) else (cmd + "\n").encode()
+
+    def submit_nowait(self, cmd):
+        """
+        Enfileira sem esperar (só na thread do loop).
+        Devolve False se o comando foi recusado.
+        """
+        if self.erro is not None:
+            # a porta nunca abriu: não há para onde mandar
+            self.recusados += 1
+            return False
+        data = self._bytes(cmd)
+
+        if len(self.fila) >= self.max_fila:
+            if self.politica == DESCARTAR_ANTIGO and self.tela:
+                # os diffs na fila dependem uns dos outros (e a paleta dos
+                # frames): perder um deixa a tela errada. Troca todos pela
+                # tela lembrada, que já inclui o estado deste comando
+                self.descartados += len(self.fila)
+                self.fila.clear()
+                self._ressincronizar()
+            elif self.politica == DESCARTAR_ANTIGO:
+                self.fila.popleft()
+                self.descartados += 1
+            else:
+                self.recusados += 1
+                return False
+
+        self.fila.append(data)
+        self.enfileirados += 1
+        self.max_profundidade = max(self.max_profundidade, len(self.fila))
+        self._ocioso.clear()
+        self._tem_dados.set()
+        return True
+
+    async def submit(self, cmd):
+        """
+        Versão awaitable: com a política BLOQUEAR espera ter espaço na fila.
+        """
+        if self.politica == BLOQUEAR:
+            while len(self.fila) >= self.max_fila:
+                self._tem_espaco.clear()
+                await self._tem_espaco.wait()
+        return self.submit_nowait(cmd)
+
+    def enviar(self, cmd):
+        """
+        Chamada síncrona e thread-safe para o código dos jogos.
+        Não bloqueia (a não ser com a política BLOQUEAR e fila cheia).
+        """
+        if threading.current_thread() is self._thread:
+            return self.submit_nowait(cmd)
+        if self.politica == BLOQUEAR:
+            return asyncio.run_coroutine_threadsafe(self.submit(cmd), self.loop).result()
+        self.loop.call_soon_threadsafe(self.submit_nowait, cmd)
+        return True
+
+    def lembrar(self, chave, cmd):
+        """
+        Registra o estado atual de uma parte da tela (ex.: "matriz",
+        "oled", "paleta"). cmd pode ser uma lista de comandos ou uma função
+        sem argumentos que devolve um deles: só é chamada se precisar
+        ressincronizar.
+        """
+        self.tela[chave] = cmd
+
+    def profundidade(self):
+        return len(self.fila)
+
+    def estado(self):
+        m = self.metricas
+        return {
+            "profundidade": len(self.fila),
+            "max_profundidade": self.max_profundidade,
+            "politica": self.politica,
+            "enfileirados": self.enfileirados,
+            "descartados": self.descartados,
+            "recusados": self.recusados,
+            "comandos_escritos": self.comandos_escritos,
+            "escritas": m.escritas,
+            "bytes_enviados": m.bytes_tx,
+            "bytes_recebidos": m.bytes_rx,
+            "falhas": m.falhas,
+            "reconexoes": m.reconexoes,
+            "ressincronizacoes": m.ressincronizacoes,
+            "pacing": round(self.pacing, 4),
+            "fluxo": self.fluxo.estado() if self.fluxo else None,
+        }
+
+    def custo_comando(self):
+        """
+        Tempo estimado que cada comando ocupa o link (usado para escolher
+        entre diff e frame inteiro).
+        """
+        if self.fluxo:
+            rtt = self.fluxo.rtt_medio()
+            if rtt is not None:
+                return rtt / max(1, self.fluxo.janela)
+        return self.pacing
+
+    # ---------- THREAD ----------
+    def iniciar(self, esperar=True):
+        """
+        Sobe o loop asyncio numa thread daemon e volta quando a porta abrir
+        (esperar=False: assim que a fila aceitar comandos). Se a primeira
+        abertura falhar, levanta o erro dela.
+        """
+        self._thread = threading.Thread(target=self._main, daemon=True)
+        self._thread.start()
+        self._pronto.wait()
+        if esperar:
+            self.abertura.wait()
+            if self.erro is not None:
+                raise self.erro
+        return self
+
+    @property
+    def conectado(self):
+        return self.abertura.is_set() and self.erro is None
+
+    def _main(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.run())
+        finally:
+            self.loop.close()
+
+    def fechar(self, timeout=2.0):
+        """
+        Espera a fila esvaziar (até timeout) e fecha a porta.
+        """
+        if self.loop is None or not self.loop.is_running():
+            return
+        fut = asyncio.run_coroutine_threadsafe(self._fechar(timeout), self.loop)
+        try:
+            fut.result(timeout + 1.0)
+        except Exception:
+            pass
+        self._thread.join(1.0)
+
+    # ---------- LOOP ----------
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self._tem_dados = asyncio.Event()
+        self._tem_espaco = asyncio.Event()
+        self._ocioso = asyncio.Event()
+        self._ocioso.set()
+        self._ack = asyncio.Event()
+        self._fim = asyncio.Event()
+
+        # a fila já aceita comandos; eles saem quando a porta abrir
+        self._pronto.set()
+        self._conexao_task = asyncio.ensure_future(self._conectar())
+        try:
+            if not await self._conexao_task:
+                await self._fim.wait()
+                return
+        except asyncio.CancelledError:
+            return
+        if self._fim.is_set():
+            # fechar() chegou junto com a abertura
+            self.ser.close()
+            return
+
+        self._escritor_task = asyncio.ensure_future(self._escritor())
+        try:
+            await self._escritor_task
+        except asyncio.CancelledError:
+            pass
+
+    async def _conectar(self):
+        """
+        Primeira abertura (se não veio uma porta pronta). Se a fila
+        transbordar enquanto isso, submit_nowait() já trocou os comandos
+        pela tela lembrada.
+        """
+        if self.ser is None:
+            try:
+                ser = await self.loop.run_in_executor(None, self.abrir)
+                if self._fim.is_set():
+                    # fechar() chegou durante a abertura: ninguém mais vai
+                    # usar a porta que o executor acabou de devolver
+                    ser.close()
+                    raise serial.SerialException("fechado durante a abertura")
+                self.ser = ser
+            except Exception as e:
+                self.erro = e
+                self.fila.clear()
+                self._ocioso.set()
+                self.abertura.set()
+                if self.ao_abrir:
+                    self.ao_abrir()
+                return False
+        self._registrar_leitor()
+        self.t_conectado = time.monotonic()
+        self.abertura.set()
+        if self.ao_abrir:
+            self.ao_abrir()
+        return True
+
+    async def _fechar(self, timeout):
+        if self._escritor_task is None:
+            # ainda abrindo (ou a porta nunca abriu): não há o que esvaziar.
+            # Sem cancelar a abertura: o open() segue no executor e a porta
+            # que ele devolver é fechada em _conectar()
+            self._fim.set()
+            return
+        try:
+            await asyncio.wait_for(self._ocioso.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._escritor_task.cancel()
+        self._remover_leitor()
+        try:
+            self.ser.close()
+        except Exception:
+            pass
+
+    async def _escritor(self):
+        while True:
+            await self._tem_dados.wait()
+            if not self.fila:
+                self._tem_dados.clear()
+                self._ocioso.set()
+                continue
+
+            limite = None
+            if self.fluxo:
+                await self._esperar_janela()
+                if not self.fila:
+                    continue
+                limite = self.fluxo.livres()
+
+            # junta comandos pequenos numa escrita só
+            lote = [self.fila.popleft()]
+            tamanho = len(lote[0])
+            while (self.fila and tamanho + len(self.fila[0]) <= self.max_lote
+                   and (limite is None or (len(lote) < limite
+                                           and self.fluxo.cabe(len(self.fila[0]), tamanho)))):
+                tamanho += len(self.fila[0])
+                lote.append(self.fila.popleft())
+            self._tem_espaco.set()
+
+            # registra antes de escrever: o ACK pode chegar antes do flush voltar
+            if self.fluxo:
+                self.fluxo.registrar(lote)
+
+            ok = await self._escrever(b"".join(lote))
+            if ok:
+                self.comandos_escritos += len(lote)
+                if self._marca_tela is not None and not self.fluxo and any(c is self._marca_tela for c in lote):
+                    self._tela_recuperada()
+            else:
+                if self.fluxo:
+                    self.fluxo.cancelar(len(lote))
+                self._perdeu()
+                if ok is None:
+                    # reconectou: o lote volta para a fila, atrás da tela
+                    self.fila.extendleft(reversed(lote))
+                    self._ressincronizar(self._t_falha)
+
+            if not self.fluxo:
+                await asyncio.sleep(self.pacing * len(lote))
+
+    async def _esperar_janela(self):
+        """
+        Espera um ACK liberar espaço na janela (em comandos e em bytes para
+        o próximo da fila); comandos sem resposta dentro do timeout são
+        dados como perdidos (e a janela encolhe).
+        """
+        if self.fluxo.expirar():
+            self._perdeu()
+        if self.fila:
+            self.fluxo.espera_bytes(len(self.fila[0]))
+        while self.fila and (self.fluxo.livres() == 0 or not self.fluxo.cabe(len(self.fila[0]))):
+            self._ack.clear()
+            espera = max(0.0, self.fluxo.prazo() - self.loop.time())
+            try:
+                await asyncio.wait_for(self._ack.wait(), espera)
+            except asyncio.TimeoutError:
+                if self.fluxo.expirar():
+                    self._perdeu()
+
+    def _perdeu(self):
+        if self.ao_perda:
+            self.ao_perda()
+
+    def _escrever_sync(self, data):
+        self.ser.write(data)
+        self.ser.flush()
+
+    async def _escrever(self, data):
+        """
+        Envio robusto (mesma lógica do antigo enviar() do game.py):
+        - pacing adaptativo
+        - retry com backoff
+        - auto-reconnect ao detectar sequência de timeouts/erros
+
+        True = escrito, False = desistiu, None = reconectou sem escrever
+        (quem chamou devolve o lote para a fila).
+        """
+        for i in range(self.retries):
+            t0 = time.monotonic()
+            # grava antes de esperar a escrita: enquanto ela roda no executor
+            # o _ler já registra as respostas que chegam
+            if self.gravador:
+                self.gravador.tx(data, t0)
+            try:
+                await self.loop.run_in_executor(None, self._escrever_sync, data)
+
+                # sucesso -> reduz pacing gradualmente
+                if self.pacing > self.pacing_base:
+                    self.pacing = max(self.pacing_base, self.pacing - 0.001)
+
+                self.timeout_streak = 0
+                self._t_falha = None
+                self.metricas.escrita(time.monotonic() - t0, len(data), i + 1)
+                if self.t_primeira_escrita is None:
+                    self.t_primeira_escrita = t0
+                return True
+
+            except serial.SerialTimeoutException:
+                self.timeout_streak += 1
+                self.metricas.timeout()
+
+                # congestionou -> aumenta pacing + backoff
+                self.pacing = min(self.pacing_max, self.pacing + 0.003)
+                try:
+                    self.ser.reset_output_buffer()
+                except Exception:
+                    pass
+                await asyncio.sleep(0.08 * (i + 1))
+
+            except Exception:
+                # ex.: USB desconectado (write levanta SerialException/OSError)
+                self.timeout_streak += 1
+                self.metricas.erro_escrita()
+                await asyncio.sleep(0.06)
+
+            if self.gravador:
+                self.gravador.evento("escrita_falhou")
+            if self._t_falha is None:
+                self._t_falha = t0
+            if self.timeout_streak >= TIMEOUT_STREAK_RECONNECT:
+                if await self._reconectar():
+                    return None
+                break
+
+        self.metricas.falha()
+        return False
+
+    async def _reconectar(self):
+        """
+        Recuperação automática sem reiniciar o jogo.
+        """
+        print("[WARN] Reconectando serial...")
+        t0 = time.monotonic()
+        if self.gravador:
+            self.gravador.evento("reconexao", t0)
+        self._remover_leitor()
+        try:
+            self.ser.close()
+        except Exception:
+            pass
+        erro = None
+        for espera in RECONEXAO_ESPERAS:
+            await asyncio.sleep(espera)
+            try:
+                self.ser = await self.loop.run_in_executor(None, self.abrir)
+                break
+            except Exception as e:
+                erro = e
+        else:
+            self.metricas.reconexao(time.monotonic() - t0, False)
+            print("[ERRO] Falha ao reconectar:", erro)
+            return False
+
+        self._registrar_leitor()
+        if self.fluxo:
+            self.fluxo.resetar()
+        self._perdeu()
+        self.timeout_streak = 0
+        self.pacing = min(self.pacing_max, self.pacing_base + 0.006)
+        dt = time.monotonic() - t0
+        self.metricas.reconexao(dt, True)
+        print(f"[OK] Serial reconectada ({dt * 1000:.0f} ms).")
+        return True
+
+    # ---------- RESSINCRONIZAÇÃO ----------
+    def _ressincronizar(self, t_perda=None):
+        """
+        Põe o estado lembrado da tela na frente da fila (o device voltou
+        apagado). t_perda: quando a tela deixou de valer, para a métrica.
+        """
+        cmds = []
+        for cmd in list(self.tela.values()):
+            if callable(cmd):
+                cmd = cmd()
+            cmds.extend(self._bytes(c) for c in (cmd if isinstance(cmd, list) else [cmd]))
+        if not cmds:
+            return
+        self.fila.extendleft(reversed(cmds))
+        if self.gravador:
+            self.gravador.evento("ressincronizacao")
+        self._marca_tela = cmds[-1]
+        self._t_perda = t_perda if t_perda is not None else time.monotonic()
+        self.metricas.ressincronizacao()
+        self._ocioso.clear()
+        self._tem_dados.set()
+
+    def _tela_recuperada(self):
+        dt = time.monotonic() - self._t_perda
+        self._marca_tela = None
+        self.metricas.recuperacao(dt)
+        print(f"[OK] Tela restaurada ({dt * 1000:.0f} ms).")
+
+    # ---------- RX ----------
+    def _registrar_leitor(self):
+        try:
+            self.loop.add_reader(self.ser.fileno(), self._ler)
+        except Exception:
+            pass
+
+    def _remover_leitor(self):
+        try:
+            self.loop.remove_reader(self.ser.fileno())
+        except Exception:
+            pass
+
+    def _ler(self):
+        try:
+            n = self.ser.in_waiting
+            data = self.ser.read(n or 1)
+        except Exception:
+            self._remover_leitor()
+            return
+
+        self.metricas.recebido(len(data))
+        if self.gravador:
+            self.gravador.rx(data)
+        self._rx += data
+        while b"\n" in self._rx:
+            linha, _, resto = self._rx.partition(b"\n")
+            self._rx = bytearray(resto)
+            linha = linha.decode(errors="ignore").strip()
+            if not linha:
+                continue
+            if self.fluxo:
+                r = self.fluxo.receber(linha)
+                if r:
+                    self._ack.set()
+                    if self._marca_tela is not None and r[0] is self._marca_tela:
+                        self._tela_recuperada()
+                    if self.ao_ack:
+                        self.ao_ack(r[0], r[2])
+            if "READY" in linha:
+                self._perdeu()
+            if "READY" in linha and self.tela:
+                # o Arduino reiniciou sozinho: o que estava em voo se perdeu
+                if self.fluxo:
+                    self.fluxo.resetar()
+                    self._ack.set()
+                self._ressincronizar()
+            if self.ao_receber:
+                self.ao_receber(linha)